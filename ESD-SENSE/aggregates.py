@@ -0,0 +1,238 @@
+"""
+Materialized cohort aggregates for the dashboard.
+Counters are updated incrementally as attempts and analyses arrive, so
+reading the dashboard metrics costs the same for 12 or 40,000 students.
+"""
+
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils import AnalysisUtils
+
+
+RISK_BANDS = ('high', 'medium', 'on_track')
+
+
+def week_numbers(timestamps: pd.Series) -> np.ndarray:
+    """
+    Monday-based week number (weeks since the 1970-01-05 Monday) for timestamps.
+
+    Args:
+        timestamps: Series of datetimes
+
+    Returns:
+        Integer array of week numbers
+    """
+    days = timestamps.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+    # 1970-01-01 was a Thursday; shift so weeks start on Monday
+    return (days - 4) // 7
+
+
+class _StudentRecord:
+    """Per-student contribution to the cohort counters."""
+
+    __slots__ = ('first_week', 'last_week', 'gap_count', 'band')
+
+    def __init__(self, first_week: Optional[int], last_week: Optional[int]):
+        self.first_week = first_week
+        self.last_week = last_week
+        self.gap_count = 0
+        self.band: Optional[str] = None
+
+
+class CohortAggregates:
+    """
+    Running totals behind the dashboard: students, gaps, risk bands and
+    week-over-week deltas. Each update adjusts counters by the difference
+    it causes; snapshot() only reads counters.
+    """
+
+    def __init__(self):
+        self._students: Dict[str, _StudentRecord] = {}
+        self._lock = threading.Lock()
+
+        self.total_students = 0
+        self.total_gaps = 0
+        self.analyzed_students = 0
+        self.band_counts = Counter({band: 0 for band in RISK_BANDS})
+        self.current_week: Optional[int] = None
+
+        # Students first seen in each week
+        self._new_students_by_week = Counter()
+        # Gaps and risk bands bucketed by each student's latest active week
+        self._gaps_by_week = Counter()
+        self._bands_by_week: Dict[int, Counter] = {}
+
+    @classmethod
+    def from_data(cls, attempts_df: pd.DataFrame,
+                  analyses: Optional[Dict[str, Dict]] = None) -> 'CohortAggregates':
+        """
+        Build aggregates from an attempt table and (optionally) its analyses.
+
+        Args:
+            attempts_df: DataFrame with question attempts
+            analyses: Dictionary mapping student ID to analysis results
+
+        Returns:
+            Populated CohortAggregates
+        """
+        aggregates = cls()
+        aggregates.add_attempts(attempts_df)
+        if analyses:
+            aggregates.apply_analyses(analyses)
+        return aggregates
+
+    def add_attempts(self, attempts_df: pd.DataFrame) -> List[str]:
+        """
+        Register new attempts, updating student counts and activity weeks.
+
+        Args:
+            attempts_df: DataFrame with newly recorded attempts
+
+        Returns:
+            IDs of students touched by the batch (their analyses are now stale)
+        """
+        if len(attempts_df) == 0:
+            return []
+
+        student_ids = attempts_df['Student_ID'].astype(str)
+        if 'Timestamp' in attempts_df.columns:
+            weeks = pd.Series(week_numbers(attempts_df['Timestamp']), index=attempts_df.index)
+            grouped = weeks.groupby(student_ids, sort=False)
+            first_weeks, last_weeks = grouped.min(), grouped.max()
+        else:
+            touched = student_ids.unique()
+            first_weeks = last_weeks = pd.Series([None] * len(touched), index=touched)
+
+        with self._lock:
+            for student_id, first_week, last_week in zip(first_weeks.index,
+                                                         first_weeks.to_numpy(),
+                                                         last_weeks.to_numpy()):
+                first_week = None if first_week is None else int(first_week)
+                last_week = None if last_week is None else int(last_week)
+                record = self._students.get(student_id)
+
+                if record is None:
+                    record = _StudentRecord(first_week, last_week)
+                    self._students[student_id] = record
+                    self.total_students += 1
+                    self._new_students_by_week[first_week] += 1
+                    continue
+
+                if first_week is not None and (record.first_week is None or first_week < record.first_week):
+                    self._new_students_by_week[record.first_week] -= 1
+                    self._new_students_by_week[first_week] += 1
+                    record.first_week = first_week
+                if last_week is not None and (record.last_week is None or last_week > record.last_week):
+                    self._remove_contribution(record)
+                    record.last_week = last_week
+                    self._add_contribution(record)
+
+            if 'Timestamp' in attempts_df.columns:
+                batch_week = int(last_weeks.max())
+                if self.current_week is None or batch_week > self.current_week:
+                    self.current_week = batch_week
+
+        return list(first_weeks.index)
+
+    def apply_analysis(self, student_id: str, analysis: Dict) -> None:
+        """
+        Replace a student's contribution with a fresh analysis result.
+
+        Args:
+            student_id: Student the analysis belongs to
+            analysis: Dictionary from LearningGapDetector
+        """
+        with self._lock:
+            self._apply(student_id, analysis)
+
+    def apply_analyses(self, analyses: Dict[str, Dict]) -> None:
+        """Apply a batch of analyses (e.g. one precompute chunk)."""
+        with self._lock:
+            for student_id, analysis in analyses.items():
+                self._apply(student_id, analysis)
+
+    def students_in_bands(self, bands: List[str]) -> List[str]:
+        """
+        IDs of analyzed students whose risk band is one of `bands`.
+
+        Args:
+            bands: Risk bands to include ('high', 'medium', 'on_track')
+
+        Returns:
+            List of student IDs
+        """
+        wanted = set(bands)
+        with self._lock:
+            return [
+                student_id for student_id, record in self._students.items()
+                if record.band in wanted
+            ]
+
+    def snapshot(self) -> Dict:
+        """
+        Current dashboard metrics.
+
+        Returns:
+            Dictionary with totals, risk band counts and week-over-week deltas
+        """
+        with self._lock:
+            week = self.current_week
+            previous = week - 1 if week is not None else None
+            flagged = self.band_counts['high'] + self.band_counts['medium']
+
+            return {
+                'total_students': self.total_students,
+                'analyzed_students': self.analyzed_students,
+                'gaps_detected': self.total_gaps,
+                'risk_bands': dict(self.band_counts),
+                'intervention_rate': flagged / self.analyzed_students if self.analyzed_students else 0.0,
+                'new_students_this_week': self._new_students_by_week[week] if week is not None else 0,
+                'gaps_this_week': self._gaps_by_week[week] if week is not None else 0,
+                'intervention_rate_delta': (self._weekly_rate(week) - self._weekly_rate(previous))
+                                           if week is not None else 0.0,
+            }
+
+    def _apply(self, student_id: str, analysis: Dict) -> None:
+        """Swap in a new analysis for a student (lock must be held)."""
+        record = self._students.get(student_id)
+        if record is None:
+            record = _StudentRecord(None, None)
+            self._students[student_id] = record
+            self.total_students += 1
+            self._new_students_by_week[None] += 1
+
+        self._remove_contribution(record)
+        if record.band is None:
+            self.analyzed_students += 1
+        record.gap_count = len(analysis.get('gaps', {}))
+        record.band = AnalysisUtils.get_risk_band(analysis)
+        self._add_contribution(record)
+
+    def _add_contribution(self, record: _StudentRecord) -> None:
+        if record.band is None:
+            return
+        self.total_gaps += record.gap_count
+        self.band_counts[record.band] += 1
+        self._gaps_by_week[record.last_week] += record.gap_count
+        self._bands_by_week.setdefault(record.last_week, Counter())[record.band] += 1
+
+    def _remove_contribution(self, record: _StudentRecord) -> None:
+        if record.band is None:
+            return
+        self.total_gaps -= record.gap_count
+        self.band_counts[record.band] -= 1
+        self._gaps_by_week[record.last_week] -= record.gap_count
+        self._bands_by_week[record.last_week][record.band] -= 1
+
+    def _weekly_rate(self, week: Optional[int]) -> float:
+        """Share of students last active in a week who need intervention."""
+        bands = self._bands_by_week.get(week)
+        if not bands:
+            return 0.0
+        active = sum(bands.values())
+        return (bands['high'] + bands['medium']) / active if active else 0.0
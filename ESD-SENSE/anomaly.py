@@ -0,0 +1,209 @@
+"""
+Unusual attempt profiles, scored with an IsolationForest.
+The model is fitted once on a cohort's student_features() matrix, saved
+with joblib and reused to score students in vectorized batches. Students
+it isolates quickly get a 'profile_gap' naming the features furthest from
+the cohort median. scikit-learn is only imported when a model is fitted or
+loaded, so the detector and CLI still start without it.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+import config
+from instrumentation import traced
+from student_features import TOPIC_PREFIX, student_features
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+FEATURE_LABELS = {
+    'accuracy': 'accuracy',
+    'time_cv': 'time variability',
+    'velocity': 'learning velocity',
+    'engagement': 'attempts per day',
+}
+
+
+class ProfileAnomalyDetector:
+    """
+    IsolationForest over per-student feature vectors.
+    Scores are IsolationForest anomaly scores in (0, 1]: around 0.5 for
+    ordinary students, closer to 1 for students that are easy to isolate.
+    """
+
+    def __init__(self, contamination: Optional[float] = None,
+                 n_estimators: Optional[int] = None,
+                 batch_size: Optional[int] = None,
+                 random_state: Optional[int] = None):
+        settings = config.ANOMALY
+        self.contamination = contamination or settings['contamination']
+        self.n_estimators = n_estimators or settings['n_estimators']
+        self.batch_size = batch_size or settings['batch_size']
+        self.random_state = settings['random_state'] if random_state is None else random_state
+        self.model = None
+        self.feature_names: List[str] = []
+        self.center = np.zeros(0)
+        self.scale = np.ones(0)
+        self.high_threshold = np.inf
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.model is not None
+
+    @property
+    def topics(self) -> List[str]:
+        """Topics the model has an accuracy feature for."""
+        return [name[len(TOPIC_PREFIX):] for name in self.feature_names if name.startswith(TOPIC_PREFIX)]
+
+    @traced('anomaly.fit')
+    def fit(self, attempts_df: pd.DataFrame) -> 'ProfileAnomalyDetector':
+        """
+        Fit the model on every student of an attempt table.
+
+        Args:
+            attempts_df: DataFrame with question attempts for the whole cohort
+
+        Returns:
+            self
+        """
+        return self.fit_features(student_features(attempts_df))
+
+    def fit_features(self, features: pd.DataFrame) -> 'ProfileAnomalyDetector':
+        """Fit the model on a student_features() matrix."""
+        from sklearn.ensemble import IsolationForest
+
+        values = features.to_numpy(dtype=np.float64)
+        self.feature_names = list(features.columns)
+        self.model = IsolationForest(n_estimators=self.n_estimators, contamination=self.contamination,
+                                     random_state=self.random_state)
+        self.model.fit(values)
+
+        # Robust center and spread, used to explain which features look unusual
+        self.center = np.median(values, axis=0)
+        quartiles = np.percentile(values, [25, 75], axis=0)
+        spread = (quartiles[1] - quartiles[0]) / 1.349
+        fallback = values.std(axis=0)
+        self.scale = np.where(spread > 0, spread, np.where(fallback > 0, fallback, 1.0))
+
+        scores = self._anomaly_scores(values)
+        share = config.ANOMALY['high_severity_share']
+        self.high_threshold = float(np.quantile(scores, 1 - share)) if len(scores) else np.inf
+        return self
+
+    @traced('anomaly.score')
+    def score(self, attempts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Score every student of an attempt table.
+
+        Args:
+            attempts_df: DataFrame with question attempts (all of each
+                scored student's attempts)
+
+        Returns:
+            DataFrame indexed by Student_ID with anomaly_score, unusual
+            (beyond the contamination threshold) and reasons (the two
+            features furthest from the cohort, for unusual students)
+        """
+        return self.score_features(student_features(attempts_df, self.topics))
+
+    def score_features(self, features: pd.DataFrame) -> pd.DataFrame:
+        """score() for a student_features() matrix."""
+        import pandas as pd
+
+        if not self.is_fitted:
+            raise ValueError("Anomaly model is not fitted; call fit() or load() first")
+        values = self._align(features)
+        scores = self._anomaly_scores(values)
+        unusual = scores > -self.model.offset_
+
+        reasons = np.full(len(values), '', dtype=object)
+        flagged = np.flatnonzero(unusual)
+        if len(flagged):
+            deviation = (values[flagged] - self.center) / self.scale
+            top = np.argsort(-np.abs(deviation), axis=1)[:, :2]
+            for row, student in enumerate(flagged):
+                reasons[student] = ', '.join(
+                    self._describe(self.feature_names[column], deviation[row, column]) for column in top[row])
+        return pd.DataFrame({'anomaly_score': scores, 'unusual': unusual, 'reasons': reasons},
+                            index=features.index)
+
+    def gaps(self, attempts_df: pd.DataFrame) -> Dict[str, Dict]:
+        """
+        'profile_gap' entries for the unusual students of an attempt table.
+
+        Returns:
+            Student ID -> gap dictionary (severity, confidence,
+            affected_questions, description), unusual students only
+        """
+        scores = self.score(attempts_df)
+        scores = scores[scores['unusual']]
+        if len(scores) == 0:
+            return {}
+        attempts = attempts_df.groupby(attempts_df['Student_ID'].astype(str), observed=True).size()
+        return {
+            student_id: {
+                'severity': 'high' if row.anomaly_score >= self.high_threshold else 'medium',
+                'confidence': float(row.anomaly_score),
+                'affected_questions': int(attempts.get(student_id, 0)),
+                'description': f"Unusual attempt profile for this cohort: {row.reasons}",
+            }
+            for student_id, row in zip(scores.index, scores.itertuples(index=False))
+        }
+
+    def save(self, path: str) -> None:
+        """Persist the fitted model with joblib."""
+        import joblib
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        joblib.dump(self, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'ProfileAnomalyDetector':
+        """Load a model written by save()."""
+        import joblib
+
+        model = joblib.load(path)
+        if not isinstance(model, cls):
+            raise ValueError(f"{path} does not contain a {cls.__name__}")
+        return model
+
+    @classmethod
+    def load_or_fit(cls, path: str, attempts_df: pd.DataFrame) -> 'ProfileAnomalyDetector':
+        """Load the model at path, or fit one on attempts_df and save it there."""
+        if os.path.exists(path):
+            return cls.load(path)
+        model = cls().fit(attempts_df)
+        model.save(path)
+        return model
+
+    def _align(self, features: pd.DataFrame) -> np.ndarray:
+        """Feature matrix in the fitted column order (unseen topics get the student's accuracy)."""
+        missing = [name for name in self.feature_names if name not in features.columns]
+        if missing:
+            features = features.assign(**{name: features['accuracy'] for name in missing})
+        return features[self.feature_names].to_numpy(dtype=np.float64)
+
+    def _anomaly_scores(self, values: np.ndarray) -> np.ndarray:
+        """IsolationForest anomaly scores, computed batch_size rows at a time."""
+        scores = np.empty(len(values))
+        for start in range(0, len(values), self.batch_size):
+            batch = values[start:start + self.batch_size]
+            scores[start:start + len(batch)] = -self.model.score_samples(batch)
+        return scores
+
+    @staticmethod
+    def _describe(feature: str, deviation: float) -> str:
+        if feature.startswith(TOPIC_PREFIX):
+            label = f"{feature[len(TOPIC_PREFIX):]} accuracy"
+        else:
+            label = FEATURE_LABELS.get(feature, feature)
+        return f"{label} {'above' if deviation > 0 else 'below'} the cohort"
+
@@ -0,0 +1,229 @@
+"""
+Streamlit caching layer for EDU-SENSE.
+Datasets, attempt indexes and per-student analyses are cached process-wide,
+keyed by dataset fingerprint and detection mode, so every session working
+on the same class dataset shares one in-memory copy and one set of analyses.
+Shared datasets are frozen (read-only, see shared_data.py); sessions keep a
+shared_data.session_view() of them, so a session adding or changing columns
+never touches the cached frame.
+"""
+
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+import config
+from aggregates import CohortAggregates
+from anomaly import ProfileAnomalyDetector
+from attempt_index import AttemptIndex
+from baselines import CohortBaselines
+from clustering import StudentClusters
+from data_generator import generate_synthetic_data
+from data_loader import dataset_fingerprint, file_fingerprint, load_attempts
+from gap_detector import LearningGapDetector
+from peers import PeerIndex
+from precompute import AnalysisPrecomputer
+from recommendation_engine import RecommendationEngine
+from shared_data import enable_copy_on_write, freeze, session_view
+from time_travel import TimeTravelIndex
+
+
+DATASET_TTL = config.CACHE['dataset_ttl_seconds']
+MAX_DATASETS = config.CACHE['max_datasets']
+ANALYSIS_TTL = config.CACHE['analysis_ttl_seconds']
+MAX_ANALYSES = config.CACHE['max_analyses']
+
+# Frames derived from a shared dataset copy on write instead of failing on it
+enable_copy_on_write()
+
+
+@st.cache_resource(ttl=DATASET_TTL, max_entries=MAX_DATASETS,
+                   show_spinner="Generating sample data...")
+def load_sample_dataset(num_students: int = 12, num_questions: int = 50,
+                        random_seed: int = 42) -> Tuple[str, pd.DataFrame]:
+    """
+    Generate (once per process) the synthetic sample dataset.
+
+    Returns:
+        Tuple of (dataset fingerprint, attempts DataFrame)
+    """
+    data = generate_synthetic_data(num_students, num_questions, random_seed)
+    return dataset_fingerprint(data), freeze(data)
+
+
+def load_file_dataset(path: str,
+                      progress_callback: Optional[Callable] = None) -> Tuple[str, pd.DataFrame]:
+    """
+    Load an attempts file, sharing the result with every session.
+    The file fingerprint is part of the cache key, so edited files reload.
+
+    Args:
+        path: Path to a .csv, .parquet or .jsonl attempt file
+        progress_callback: Passed to load_attempts on a cache miss
+
+    Returns:
+        Tuple of (dataset fingerprint, attempts DataFrame)
+    """
+    return _load_file_dataset(path, file_fingerprint(path), progress_callback)
+
+
+@st.cache_resource(ttl=DATASET_TTL, max_entries=MAX_DATASETS, show_spinner=False)
+def _load_file_dataset(path: str, fingerprint: str,
+                       _progress_callback: Optional[Callable] = None) -> Tuple[str, pd.DataFrame]:
+    """Cached body of load_file_dataset (callback excluded from the key)."""
+    data = load_attempts(path, progress_callback=_progress_callback)
+    return fingerprint, freeze(data)
+
+
+@st.cache_resource(ttl=DATASET_TTL, max_entries=MAX_DATASETS, show_spinner="Indexing attempts...")
+def get_attempt_index(fingerprint: str, _data: pd.DataFrame) -> AttemptIndex:
+    """Build (once per dataset) the per-student attempt index."""
+    # Its own view: the index outlives the session whose frame built it
+    return AttemptIndex(session_view(_data))
+
+
+@st.cache_resource(ttl=DATASET_TTL, max_entries=MAX_DATASETS, show_spinner="Indexing attempt history...")
+def get_time_travel_index(fingerprint: str, mode: str, _data: pd.DataFrame) -> TimeTravelIndex:
+    """Build (once per dataset and detection mode) the prefix sums for "as of date" analysis."""
+    return TimeTravelIndex(_data, get_detector(mode))
+
+
+@st.cache_resource(ttl=DATASET_TTL, max_entries=MAX_DATASETS, show_spinner="Computing cohort baselines...")
+def get_baselines(fingerprint: str, _data: pd.DataFrame) -> CohortBaselines:
+    """Per-topic and per-question timing/accuracy baselines (once per dataset)."""
+    return CohortBaselines.from_data(_data)
+
+
+@st.cache_resource(ttl=DATASET_TTL, max_entries=MAX_DATASETS, show_spinner="Fitting profile model...")
+def get_anomaly_model(fingerprint: str, _data: pd.DataFrame) -> Optional[ProfileAnomalyDetector]:
+    """
+    Unusual-profile model for a dataset, fitted once and kept in the cache
+    directory so later runs load it instead of refitting.
+
+    Returns:
+        Fitted ProfileAnomalyDetector, or None if disabled in config.ANOMALY
+        or the cohort is smaller than its min_students
+    """
+    settings = config.ANOMALY
+    if not settings['enabled'] or _data['Student_ID'].nunique() < settings['min_students']:
+        return None
+    path = os.path.join(config.DATA_LOADING['cache_dir'], f"anomaly-{fingerprint}.joblib")
+    return ProfileAnomalyDetector.load_or_fit(path, _data)
+
+
+@st.cache_resource(ttl=DATASET_TTL, max_entries=MAX_DATASETS, show_spinner="Grouping students...")
+def get_student_clusters(fingerprint: str, n_clusters: int, _data: pd.DataFrame) -> StudentClusters:
+    """Intervention groups of a dataset (once per dataset and group count)."""
+    return StudentClusters(n_clusters).fit(_data)
+
+
+@st.cache_resource(ttl=DATASET_TTL, max_entries=MAX_DATASETS, show_spinner=False)
+def get_peer_index(fingerprint: str, _data: pd.DataFrame) -> PeerIndex:
+    """
+    Similar-student index of a dataset, built on a background thread.
+
+    Returns:
+        PeerIndex (check is_ready before relying on its answers, and error
+        if it never becomes ready)
+    """
+    index = PeerIndex()
+    index.rebuild_in_background(_data)
+    return index
+
+
+@st.cache_resource
+def get_detector(mode: str) -> LearningGapDetector:
+    """Shared gap detector for a detection mode."""
+    return LearningGapDetector(mode=mode)
+
+
+@st.cache_resource
+def get_recommendation_engine() -> RecommendationEngine:
+    """Shared recommendation engine."""
+    return RecommendationEngine()
+
+
+@st.cache_resource(ttl=DATASET_TTL, max_entries=MAX_DATASETS, show_spinner=False)
+def get_precomputer(fingerprint: str, mode: str, _index: AttemptIndex) -> AnalysisPrecomputer:
+    """
+    Start (once per dataset and detection mode) background analysis of the cohort.
+
+    Returns:
+        Running AnalysisPrecomputer shared by every session
+    """
+    aggregates = get_aggregates(fingerprint, mode, _index.data)
+    precomputer = AnalysisPrecomputer(_index, get_detector(mode), get_recommendation_engine(),
+                                      on_results=aggregates.apply_analyses,
+                                      baselines=get_baselines(fingerprint, _index.data),
+                                      anomaly=get_anomaly_model(fingerprint, _index.data))
+    if config.PRECOMPUTE['enabled']:
+        precomputer.start()
+    return precomputer
+
+
+@st.cache_resource(ttl=DATASET_TTL, max_entries=MAX_DATASETS, show_spinner=False)
+def get_aggregates(fingerprint: str, mode: str, _data: pd.DataFrame) -> CohortAggregates:
+    """
+    Materialized dashboard metrics for a dataset and detection mode.
+    Filled in by the background precomputation as students are analyzed.
+    """
+    return CohortAggregates.from_data(_data)
+
+
+def student_analysis(fingerprint: str, mode: str, student_id: str,
+                     index: AttemptIndex) -> Dict:
+    """
+    Analysis for a student, read from the background precomputation when
+    ready and computed on demand (and cached) otherwise.
+    """
+    analysis = get_precomputer(fingerprint, mode, index).get_analysis(student_id)
+    if analysis is None:
+        analysis = analyze_student(fingerprint, mode, student_id, index)
+    return analysis
+
+
+def student_recommendations(fingerprint: str, mode: str, student_id: str,
+                            index: AttemptIndex) -> List[Dict]:
+    """
+    Recommendations for a student, read from the background precomputation
+    when ready and computed on demand (and cached) otherwise.
+    """
+    recommendations = get_precomputer(fingerprint, mode, index).get_recommendations(student_id)
+    if recommendations is None:
+        recommendations = get_recommendations(fingerprint, mode, student_id, index)
+    return recommendations
+
+
+@st.cache_data(ttl=ANALYSIS_TTL, max_entries=MAX_ANALYSES, show_spinner=False)
+def analyze_student(fingerprint: str, mode: str, student_id: str,
+                    _index: AttemptIndex) -> Dict:
+    """
+    Analyze one student, cached per (dataset, detection mode, student).
+
+    Args:
+        fingerprint: Fingerprint of the dataset the index was built from
+        mode: Detection mode ('standard', 'early_detection', 'conservative')
+        student_id: Student to analyze
+        _index: Attempt index for the dataset (not part of the key)
+
+    Returns:
+        Dictionary from LearningGapDetector.analyze_student()
+    """
+    return get_detector(mode).analyze_student(_index.student_frame(student_id),
+                                              get_baselines(fingerprint, _index.data),
+                                              get_anomaly_model(fingerprint, _index.data))
+
+
+@st.cache_data(ttl=ANALYSIS_TTL, max_entries=MAX_ANALYSES, show_spinner=False)
+def get_recommendations(fingerprint: str, mode: str, student_id: str,
+                        _index: AttemptIndex) -> List[Dict]:
+    """
+    Recommendations for one student, cached per (dataset, detection mode, student).
+
+    Returns:
+        List of recommendation dictionaries
+    """
+    analysis = analyze_student(fingerprint, mode, student_id, _index)
+    return get_recommendation_engine().generate_recommendations(analysis)
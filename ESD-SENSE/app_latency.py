@@ -0,0 +1,130 @@
+"""
+Interaction latency check for the Streamlit app.
+Simulates concurrent sessions (load data -> select student -> analyze) with
+Streamlit's AppTest harness and reports p50/p95/p99 per interaction.
+
+Usage:
+    python app_latency.py [--sessions 100] [--workers 8]
+
+Note: AppTest re-runs the whole script for every interaction, so the
+interaction numbers are full-app reruns and an upper bound on what a browser
+session sees. A fragment rerun (a click inside a fragment, or the dashboard's
+polling refresh while background analysis runs) executes only the fragment
+body; those bodies are timed separately through their `view.*` instrumentation
+spans and reported as extra rows.
+AppTest keeps global runtime state, so concurrent sessions run in separate
+worker processes (each with its own Streamlit caches).
+"""
+
+import argparse
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+
+def run_session(session_number: int, timeout: float = 120) -> Dict[str, float]:
+    """
+    Drive one app session through the analysis workflow.
+
+    Args:
+        session_number: Index of the session (picks which student to analyze)
+        timeout: Per-interaction timeout in seconds
+
+    Returns:
+        Dictionary mapping interaction name (or `view.*` fragment stage) to
+        latency in milliseconds; fragment stages give the session's mean body time
+    """
+    from streamlit.testing.v1 import AppTest
+
+    import instrumentation
+
+    timings = {}
+    instrumentation.reset()
+    instrumentation.enable()
+
+    def timed(name, action):
+        start = time.perf_counter()
+        action()
+        timings[name] = (time.perf_counter() - start) * 1000
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    timed('open', at.run)
+    timed('load_data', lambda: at.button(key='load_data').click().run())
+    timed('open_analysis', lambda: at.sidebar.radio[0].set_value('Student Analysis').run())
+
+    options = at.selectbox(key='student_select').options
+    student_id = options[session_number % len(options)]
+    timed('select_student', lambda: at.selectbox(key='student_select').set_value(student_id).run())
+    timed('analyze', lambda: at.button(key='analyze_btn').click().run())
+
+    if at.exception:
+        raise RuntimeError(f"Session {session_number} raised: {at.exception[0].value}")
+
+    for stage, stats in instrumentation.summary().items():
+        if stage.startswith('view.'):
+            timings[stage] = stats['mean_seconds'] * 1000
+    return timings
+
+
+def run_sessions(session_numbers: List[int]) -> List[Dict[str, float]]:
+    """Run several sessions one after another in a worker process."""
+    # One task per worker: AppTest swaps out __main__ while running the
+    # app, so later tasks could not be unpickled in the same process
+    return [run_session(number) for number in session_numbers]
+
+
+def measure(sessions: int = 100, workers: int = 8) -> Dict[str, Dict[str, float]]:
+    """
+    Run concurrent sessions and summarize latencies per interaction.
+
+    Args:
+        sessions: Number of simulated sessions
+        workers: Sessions running at the same time (one per process)
+
+    Returns:
+        Dictionary mapping interaction name to p50/p95/p99/max in milliseconds
+    """
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    batches = [list(range(sessions))[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in executor.map(run_sessions, [b for b in batches if b]):
+            for timings in batch:
+                for name, value in timings.items():
+                    latencies[name].append(value)
+
+    return {
+        name: {
+            'p50': float(np.percentile(values, 50)),
+            'p95': float(np.percentile(values, 95)),
+            'p99': float(np.percentile(values, 99)),
+            'max': float(np.max(values)),
+        }
+        for name, values in latencies.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure EDU-SENSE interaction latency")
+    parser.add_argument('--sessions', type=int, default=100, help="Number of simulated sessions")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent sessions")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = measure(args.sessions, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.sessions} sessions ({args.workers} concurrent) in {elapsed:.1f}s\n")
+    width = max([16] + [len(name) + 2 for name in summary])
+    print(f"{'Interaction':<{width}}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in summary.items():
+        print(f"{name:<{width}}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}{stats['max']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Per-student row index over an attempt table.
+Built once per dataset so student lookups slice positions instead of
+scanning the whole table with a boolean mask.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from instrumentation import traced
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class AttemptIndex:
+    """
+    Groups attempt rows by student without copying the attempt table.
+    Rows for each student keep their original order.
+    """
+
+    @traced('index.build')
+    def __init__(self, data: pd.DataFrame):
+        import pandas as pd
+
+        self.data = data
+
+        codes, uniques = pd.factorize(data['Student_ID'], sort=True)
+        self.order = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes, minlength=len(uniques))
+
+        self.student_ids = np.asarray(uniques).astype(str)
+        self.counts = counts
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._positions: Dict[str, int] = {
+            student_id: i for i, student_id in enumerate(self.student_ids)
+        }
+        self._row_students: Optional[np.ndarray] = None
+        self._topics: Optional[List[str]] = None
+        self._time_range: Optional[Tuple[pd.Timestamp, pd.Timestamp]] = None
+
+    def __len__(self) -> int:
+        return len(self.student_ids)
+
+    def __contains__(self, student_id: str) -> bool:
+        return student_id in self._positions
+
+    @property
+    def num_attempts(self) -> int:
+        """Total number of indexed attempts."""
+        return len(self.order)
+
+    def students(self) -> List[str]:
+        """Sorted list of student IDs."""
+        return self.student_ids.tolist()
+
+    def topics(self) -> List[str]:
+        """Sorted list of topics present in the data (computed once)."""
+        if self._topics is None:
+            if 'Topic' not in self.data.columns:
+                self._topics = []
+            else:
+                self._topics = sorted(str(topic) for topic in self.data['Topic'].dropna().unique())
+        return self._topics
+
+    def time_range(self) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """(earliest, latest) attempt timestamp, or None without timestamps."""
+        if self._time_range is None and 'Timestamp' in self.data.columns and self.num_attempts:
+            self._time_range = (self.data['Timestamp'].min(), self.data['Timestamp'].max())
+        return self._time_range
+
+    def search_students(self, prefix: str = '', limit: int = 50) -> List[str]:
+        """
+        Find students whose ID starts with a prefix (binary search on sorted IDs).
+
+        Args:
+            prefix: Student ID prefix (empty matches everyone)
+            limit: Maximum number of IDs to return
+
+        Returns:
+            Sorted list of at most `limit` matching student IDs
+        """
+        lo, hi = self._prefix_range(prefix)
+        return self.student_ids[lo:min(hi, lo + limit)].tolist()
+
+    def count_students(self, prefix: str = '') -> int:
+        """Number of students whose ID starts with a prefix."""
+        lo, hi = self._prefix_range(prefix)
+        return hi - lo
+
+    def query(self,
+              student_prefix: str = '',
+              topics: Optional[Iterable[str]] = None,
+              student_ids: Optional[Iterable[str]] = None,
+              start: Optional[pd.Timestamp] = None,
+              end: Optional[pd.Timestamp] = None,
+              sort_by: Optional[str] = None,
+              ascending: bool = True,
+              page: int = 0,
+              page_size: int = 50) -> Tuple[pd.DataFrame, int]:
+        """
+        Filter, sort and fetch one page of attempts without materializing
+        the filtered table.
+
+        Args:
+            student_prefix: Only students whose ID starts with this prefix
+            topics: Only attempts on these topics
+            student_ids: Only these students (e.g. a risk band)
+            start: Only attempts at or after this time
+            end: Only attempts at or before this time
+            sort_by: Column to sort by (index order if None)
+            ascending: Sort direction
+            page: Zero-based page number
+            page_size: Rows per page
+
+        Returns:
+            Tuple of (page DataFrame, total number of matching rows)
+        """
+        import pandas as pd
+
+        lo, hi = self._prefix_range(student_prefix)
+        rows = self.order[self.offsets[lo]:self.offsets[hi]]
+
+        if student_ids is not None:
+            allowed = np.zeros(len(self.student_ids), dtype=bool)
+            positions = [self._positions[s] for s in student_ids if s in self._positions]
+            allowed[positions] = True
+            rows = rows[allowed[self._row_student_positions()[rows]]]
+
+        if topics is not None and 'Topic' in self.data.columns:
+            rows = rows[self.data['Topic'].iloc[rows].isin(list(topics)).to_numpy()]
+
+        if (start is not None or end is not None) and 'Timestamp' in self.data.columns:
+            timestamps = self.data['Timestamp'].iloc[rows]
+            keep = np.ones(len(rows), dtype=bool)
+            if start is not None:
+                keep &= (timestamps >= pd.Timestamp(start)).to_numpy()
+            if end is not None:
+                keep &= (timestamps <= pd.Timestamp(end)).to_numpy()
+            rows = rows[keep]
+
+        total = len(rows)
+        first = max(0, page) * page_size
+        if first >= total:
+            return self.data.iloc[rows[:0]], total
+
+        if sort_by is not None:
+            rows = rows[self._page_order(rows, sort_by, ascending, first + page_size)]
+
+        return self.data.iloc[rows[first:first + page_size]], total
+
+    def row_positions(self, student_id: str) -> np.ndarray:
+        """
+        Positional row numbers of a student's attempts.
+
+        Args:
+            student_id: Student to look up
+
+        Returns:
+            Array of positions into the indexed DataFrame (empty if unknown)
+        """
+        position = self._positions.get(student_id)
+        if position is None:
+            return self.order[:0]
+        return self.order[self.offsets[position]:self.offsets[position + 1]]
+
+    @traced('index.student_frame')
+    def student_frame(self, student_id: str) -> pd.DataFrame:
+        """
+        Get all attempts for a student.
+
+        Args:
+            student_id: Student to look up
+
+        Returns:
+            DataFrame with the student's attempts (same rows as a boolean mask)
+        """
+        return self.data.iloc[self.row_positions(student_id)]
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """[lo, hi) positions of sorted student IDs starting with prefix."""
+        if not prefix:
+            return 0, len(self.student_ids)
+        lo = int(np.searchsorted(self.student_ids, prefix, side='left'))
+        hi = int(np.searchsorted(self.student_ids, prefix + '\U0010ffff', side='left'))
+        return lo, hi
+
+    def _row_student_positions(self) -> np.ndarray:
+        """Student position of every row (built on first use)."""
+        if self._row_students is None:
+            row_students = np.empty(len(self.order), dtype=np.int32)
+            row_students[self.order] = np.repeat(
+                np.arange(len(self.student_ids), dtype=np.int32), self.counts
+            )
+            self._row_students = row_students
+        return self._row_students
+
+    def _page_order(self, rows: np.ndarray, sort_by: str, ascending: bool, needed: int) -> np.ndarray:
+        """
+        Ordering of `rows` by a column, only fully sorting the first `needed`.
+
+        Returns:
+            Positions into `rows`, correctly ordered for the first `needed` entries
+        """
+        import pandas as pd
+
+        values = self.data[sort_by].iloc[rows]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            keys = values.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        elif pd.api.types.is_numeric_dtype(values):
+            keys = values.to_numpy(dtype=np.float64)
+        else:
+            keys = pd.factorize(values, sort=True)[0]
+        if not ascending:
+            keys = -keys
+
+        if needed >= len(keys):
+            return np.argsort(keys, kind='stable')
+        # Same head as a full stable sort: everything below the needed-th key,
+        # then ties at it in row order (argpartition picks ties arbitrarily,
+        # which would repeat or skip rows across pages)
+        kth = np.partition(keys, needed - 1)[needed - 1]
+        if np.isnan(kth):
+            below, ties = np.flatnonzero(~np.isnan(keys)), np.flatnonzero(np.isnan(keys))
+        else:
+            below, ties = np.flatnonzero(keys < kth), np.flatnonzero(keys == kth)
+        head = np.concatenate((below, ties[:needed - len(below)]))
+        return head[np.argsort(keys[head], kind='stable')]
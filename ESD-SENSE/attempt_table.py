@@ -0,0 +1,114 @@
+"""
+Paginated, server-side filtered attempt table for the Streamlit app.
+Filtering, sorting and paging run against the AttemptIndex; only one page
+of rows is ever sent to the browser.
+"""
+
+from typing import Optional
+
+import pandas as pd
+import streamlit as st
+
+import config
+from aggregates import CohortAggregates
+from attempt_index import AttemptIndex
+
+
+RISK_BAND_LABELS = {
+    'high': '🔴 High Risk',
+    'medium': '🟡 Medium Risk',
+    'on_track': '🟢 On Track',
+}
+
+
+def render_attempt_table(index: AttemptIndex,
+                         aggregates: Optional[CohortAggregates] = None,
+                         key: str = 'attempts') -> None:
+    """
+    Render filter controls and one page of matching attempts.
+
+    Args:
+        index: Attempt index of the loaded dataset
+        aggregates: Cohort aggregates used for the risk band filter
+        key: Widget key prefix (lets several tables share a page)
+    """
+    settings = config.TABLE
+    columns = list(index.data.columns)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        student_prefix = st.text_input("Student ID starts with", key=f"{key}_prefix").strip()
+    with col2:
+        topics = st.multiselect("Topics", index.topics(), key=f"{key}_topics")
+    with col3:
+        bands = st.multiselect("Risk band", list(RISK_BAND_LABELS),
+                               format_func=RISK_BAND_LABELS.get,
+                               key=f"{key}_bands",
+                               disabled=aggregates is None)
+
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+    with col1:
+        time_range = index.time_range()
+        date_range = ()
+        if time_range is not None:
+            date_range = st.date_input("Date range",
+                                       value=(time_range[0].date(), time_range[1].date()),
+                                       min_value=time_range[0].date(),
+                                       max_value=time_range[1].date(),
+                                       key=f"{key}_dates")
+    with col2:
+        sort_by = st.selectbox("Sort by", ['(none)'] + columns, key=f"{key}_sort")
+    with col3:
+        descending = st.toggle("Descending", key=f"{key}_desc")
+    with col4:
+        page_size = st.selectbox("Rows per page", settings['page_sizes'], key=f"{key}_page_size")
+
+    start = end = None
+    if len(date_range) == 2:
+        # Inclusive of the whole end day
+        start = pd.Timestamp(date_range[0])
+        end = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1) - pd.Timedelta(1)
+
+    student_ids = aggregates.students_in_bands(bands) if aggregates is not None and bands else None
+    query = dict(student_prefix=student_prefix, topics=topics or None, student_ids=student_ids,
+                 start=start, end=end, sort_by=None if sort_by == '(none)' else sort_by,
+                 ascending=not descending, page_size=page_size)
+
+    page_key = f"{key}_page"
+    page = st.session_state.get(page_key, 1)
+    page_df, total = index.query(page=page - 1, **query)
+    num_pages = max(1, -(-total // page_size))
+    if page > num_pages:
+        # Filters shrank the result; jump to the last page
+        page = num_pages
+        st.session_state[page_key] = page
+        page_df, total = index.query(page=page - 1, **query)
+
+    st.dataframe(page_df, use_container_width=True, hide_index=True)
+    first_row = (page - 1) * page_size + 1 if total else 0
+    st.caption(f"Rows {first_row:,}–{(page - 1) * page_size + len(page_df):,} of {total:,} "
+               f"· {num_pages:,} page(s)")
+    st.number_input("Page", min_value=1, max_value=num_pages, step=1, key=page_key)
+
+
+def student_picker(index: AttemptIndex, key: str = 'student') -> Optional[str]:
+    """
+    Search-then-select student picker that never lists the whole cohort.
+
+    Args:
+        index: Attempt index of the loaded dataset
+        key: Widget key prefix
+
+    Returns:
+        Selected student ID, or None if nothing matches
+    """
+    limit = config.TABLE['student_search_limit']
+    prefix = st.text_input("Search student ID", key=f"{key}_search").strip()
+    matches = index.search_students(prefix, limit=limit)
+    matched = index.count_students(prefix)
+    if matched > limit:
+        st.caption(f"Showing first {limit:,} of {matched:,} matching students; type more of the ID to narrow down")
+    if not matches:
+        st.info("No students match this ID prefix")
+        return None
+    return st.selectbox("Select Student", matches, key=f"{key}_select")
@@ -0,0 +1,202 @@
+"""
+Cohort baselines for topic- and question-normalized timing.
+A student who is slow on Geometry may just be answering a slow topic, so
+this stage keeps cohort-wide per-topic and per-question attempt counts,
+correct counts and time sums (sums of squares too) as small lookup tables.
+The sums are additive, so new attempts refresh the baselines with one
+groupby over the new rows, and every attempt's time z-score is a
+vectorized lookup into the tables.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+import config
+from instrumentation import traced
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+SUM_COLUMNS = ['attempts', 'correct', 'time_sum', 'time_sq_sum']
+
+
+class CohortBaselines:
+    """
+    Per-topic and per-question sufficient statistics of a cohort's attempts.
+    Tables are indexed by topic / question ID (as strings).
+    """
+
+    def __init__(self, min_question_attempts: Optional[int] = None):
+        import pandas as pd
+
+        self.min_question_attempts = min_question_attempts or config.BASELINES['min_question_attempts']
+        self.topic_sums = pd.DataFrame(columns=SUM_COLUMNS, dtype=np.float64)
+        self.question_sums = pd.DataFrame(columns=SUM_COLUMNS, dtype=np.float64)
+        self.question_topics = pd.Series(dtype=object)
+
+    @classmethod
+    def from_data(cls, data: pd.DataFrame) -> 'CohortBaselines':
+        """Baselines of an attempt table."""
+        baselines = cls()
+        baselines.update(data)
+        return baselines
+
+    @traced('baselines.update')
+    def update(self, attempts_df: pd.DataFrame) -> None:
+        """
+        Add new attempts to the baselines (one groupby over the new rows).
+
+        Args:
+            attempts_df: DataFrame with Topic, Question_ID, Correct and Time_Taken
+        """
+        import pandas as pd
+
+        if len(attempts_df) == 0:
+            return
+        times = attempts_df['Time_Taken'].to_numpy(dtype=np.float64)
+        rows = pd.DataFrame({
+            'topic': attempts_df['Topic'].to_numpy(),
+            'question': attempts_df['Question_ID'].to_numpy(),
+            'attempts': 1.0,
+            'correct': (attempts_df['Correct'] == 1).to_numpy(dtype=np.float64),
+            'time_sum': times,
+            'time_sq_sum': times ** 2,
+        })
+        # Group on the raw (often categorical) columns; only the group labels become strings
+        for key, attribute in (('topic', 'topic_sums'), ('question', 'question_sums')):
+            sums = rows.groupby(key, observed=True)[SUM_COLUMNS].sum()
+            sums.index = sums.index.astype(str)
+            setattr(self, attribute, self._add(getattr(self, attribute), sums))
+        topics = rows.drop_duplicates('question')
+        topics = pd.Series(topics['topic'].astype(str).to_numpy(), index=topics['question'].astype(str).to_numpy())
+        self.question_topics = topics.combine_first(self.question_topics)
+
+    def merge(self, other: 'CohortBaselines') -> 'CohortBaselines':
+        """
+        Add baselines computed elsewhere (e.g. another shard or school).
+
+        Returns:
+            self
+        """
+        self.topic_sums = self._add(self.topic_sums, other.topic_sums)
+        self.question_sums = self._add(self.question_sums, other.question_sums)
+        self.question_topics = self.question_topics.combine_first(other.question_topics)
+        return self
+
+    def topic_table(self) -> pd.DataFrame:
+        """Per-topic attempts, accuracy, mean_time and std_time."""
+        return self._stats(self.topic_sums)
+
+    def question_table(self) -> pd.DataFrame:
+        """Per-question attempts, accuracy, mean_time and std_time (plus its topic)."""
+        table = self._stats(self.question_sums)
+        table['topic'] = self.question_topics.reindex(table.index)
+        return table
+
+    @traced('baselines.zscores')
+    def attempt_zscores(self, attempts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Time z-scores of every attempt against its topic and question.
+
+        Args:
+            attempts_df: DataFrame with Topic, Question_ID and Time_Taken
+
+        Returns:
+            DataFrame aligned with attempts_df: topic_time_z, question_time_z
+            (NaN for questions with fewer than min_question_attempts) and
+            expected_correct (the question's cohort accuracy, else the topic's)
+        """
+        import pandas as pd
+
+        times = attempts_df['Time_Taken'].to_numpy(dtype=np.float64)
+        topics = self.topic_table()
+        questions = self.question_table()
+        questions = questions[questions['attempts'] >= self.min_question_attempts]
+        topic_rows = _lookup(topics.index, attempts_df['Topic'])
+        question_rows = _lookup(questions.index, attempts_df['Question_ID'])
+
+        topic_mean, topic_std, topic_accuracy = (
+            _take(topics[column].to_numpy(), topic_rows) for column in ('mean_time', 'std_time', 'accuracy'))
+        question_mean, question_std, question_accuracy = (
+            _take(questions[column].to_numpy(), question_rows) for column in ('mean_time', 'std_time', 'accuracy'))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            topic_z = np.where(topic_std > 0, (times - topic_mean) / topic_std, np.nan)
+            question_z = np.where(question_std > 0, (times - question_mean) / question_std, np.nan)
+        return pd.DataFrame({
+            'topic_time_z': topic_z,
+            'question_time_z': question_z,
+            'expected_correct': np.where(np.isnan(question_accuracy), topic_accuracy, question_accuracy),
+        }, index=attempts_df.index)
+
+    def student_topic_pace(self, attempts_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Per (student, topic) timing and accuracy relative to the cohort.
+
+        Args:
+            attempts_df: DataFrame with Student_ID, Topic, Question_ID, Correct and Time_Taken
+
+        Returns:
+            DataFrame with Student_ID, Topic, attempts, time_z (mean topic
+            z-score), question_time_z (mean question z-score), accuracy and
+            expected_accuracy (mean cohort accuracy of the questions answered)
+        """
+        import pandas as pd
+
+        zscores = self.attempt_zscores(attempts_df)
+        rows = pd.DataFrame({
+            'Student_ID': attempts_df['Student_ID'].astype(str).to_numpy(),
+            'Topic': attempts_df['Topic'].astype(str).to_numpy(),
+            'correct': (attempts_df['Correct'] == 1).to_numpy(dtype=np.float64),
+            'time_z': zscores['topic_time_z'].to_numpy(),
+            'question_time_z': zscores['question_time_z'].to_numpy(),
+            'expected_correct': zscores['expected_correct'].to_numpy(),
+        })
+        grouped = rows.groupby(['Student_ID', 'Topic'], sort=False)
+        pace = grouped.agg(attempts=('correct', 'size'), time_z=('time_z', 'mean'),
+                           question_time_z=('question_time_z', 'mean'), accuracy=('correct', 'mean'),
+                           expected_accuracy=('expected_correct', 'mean'))
+        return pace.reset_index()
+
+    @staticmethod
+    def _add(left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+        if len(left) == 0:
+            return right.astype(np.float64)
+        return left.add(right, fill_value=0)
+
+    @staticmethod
+    def _stats(sums: pd.DataFrame) -> pd.DataFrame:
+        import pandas as pd
+
+        attempts = sums['attempts'].to_numpy()
+        mean_time = sums['time_sum'].to_numpy() / attempts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (sums['time_sq_sum'].to_numpy() - attempts * mean_time ** 2) / (attempts - 1)
+        return pd.DataFrame({
+            'attempts': attempts.astype(np.int64),
+            'accuracy': sums['correct'].to_numpy() / attempts,
+            'mean_time': mean_time,
+            'std_time': np.sqrt(np.maximum(variance, 0)),
+        }, index=sums.index)
+
+
+def _lookup(index: pd.Index, column: pd.Series) -> np.ndarray:
+    """Row of each value in a lookup table (-1 if missing); categoricals are looked up once per category."""
+    import pandas as pd
+
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        category_rows = index.get_indexer(column.cat.categories.astype(str))
+        codes = column.cat.codes.to_numpy()
+        return np.where(codes >= 0, category_rows[codes], -1)
+    return index.get_indexer(column.astype(str))
+
+
+def _take(values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """values[rows] with NaN for missing (-1) rows."""
+    result = np.full(len(rows), np.nan)
+    found = rows >= 0
+    result[found] = values[rows[found]]
+    return result
@@ -0,0 +1,406 @@
+"""
+Scaling benchmark suite for EDU-SENSE.
+Generates datasets from thousands to millions of attempts and times the
+generator, detector, recommendations, analysis helpers and report
+generation. Results are appended to a JSON history file; `compare` flags
+stages that got slower (or hungrier) than a baseline run.
+
+Usage:
+    python benchmark.py run [--sizes 1000 10000 100000] [--label my-change]
+    python benchmark.py compare [--baseline previous|<label>|<index>] [--tolerance 0.2]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import config
+
+
+def _stage_generate_synthetic(context: Dict) -> int:
+    from data_generator import generate_synthetic_data
+    num_students = max(1, context['size'] // config.BENCHMARK['attempts_per_student'])
+    return len(generate_synthetic_data(num_students=num_students, random_seed=42))
+
+
+def _stage_generate_large(context: Dict) -> int:
+    from data_generator import generate_large_dataset
+    context['data'] = generate_large_dataset(context['size'],
+                                             config.BENCHMARK['attempts_per_student'])
+    return len(context['data'])
+
+
+def _stage_index(context: Dict) -> int:
+    from attempt_index import AttemptIndex
+    context['index'] = AttemptIndex(context['data'])
+    return len(context['data'])
+
+
+def _stage_analyze_student(context: Dict) -> int:
+    detector = context['detector']
+    index = context['index']
+    for student_id in index.students():
+        detector.analyze_student(index.student_frame(student_id))
+    return len(context['data'])
+
+
+def _stage_analyze_cohort(context: Dict) -> int:
+    context['analyses'] = context['detector'].analyze_cohort(context['data'])
+    return len(context['data'])
+
+
+def _stage_recommendations(context: Dict) -> int:
+    engine = context['engine']
+    context['recommendations'] = {
+        student_id: engine.generate_recommendations(analysis)
+        for student_id, analysis in context['analyses'].items()
+    }
+    return len(context['data'])
+
+
+def _stage_analysis_utils(context: Dict) -> int:
+    from utils import AnalysisUtils, PerformanceMetrics
+    index = context['index']
+    for student_id in index.students():
+        student_df = index.student_frame(student_id)
+        AnalysisUtils.get_student_progress_trend(student_df)
+        AnalysisUtils.get_topic_wise_performance(student_df)
+        AnalysisUtils.identify_weak_topics(student_df)
+        AnalysisUtils.calculate_consistency_score(student_df)
+        PerformanceMetrics.calculate_learning_velocity(student_df)
+        PerformanceMetrics.get_engagement_level(student_df)
+    return len(context['data'])
+
+
+def _stage_reports(context: Dict) -> int:
+    from utils import ReportGenerator
+    for student_id, analysis in context['analyses'].items():
+        ReportGenerator.generate_text_summary(analysis, context['recommendations'][student_id])
+        ReportGenerator.generate_csv_export(analysis)
+    return len(context['data'])
+
+
+# Stage name -> function returning the attempts processed; run in this order
+STAGES: Dict[str, Callable[[Dict], int]] = {
+    'generate_synthetic_data': _stage_generate_synthetic,
+    'generate_large_dataset': _stage_generate_large,
+    'build_index': _stage_index,
+    'analyze_student': _stage_analyze_student,
+    'analyze_cohort': _stage_analyze_cohort,
+    'generate_recommendations': _stage_recommendations,
+    'analysis_utils': _stage_analysis_utils,
+    'report_generation': _stage_reports,
+}
+
+
+def run_size(size: int, track_memory: bool = True,
+             stages: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """
+    Benchmark every stage on a dataset of `size` attempts.
+    Stages above their config.BENCHMARK['stage_max_attempts'] cap are skipped.
+
+    Args:
+        size: Number of attempts
+        track_memory: Re-run each stage under tracemalloc to record peak memory
+        stages: Only run these stages (all if None; dependencies always run)
+
+    Returns:
+        Dictionary mapping stage name to its measurements
+    """
+    from gap_detector import LearningGapDetector
+    from recommendation_engine import RecommendationEngine
+
+    caps = config.BENCHMARK['stage_max_attempts']
+    required = {'generate_large_dataset', 'build_index', 'analyze_cohort', 'generate_recommendations'}
+    context = {'size': size, 'detector': LearningGapDetector(), 'engine': RecommendationEngine()}
+    results = {}
+
+    for name, stage in STAGES.items():
+        if stages is not None and name not in stages and name not in required:
+            continue
+        if size > caps.get(name, size):
+            results[name] = {'skipped': f"over {caps[name]:,} attempt cap"}
+            continue
+
+        gc.collect()
+        start = time.perf_counter()
+        rows = stage(context)
+        seconds = time.perf_counter() - start
+        num_students = len(context['index']) if 'index' in context else None
+
+        result = {
+            'seconds': seconds,
+            'attempts': rows,
+            'attempts_per_second': rows / seconds if seconds > 0 else None,
+        }
+        if num_students:
+            result['students'] = num_students
+            result['students_per_second'] = num_students / seconds if seconds > 0 else None
+
+        if track_memory:
+            # Separate pass so tracemalloc overhead does not skew the timing
+            gc.collect()
+            tracemalloc.start()
+            stage(context)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result['peak_bytes'] = peak
+        results[name] = result
+
+    return results
+
+
+def run(sizes: List[int], label: Optional[str] = None, track_memory: bool = True,
+        stages: Optional[List[str]] = None, history_path: Optional[str] = None,
+        verbose: bool = True) -> Dict:
+    """
+    Run the suite for several dataset sizes and append it to the history file.
+
+    Args:
+        sizes: Dataset sizes in attempts
+        label: Name for this run (e.g. a branch or change description)
+        track_memory: Record per-stage peak memory
+        stages: Only run these stages (all if None)
+        history_path: History JSON file (defaults to config.BENCHMARK)
+        verbose: Print a results table
+
+    Returns:
+        The recorded run
+    """
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'label': label,
+        'commit': _git_commit(),
+        'environment': _environment(),
+        'results': {},
+    }
+    for size in sizes:
+        if verbose:
+            print(f"\n== {size:,} attempts ==")
+        results = run_size(size, track_memory=track_memory, stages=stages)
+        if track_memory and config.MEMORY_PROFILE['in_benchmark']:
+            results.update(profile_memory(size))
+        record['results'][str(size)] = results
+        if verbose:
+            _print_results(results)
+
+    history_path = history_path or config.BENCHMARK['history_file']
+    history = load_history(history_path)
+    history.append(record)
+    with open(history_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2)
+    if verbose:
+        print(f"\nRecorded run #{len(history) - 1} in {history_path}")
+    return record
+
+
+def profile_memory(size: int) -> Dict[str, Dict]:
+    """
+    Run the memory profiler (load -> index -> detect -> recommend -> report)
+    and shape its stages as benchmark results named 'memory.<stage>'.
+
+    Args:
+        size: Number of attempts
+
+    Returns:
+        Dictionary mapping 'memory.<stage>' to peak/retained/RSS measurements
+    """
+    from memory_profile import profile_pipeline
+
+    report = profile_pipeline(size=size, top_n=3)
+    return {
+        f"memory.{name}": {
+            'attempts': report['attempts'],
+            'students': report['students'],
+            'peak_bytes': stage['peak_bytes'],
+            'retained_bytes': stage['retained_bytes'],
+            'rss_peak_bytes': stage['rss_peak_bytes'],
+            'peak_bytes_per_attempt': stage['peak_bytes_per_attempt'],
+            'retained_bytes_per_student': stage['retained_bytes_per_student'],
+            'top_allocations': stage['top_allocations'],
+        }
+        for name, stage in report['stages'].items()
+    }
+
+
+def load_history(history_path: Optional[str] = None) -> List[Dict]:
+    """Load all recorded runs (empty list if there is no history yet)."""
+    history_path = history_path or config.BENCHMARK['history_file']
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(current: Dict, baseline: Dict, tolerance: Optional[float] = None) -> List[Dict]:
+    """
+    Compare two runs stage by stage.
+
+    Args:
+        current: Run to check
+        baseline: Run to compare against
+        tolerance: Allowed relative slowdown / memory growth (0.2 = 20%)
+
+    Returns:
+        List of comparison rows; rows with 'regression' True exceeded the tolerance
+    """
+    if tolerance is None:
+        tolerance = config.BENCHMARK['tolerance']
+    min_seconds = config.BENCHMARK['min_compare_seconds']
+    min_bytes = config.BENCHMARK['min_compare_bytes']
+
+    rows = []
+    for size, stages in current['results'].items():
+        for name, result in stages.items():
+            base = baseline['results'].get(size, {}).get(name)
+            if not base or 'skipped' in result or 'skipped' in base:
+                continue
+
+            time_ratio = None
+            if result.get('seconds') is not None and base.get('seconds'):
+                time_ratio = result['seconds'] / base['seconds']
+
+            # Worst growth of peak or retained memory
+            memory_ratio = None
+            for key in ('peak_bytes', 'retained_bytes'):
+                if result.get(key) is not None and (base.get(key) or 0) >= min_bytes:
+                    memory_ratio = max(memory_ratio or 0.0, result[key] / base[key])
+
+            # Ignore timing noise on stages too short to measure reliably
+            slower = (time_ratio is not None and time_ratio > 1 + tolerance
+                      and max(result['seconds'], base['seconds']) >= min_seconds)
+            hungrier = memory_ratio is not None and memory_ratio > 1 + tolerance
+            rows.append({
+                'size': int(size),
+                'stage': name,
+                'seconds': result.get('seconds'),
+                'baseline_seconds': base.get('seconds'),
+                'time_ratio': time_ratio,
+                'memory_ratio': memory_ratio,
+                'regression': slower or hungrier,
+            })
+    return rows
+
+
+def _select_baseline(history: List[Dict], selector: str) -> Dict:
+    """Pick the baseline run: 'previous', a run index or a label."""
+    if selector == 'previous':
+        if len(history) < 2:
+            raise ValueError("Need at least two recorded runs to compare")
+        return history[-2]
+    if selector.lstrip('-').isdigit():
+        return history[int(selector)]
+    for record in reversed(history[:-1]):
+        if record.get('label') == selector:
+            return record
+    raise ValueError(f"No recorded run labelled '{selector}'")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment() -> Dict:
+    import numpy as np
+    import pandas as pd
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+    }
+
+
+def _print_results(results: Dict[str, Dict]) -> None:
+    print(f"{'Stage':<26}{'seconds':>10}{'attempts/s':>14}{'students/s':>12}{'peak MB':>10}")
+    for name, result in results.items():
+        if 'skipped' in result:
+            print(f"{name:<26}{'skipped (' + result['skipped'] + ')':>46}")
+            continue
+        students = result.get('students_per_second')
+        peak = result.get('peak_bytes')
+        if 'seconds' not in result:
+            print(f"{name:<26}{'-':>10}{'-':>14}{'-':>12}{peak / 1e6:>10.1f}"
+                  f"  (retained {result['retained_bytes'] / 1e6:.1f} MB)")
+            continue
+        print(f"{name:<26}{result['seconds']:>10.3f}"
+              f"{result['attempts_per_second'] or 0:>14,.0f}"
+              f"{f'{students:,.0f}' if students else '-':>12}"
+              f"{f'{peak / 1e6:.1f}' if peak is not None else '-':>10}")
+
+
+def _cmd_run(args) -> int:
+    settings = config.BENCHMARK
+    run([int(float(size)) for size in (args.sizes or settings['sizes'])],
+        label=args.label, track_memory=not args.no_memory, stages=args.stages,
+        history_path=args.history)
+    return 0
+
+
+def _cmd_compare(args) -> int:
+    history = load_history(args.history)
+    if not history:
+        print("No benchmark history recorded yet; run `python benchmark.py run` first", file=sys.stderr)
+        return 1
+    try:
+        baseline = _select_baseline(history, args.baseline)
+    except (ValueError, IndexError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    rows = compare(history[-1], baseline, args.tolerance)
+    print(f"Comparing run {history[-1]['timestamp']} ({history[-1].get('label') or 'unlabelled'}) "
+          f"against {baseline['timestamp']} ({baseline.get('label') or 'unlabelled'})\n")
+    print(f"{'Size':>10}  {'Stage':<26}{'seconds':>10}{'baseline':>10}{'time x':>8}{'mem x':>8}")
+    for row in rows:
+        seconds = f"{row['seconds']:.3f}" if row['seconds'] is not None else '-'
+        baseline_seconds = f"{row['baseline_seconds']:.3f}" if row['baseline_seconds'] is not None else '-'
+        time_ratio = f"{row['time_ratio']:.2f}" if row['time_ratio'] is not None else '-'
+        memory = f"{row['memory_ratio']:.2f}" if row['memory_ratio'] is not None else '-'
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['size']:>10,}  {row['stage']:<26}{seconds:>10}"
+              f"{baseline_seconds:>10}{time_ratio:>8}{memory:>8}{flag}")
+
+    regressions = [row for row in rows if row['regression']]
+    print(f"\n{len(regressions)} regression(s) beyond tolerance")
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="EDU-SENSE scaling benchmarks")
+    parser.add_argument('--history', help="History JSON file (default: config.BENCHMARK)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Run the benchmark suite")
+    run_parser.add_argument('--sizes', nargs='+', help="Dataset sizes in attempts (e.g. 1e3 1e6)")
+    run_parser.add_argument('--stages', nargs='+', choices=list(STAGES), help="Only run these stages")
+    run_parser.add_argument('--label', help="Name for this run")
+    run_parser.add_argument('--no-memory', action='store_true', help="Skip peak memory measurement")
+    run_parser.set_defaults(handler=_cmd_run)
+
+    compare_parser = subparsers.add_parser('compare', help="Compare the latest run with a baseline")
+    compare_parser.add_argument('--baseline', default='previous',
+                                help="'previous', a run index or a run label")
+    compare_parser.add_argument('--tolerance', type=float, help="Allowed slowdown (0.2 = 20%%)")
+    compare_parser.set_defaults(handler=_cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
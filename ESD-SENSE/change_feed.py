@@ -0,0 +1,112 @@
+"""
+Gap change feed: what changed between two analysis runs.
+Flattens analyses into a (student, gap, severity) table and diffs two
+tables with one keyed outer join, emitting added / removed / escalated /
+de-escalated events so teachers are only alerted about changes.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+SEVERITIES = ('low', 'medium', 'high')
+SEVERITY_RANK = {severity: rank for rank, severity in enumerate(SEVERITIES)}
+EVENT_TYPES = ('added', 'removed', 'escalated', 'de-escalated')
+GAP_COLUMNS = ['student_id', 'gap', 'severity', 'confidence']
+EVENT_COLUMNS = ['student_id', 'gap', 'event', 'old_severity', 'new_severity', 'confidence']
+
+
+def gap_table(student_gaps: Dict[str, Dict[str, Dict]]) -> pd.DataFrame:
+    """
+    Flatten per-student gaps into one row per (student, gap).
+
+    Args:
+        student_gaps: Student ID -> gaps dictionary (as in analysis['gaps'])
+
+    Returns:
+        DataFrame with student_id, gap, severity and confidence
+    """
+    import pandas as pd
+
+    rows = [
+        (student_id, gap_name, details['severity'], float(details['confidence']))
+        for student_id, gaps in student_gaps.items()
+        for gap_name, details in gaps.items()
+    ]
+    return pd.DataFrame.from_records(rows, columns=GAP_COLUMNS)
+
+
+def diff_gap_tables(previous: pd.DataFrame, current: pd.DataFrame,
+                    students: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Events turning the previous gap table into the current one.
+
+    Args:
+        previous: Gap table of the earlier run
+        current: Gap table of the new run
+        students: Only compare these students (those re-analyzed); None compares all
+
+    Returns:
+        DataFrame with student_id, gap, event, old_severity, new_severity and
+        confidence (of the current gap, or the removed one), sorted by student and gap
+    """
+    import pandas as pd
+
+    if students is not None:
+        students = pd.Index(list(students)).astype(str)
+        previous = previous[previous['student_id'].isin(students)]
+        current = current[current['student_id'].isin(students)]
+
+    merged = previous[GAP_COLUMNS].merge(current[GAP_COLUMNS], on=['student_id', 'gap'],
+                                         how='outer', suffixes=('_old', '_new'), indicator=True)
+    old_rank = merged['severity_old'].map(SEVERITY_RANK).to_numpy(dtype=np.float64)
+    new_rank = merged['severity_new'].map(SEVERITY_RANK).to_numpy(dtype=np.float64)
+    side = merged['_merge'].to_numpy()
+
+    event = np.select(
+        [side == 'right_only', side == 'left_only', new_rank > old_rank, new_rank < old_rank],
+        EVENT_TYPES, default=''
+    )
+    changed = event != ''
+    merged = merged[changed]
+    events = pd.DataFrame({
+        'student_id': merged['student_id'].to_numpy(),
+        'gap': merged['gap'].to_numpy(),
+        'event': event[changed],
+        'old_severity': merged['severity_old'].to_numpy(),
+        'new_severity': merged['severity_new'].to_numpy(),
+        'confidence': merged['confidence_new'].fillna(merged['confidence_old']).to_numpy(),
+    })
+    return events.sort_values(['student_id', 'gap'], ignore_index=True)
+
+
+def describe_event(gap: str, event: str, old_severity: Optional[str], new_severity: Optional[str]) -> str:
+    """
+    Teacher-facing sentence for one change event.
+
+    Args:
+        gap: Gap key (e.g. 'concept_gap_fractions', 'speed_gap')
+        event: One of EVENT_TYPES
+        old_severity: Severity before (None for added gaps)
+        new_severity: Severity after (None for removed gaps)
+
+    Returns:
+        Text such as "New high-severity Fractions gap" or "Speed gap resolved"
+    """
+    if gap.startswith('concept_gap_'):
+        label = f"{gap[len('concept_gap_'):].replace('_', ' ').title()} gap"
+    else:
+        label = gap.replace('_', ' ').capitalize()
+
+    if event == 'added':
+        return f"New {new_severity}-severity {label}"
+    if event == 'removed':
+        return f"{label[0].upper()}{label[1:]} resolved"
+    direction = 'escalated' if event == 'escalated' else 'improved'
+    return f"{label[0].upper()}{label[1:]} {direction} from {old_severity} to {new_severity}"
@@ -0,0 +1,315 @@
+"""
+Student groups for small-group interventions.
+Each student is embedded by their accuracy per topic and their timing
+(log mean time and time coefficient of variation), standardized with the
+cohort spread, and grouped with MiniBatchKMeans. Per-student topic and time
+sums are kept as arrays, so new attempts update only the students they
+touch, and those students' new embeddings move the centroids through
+partial_fit instead of a refit. A group's plan is the RecommendationEngine
+output of its members, aggregated by recommendation.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+import config
+from instrumentation import traced
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+PRIORITY_ORDER = {'HIGH': 3, 'MEDIUM': 2, 'LOW': 1}
+
+
+class StudentClusters:
+    """
+    MiniBatchKMeans groups over per-student topic-accuracy and timing
+    embeddings. Students and topics are rows/columns of growing arrays;
+    the embedding uses the topics known when the model was first fitted.
+    """
+
+    def __init__(self, n_clusters: Optional[int] = None,
+                 batch_size: Optional[int] = None,
+                 random_state: Optional[int] = None):
+        settings = config.CLUSTERING
+        self.n_clusters = n_clusters or settings['n_clusters']
+        self.batch_size = batch_size or settings['batch_size']
+        self.random_state = settings['random_state'] if random_state is None else random_state
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget every student, topic and the model."""
+        self.model = None
+        self.student_ids: List[str] = []
+        self.topics: List[str] = []
+        self.embedding_topics: List[str] = []
+        self.center = np.zeros(0)
+        self.scale = np.ones(0)
+        self._student_rows: Dict[str, int] = {}
+        self._topic_columns: Dict[str, int] = {}
+        self.topic_attempts = np.zeros((0, 0))
+        self.topic_correct = np.zeros((0, 0))
+        # attempts, time_sum, time_sq_sum per student
+        self.time_sums = np.zeros((0, 3))
+        # Correct attempts per student, including attempts without a topic
+        self.student_correct = np.zeros(0)
+        self._labels = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.student_ids)
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.model is not None
+
+    @property
+    def labels(self) -> pd.Series:
+        """Group of every student (-1 until the model is fitted)."""
+        import pandas as pd
+
+        return pd.Series(self._labels, index=pd.Index(self.student_ids, name='Student_ID'), name='group')
+
+    @traced('clusters.fit')
+    def fit(self, attempts_df: pd.DataFrame) -> 'StudentClusters':
+        """
+        Group every student of an attempt table from scratch.
+
+        Args:
+            attempts_df: DataFrame with Student_ID, Topic, Correct and Time_Taken
+
+        Returns:
+            self
+        """
+        self._reset()
+        self._add(attempts_df)
+        if len(self) >= self.n_clusters:
+            self._fit_model()
+        return self
+
+    @traced('clusters.update')
+    def update(self, attempts_df: pd.DataFrame) -> List[str]:
+        """
+        Add new attempts and move the groups with partial_fit.
+        Only the students with new attempts are re-embedded and relabeled;
+        until there are n_clusters students, attempts are just accumulated.
+
+        Args:
+            attempts_df: New attempts (Student_ID, Topic, Correct, Time_Taken)
+
+        Returns:
+            IDs of the students that were (re)labeled
+        """
+        if len(attempts_df) == 0:
+            return []
+        touched = self._add(attempts_df)
+        if self.model is None:
+            if len(self) < self.n_clusters:
+                return []
+            self._fit_model()
+            return list(self.student_ids)
+        embedding = self._embed(touched)
+        self.model.partial_fit(embedding)
+        self._labels[touched] = self.model.predict(embedding)
+        return [self.student_ids[row] for row in touched]
+
+    def relabel(self) -> None:
+        """Reassign every student to the nearest current centroid."""
+        if self.model is not None and len(self):
+            rows = np.arange(len(self))
+            for start in range(0, len(rows), self.batch_size * 16):
+                batch = rows[start:start + self.batch_size * 16]
+                self._labels[batch] = self.model.predict(self._embed(batch))
+
+    def profiles(self) -> pd.DataFrame:
+        """
+        Per-group summary from the members' pooled attempts.
+
+        Returns:
+            DataFrame indexed by group with students, accuracy, one
+            accuracy column per topic, mean_time and weakest_topic
+        """
+        import pandas as pd
+
+        groups = self.n_clusters
+        members = self._labels >= 0
+        labels = self._labels[members]
+
+        def per_group(values):
+            return np.bincount(labels, weights=values[members], minlength=groups)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            profile = {
+                'students': np.bincount(labels, minlength=groups),
+                'accuracy': per_group(self.student_correct) / per_group(self.time_sums[:, 0]),
+            }
+            for column, topic in enumerate(self.topics):
+                profile[topic] = per_group(self.topic_correct[:, column]) / per_group(self.topic_attempts[:, column])
+            profile['mean_time'] = per_group(self.time_sums[:, 1]) / per_group(self.time_sums[:, 0])
+            topic_accuracy = np.column_stack([profile[topic] for topic in self.topics]) \
+                if self.topics else np.full((groups, 1), np.nan)
+        weakest = np.argmin(np.where(np.isnan(topic_accuracy), np.inf, topic_accuracy), axis=1)
+        profile['weakest_topic'] = [
+            self.topics[column] if not np.isnan(topic_accuracy[group, column]) else None
+            for group, column in enumerate(weakest)
+        ]
+        return pd.DataFrame(profile, index=pd.RangeIndex(groups, name='group'))
+
+    def group_recommendations(self, recommendations: Dict[str, List[Dict]],
+                              top_n: Optional[int] = None) -> List[Dict]:
+        """
+        Aggregate per-student RecommendationEngine output into group plans.
+
+        Args:
+            recommendations: Student ID -> recommendations (students
+                without an entry, e.g. not analyzed yet, are skipped)
+            top_n: Recommendations kept per group (default from config)
+
+        Returns:
+            One dictionary per group: group, students (member IDs),
+            analyzed (members with recommendations), profile (row of
+            profiles()) and recommendations; each recommendation has the
+            engine's title, practice_type, duration and steps, the highest
+            member priority, the most common target topics, mean
+            expected_impact, and how many members (students, share) it
+            was recommended for
+        """
+        top_n = top_n or config.CLUSTERING['top_recommendations']
+        profiles = self.profiles()
+        groups = []
+        for group in profiles.index:
+            members = [self.student_ids[row] for row in np.flatnonzero(self._labels == group)]
+            plans: Dict[str, Dict] = {}
+            analyzed = 0
+            for student_id in members:
+                student_recommendations = recommendations.get(student_id)
+                if student_recommendations is None:
+                    continue
+                analyzed += 1
+                for rec in student_recommendations:
+                    plan = plans.setdefault(rec['title'], {
+                        'title': rec['title'],
+                        'practice_type': rec['practice_type'],
+                        'duration': rec['duration'],
+                        'steps': list(rec['steps']),
+                        'priority': rec['priority'],
+                        'students': 0,
+                        '_impact': 0.0,
+                        '_topics': Counter(),
+                    })
+                    plan['students'] += 1
+                    plan['_impact'] += rec['expected_impact']
+                    plan['_topics'].update(rec['target_topics'])
+                    if PRIORITY_ORDER.get(rec['priority'], 0) > PRIORITY_ORDER.get(plan['priority'], 0):
+                        plan['priority'] = rec['priority']
+
+            ranked = sorted(plans.values(),
+                            key=lambda p: (p['students'], PRIORITY_ORDER.get(p['priority'], 0)), reverse=True)
+            for plan in ranked:
+                plan['expected_impact'] = plan.pop('_impact') / plan['students']
+                plan['target_topics'] = [topic for topic, _ in plan.pop('_topics').most_common(3)]
+                plan['share'] = plan['students'] / analyzed
+            groups.append({
+                'group': int(group),
+                'students': members,
+                'analyzed': analyzed,
+                'profile': profiles.loc[group].to_dict(),
+                'recommendations': ranked[:top_n],
+            })
+        return groups
+
+    def _add(self, attempts_df: pd.DataFrame) -> np.ndarray:
+        """Add attempts to the running sums; returns the touched student rows."""
+        import pandas as pd
+
+        # Only the values present become strings (not every category of a categorical column)
+        student_codes, students = pd.factorize(attempts_df['Student_ID'])
+        topic_codes, topics = pd.factorize(attempts_df['Topic'])
+        student_rows = np.array([self._row_of(str(student_id)) for student_id in np.asarray(students)],
+                                dtype=np.int64)
+        topic_columns = np.array([self._column_of(str(topic)) for topic in np.asarray(topics)], dtype=np.int64)
+        self._grow()
+
+        rows = student_rows[student_codes]
+        correct = (attempts_df['Correct'] == 1).to_numpy(dtype=np.float64)
+        times = attempts_df['Time_Taken'].to_numpy(dtype=np.float64)
+        # Null topics (code -1) would index the last topic; they still count in timing
+        known = topic_codes >= 0
+        columns = topic_columns[topic_codes[known]]
+        np.add.at(self.topic_attempts, (rows[known], columns), 1.0)
+        np.add.at(self.topic_correct, (rows[known], columns), correct[known])
+        np.add.at(self.student_correct, rows, correct)
+        np.add.at(self.time_sums, (rows, 0), 1.0)
+        np.add.at(self.time_sums, (rows, 1), times)
+        np.add.at(self.time_sums, (rows, 2), times ** 2)
+        return np.unique(student_rows)
+
+    def _row_of(self, student_id: str) -> int:
+        row = self._student_rows.get(student_id)
+        if row is None:
+            row = self._student_rows[student_id] = len(self.student_ids)
+            self.student_ids.append(student_id)
+        return row
+
+    def _column_of(self, topic: str) -> int:
+        column = self._topic_columns.get(topic)
+        if column is None:
+            column = self._topic_columns[topic] = len(self.topics)
+            self.topics.append(topic)
+        return column
+
+    def _grow(self) -> None:
+        """Resize the sum arrays to the known students and topics."""
+        shape = (len(self.student_ids), len(self.topics))
+        if self.topic_attempts.shape != shape:
+            for name in ('topic_attempts', 'topic_correct'):
+                old = getattr(self, name)
+                grown = np.zeros(shape)
+                grown[:old.shape[0], :old.shape[1]] = old
+                setattr(self, name, grown)
+        if len(self.time_sums) < shape[0]:
+            self.time_sums = np.vstack([self.time_sums, np.zeros((shape[0] - len(self.time_sums), 3))])
+            self.student_correct = np.concatenate([self.student_correct, np.zeros(shape[0] - len(self.student_correct))])
+            self._labels = np.concatenate([self._labels, np.full(shape[0] - len(self._labels), -1)])
+
+    def _features(self, rows: np.ndarray) -> np.ndarray:
+        """Raw embedding of students: topic accuracies, log mean time, time CV."""
+        attempts = self.time_sums[rows, 0]
+        time_sum = self.time_sums[rows, 1]
+        time_sq_sum = self.time_sums[rows, 2]
+        columns = [self._topic_columns[topic] for topic in self.embedding_topics]
+        topic_attempts = self.topic_attempts[np.ix_(rows, columns)]
+        topic_correct = self.topic_correct[np.ix_(rows, columns)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # An unattempted topic gets the student's overall accuracy
+            accuracy = self.student_correct[rows] / attempts
+            topic_accuracy = np.where(topic_attempts > 0, topic_correct / topic_attempts, accuracy[:, None])
+            mean_time = time_sum / attempts
+            variance = (time_sq_sum - attempts * mean_time ** 2) / (attempts - 1)
+            time_cv = np.where((attempts > 1) & (mean_time > 0),
+                               np.sqrt(np.maximum(variance, 0)) / mean_time, 0.0)
+        return np.column_stack([topic_accuracy, np.log1p(mean_time), time_cv])
+
+    def _embed(self, rows: np.ndarray) -> np.ndarray:
+        """Standardized embedding (with the spread frozen at the first fit)."""
+        return (self._features(rows) - self.center) / self.scale
+
+    def _fit_model(self) -> None:
+        """Fit the scaling and MiniBatchKMeans on every known student."""
+        from sklearn.cluster import MiniBatchKMeans
+
+        self.embedding_topics = sorted(self.topics)
+        rows = np.arange(len(self))
+        features = self._features(rows)
+        self.center = features.mean(axis=0)
+        spread = features.std(axis=0)
+        self.scale = np.where(spread > 0, spread, 1.0)
+        embedding = (features - self.center) / self.scale
+
+        self.model = MiniBatchKMeans(n_clusters=self.n_clusters, batch_size=self.batch_size,
+                                     n_init=config.CLUSTERING['n_init'], random_state=self.random_state)
+        self._labels[rows] = self.model.fit_predict(embedding)
@@ -0,0 +1,170 @@
+"""
+Questions that are missed together.
+Builds a sparse student x question matrix with a 1 wherever a student got a
+question wrong at least once (SciPy CSR), then counts co-errors of every
+question pair with sparse products: row block b of M.T @ M holds, for the
+questions in b, how many students missed both. Blocks keep the product's
+peak memory bounded, and only pairs that actually co-occur are ever
+stored, so tens of thousands of questions never need a dense matrix.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+import config
+from instrumentation import traced
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class CoErrorMiner:
+    """
+    Question-pair co-error counts and lift from an attempt log.
+    Lift is P(missed both) / (P(missed A) * P(missed B)) over all
+    students; confidence is P(missed B | missed A).
+    """
+
+    def __init__(self, min_co_errors: Optional[int] = None,
+                 top_n: Optional[int] = None,
+                 block_size: Optional[int] = None):
+        settings = config.CO_ERRORS
+        self.min_co_errors = min_co_errors or settings['min_co_errors']
+        self.top_n = top_n or settings['top_n']
+        self.block_size = block_size or settings['block_size']
+        self.matrix = None
+        self.student_ids = np.array([], dtype=object)
+        self.question_ids = np.array([], dtype=object)
+        self.question_errors = np.zeros(0, dtype=np.int64)
+        self._question_positions = {}
+
+    @property
+    def num_students(self) -> int:
+        return len(self.student_ids)
+
+    @traced('co_errors.fit')
+    def fit(self, attempts_df: pd.DataFrame) -> 'CoErrorMiner':
+        """
+        Build the incorrectness matrix of an attempt table.
+
+        Args:
+            attempts_df: DataFrame with Student_ID, Question_ID and Correct
+
+        Returns:
+            self
+        """
+        import pandas as pd
+        from scipy import sparse
+
+        student_codes, student_ids = pd.factorize(attempts_df['Student_ID'])
+        question_codes, question_ids = pd.factorize(attempts_df['Question_ID'])
+        # Attempts without a student or question ID (code -1) have no matrix cell
+        wrong = (attempts_df['Correct'] == 0).to_numpy() & (student_codes >= 0) & (question_codes >= 0)
+        matrix = sparse.csr_matrix(
+            (np.ones(int(wrong.sum()), dtype=np.int32), (student_codes[wrong], question_codes[wrong])),
+            shape=(len(student_ids), len(question_ids)),
+        )
+        # Repeated misses of a question count once per student
+        matrix.data[:] = 1
+        self.matrix = matrix
+        self.student_ids = np.asarray(student_ids).astype(str)
+        self.question_ids = np.asarray(question_ids).astype(str)
+        self.question_errors = np.asarray(matrix.sum(axis=0)).ravel().astype(np.int64)
+        self._question_positions = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        return self
+
+    @traced('co_errors.associations')
+    def associations(self, top_n: Optional[int] = None, rank_by: str = 'lift') -> pd.DataFrame:
+        """
+        Top associated questions of every question.
+
+        Args:
+            top_n: Associations kept per question (default from config)
+            rank_by: 'lift', 'co_errors' or 'confidence'
+
+        Returns:
+            DataFrame with question, associated_question, co_errors,
+            question_errors, associated_errors, confidence and lift; pairs
+            with fewer than min_co_errors students are left out, rows are
+            ordered by question and then best association first
+        """
+        import pandas as pd
+
+        self._check_fitted()
+        top_n = top_n or self.top_n
+        by_question = self.matrix.T.tocsr()
+        tables = []
+        for start in range(0, len(self.question_ids), self.block_size):
+            stop = min(start + self.block_size, len(self.question_ids))
+            counts = (by_question[start:stop] @ self.matrix).tocoo()
+            rows = counts.row.astype(np.int64) + start
+            keep = (counts.data >= self.min_co_errors) & (rows != counts.col)
+            tables.append(self._pairs(rows[keep], counts.col[keep].astype(np.int64),
+                                      counts.data[keep].astype(np.int64), top_n, rank_by))
+        if not tables:
+            return self._pairs(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                               np.zeros(0, dtype=np.int64), top_n, rank_by)
+        return pd.concat(tables, ignore_index=True)
+
+    def for_question(self, question_id: str, top_n: Optional[int] = None,
+                     rank_by: str = 'lift') -> pd.DataFrame:
+        """
+        Top associations of one question (one sparse column product).
+
+        Args:
+            question_id: Question to look up
+            top_n: Associations to return (default from config)
+            rank_by: 'lift', 'co_errors' or 'confidence'
+
+        Returns:
+            DataFrame like associations(), for this question only (empty
+            for unknown questions)
+        """
+        self._check_fitted()
+        top_n = top_n or self.top_n
+        position = self._question_positions.get(str(question_id))
+        empty = np.zeros(0, dtype=np.int64)
+        if position is None:
+            return self._pairs(empty, empty, empty, top_n, rank_by)
+        students = self.matrix[:, position].nonzero()[0]
+        counts = np.asarray(self.matrix[students].sum(axis=0)).ravel().astype(np.int64)
+        columns = np.flatnonzero(counts >= self.min_co_errors)
+        columns = columns[columns != position]
+        return self._pairs(np.full(len(columns), position, dtype=np.int64), columns, counts[columns],
+                           top_n, rank_by)
+
+    def _pairs(self, rows: np.ndarray, columns: np.ndarray, co_errors: np.ndarray,
+               top_n: int, rank_by: str) -> pd.DataFrame:
+        """Score pairs and keep the top_n per question (vectorized)."""
+        import pandas as pd
+
+        row_errors = self.question_errors[rows]
+        column_errors = self.question_errors[columns]
+        confidence = co_errors / np.maximum(row_errors, 1)
+        lift = co_errors * self.num_students / np.maximum(row_errors * column_errors, 1)
+        scores = {'lift': lift, 'co_errors': co_errors, 'confidence': confidence}
+        if rank_by not in scores:
+            raise ValueError(f"rank_by must be one of {sorted(scores)}, got '{rank_by}'")
+
+        # Best first within each question (ties broken by co-error count), then rank in question
+        order = np.lexsort((-co_errors, -scores[rank_by], rows))
+        positions = np.arange(len(order))
+        first_of_question = np.diff(rows[order], prepend=-1) != 0
+        rank = positions - np.maximum.accumulate(np.where(first_of_question, positions, 0))
+        top = order[rank < top_n]
+        return pd.DataFrame({
+            'question': self.question_ids[rows[top]],
+            'associated_question': self.question_ids[columns[top]],
+            'co_errors': co_errors[top],
+            'question_errors': row_errors[top],
+            'associated_errors': column_errors[top],
+            'confidence': confidence[top],
+            'lift': lift[top],
+        })
+
+    def _check_fitted(self) -> None:
+        if self.matrix is None:
+            raise ValueError("CoErrorMiner is not fitted; call fit() first")
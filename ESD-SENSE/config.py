@@ -9,6 +9,9 @@ GAP_DETECTION = {
     'concept_gap_threshold': 0.60,    # Accuracy threshold for concept gaps
     'confidence_time_multiplier': 1.5, # Time multiplier for confidence gaps
     'speed_time_multiplier': 0.5,     # Time multiplier for speed gaps
+    'timing_rule': 'mean',            # 'mean' (multipliers above) or 'percentile' (sketches)
+    'hesitation_percentile': 90,      # 'percentile' rule: slow = at or above this percentile
+    'rushing_percentile': 10,         # 'percentile' rule: fast = at or below this percentile
 }
 
 # ===== SEVERITY THRESHOLDS =====
@@ -23,6 +26,12 @@ SEVERITY_THRESHOLDS = {
     }
 }
 
+# ===== RISK BANDS (dashboard status overview) =====
+RISK_BANDS = {
+    'high_risk_score': 0.40,   # Overall score below 40% = high risk
+    'high_risk_severity': 'high',  # Any gap with this severity = high risk
+}
+
 # ===== STUDENT PROFILES FOR DATA GENERATION =====
 STUDENT_PROFILES = {
     'Strong': {
@@ -84,6 +93,13 @@ DATA_GENERATION = {
     'random_seed': 42  # For reproducibility
 }
 
+# ===== DATA LOADING SETTINGS =====
+DATA_LOADING = {
+    'chunk_size': 100_000,          # Rows read per chunk
+    'use_arrow_cache': True,        # Cache parsed files as Arrow IPC
+    'cache_dir': '.edu_sense_cache' # Where cached files are written
+}
+
 # ===== RECOMMENDATION SETTINGS =====
 RECOMMENDATIONS = {
     'max_recommendations': 5,
@@ -96,17 +112,169 @@ RECOMMENDATIONS = {
         'concept_gap': 0.25,
         'confidence_gap': 0.20,
         'speed_gap': 0.15,
+        'profile_gap': 0.10,
         'maintenance': 0.10
     }
 }
 
+# ===== CACHING SETTINGS (Streamlit app) =====
+CACHE = {
+    'dataset_ttl_seconds': 3600,    # Loaded datasets and indexes expire after 1 hour
+    'max_datasets': 8,              # Datasets kept in memory across all sessions
+    'analysis_ttl_seconds': 1800,   # Per-student analyses expire after 30 minutes
+    'max_analyses': 50_000,         # Per-student analyses kept across all sessions
+}
+
+# ===== BACKGROUND PRECOMPUTATION =====
+PRECOMPUTE = {
+    'enabled': True,      # Analyze the whole cohort right after data is loaded
+    'max_workers': 4,     # Threads in the precompute pool
+    'chunk_size': 500,    # Students analyzed per vectorized batch
+}
+
+# ===== ATTEMPT TABLE (server-side pagination) =====
+TABLE = {
+    'page_sizes': [25, 50, 100],   # Rows per page choices
+    'student_search_limit': 50,    # Max students listed by the student search
+}
+
+# ===== HTTP ANALYSIS SERVICE (service.py) =====
+SERVICE = {
+    'host': '127.0.0.1',
+    'port': 8765,
+    'max_batch_size': 256,           # Students per coalesced detector call
+    'max_batch_wait_ms': 2,          # Longest a request waits for its batch to fill
+    'max_workers': 2,                # Threads running batched analyses
+    'max_body_bytes': 10_000_000,    # Largest accepted request body
+}
+
+# ===== OFFLINE CLI (python -m edu_sense) =====
+CLI = {
+    'workers': None,            # Worker processes (None = CPU count)
+    'chunk_size': 2000,         # Students analyzed per worker task
+    'output_format': 'parquet', # Used when --out has no known extension
+}
+
+# ===== COHORT BASELINES (baselines.py) =====
+BASELINES = {
+    'min_question_attempts': 5,  # Fewer cohort attempts: no question z-score (topic used instead)
+}
+
+# ===== UNUSUAL PROFILES (anomaly.py, needs scikit-learn) =====
+ANOMALY = {
+    'enabled': True,             # Streamlit app: add 'profile_gap' from a per-dataset model
+    'min_students': 50,          # Smaller cohorts are not scored (too few to define "unusual")
+    'contamination': 0.02,       # Share of the fitting cohort flagged as unusual
+    'high_severity_share': 0.005,  # Most unusual share of the cohort gets 'high' severity
+    'n_estimators': 100,         # IsolationForest trees
+    'batch_size': 50_000,        # Students scored per batch
+    'random_state': 42,
+}
+
+# ===== STUDENT GROUPS (clustering.py, needs scikit-learn) =====
+CLUSTERING = {
+    'n_clusters': 4,             # Intervention groups per cohort
+    'batch_size': 4096,          # MiniBatchKMeans batch size
+    'n_init': 3,                 # Initializations tried on the first fit
+    'random_state': 42,
+    'top_recommendations': 3,    # Recommendations shown per group
+    'members_shown': 50,         # Group Interventions page: member IDs listed per group
+}
+
+# ===== SIMILAR STUDENTS (peers.py, needs scikit-learn) =====
+PEERS = {
+    'k': 5,                      # Peers shown on Student Analysis
+    'algorithm': 'kd_tree',      # 'kd_tree' or 'ball_tree'
+    'leaf_size': 40,             # Tree leaf size (query speed vs build time)
+}
+
+# ===== QUESTION CO-ERRORS (co_errors.py, needs SciPy) =====
+CO_ERRORS = {
+    'min_co_errors': 3,          # Pairs missed together by fewer students are ignored
+    'top_n': 10,                 # Associations kept per question
+    'block_size': 2048,          # Questions per sparse product block (bounds peak memory)
+}
+
+# ===== QUANTILE SKETCHES (quantile_sketch.py) =====
+QUANTILE_SKETCH = {
+    'relative_accuracy': 0.05,   # Quantiles within 5% of the exact value
+    'min_value': 0.5,            # Seconds; faster attempts share the lowest bucket
+    'max_value': 7200,           # Seconds; slower attempts share the highest bucket
+}
+
+# ===== MULTI-TENANT SCHEDULER (scheduler.py) =====
+SCHEDULER = {
+    'workers': None,            # Worker processes (None = CPU count)
+    'chunk_size': 500,          # Students per task; larger tenants are split
+    'max_tenant_share': 0.5,    # Share of workers one tenant may hold while others wait
+}
+
+# ===== LOCAL ANALYSIS STORE (result_store.py) =====
+# Only used when PRIVACY['store_results_locally'] is True
+STORE = {
+    'path': 'edu_sense.db',     # SQLite file with attempts and results
+    'batch_size': 5000,         # Students re-analyzed per batch
+}
+
+# ===== STREAMING INGESTION (ingestion.py) =====
+INGESTION = {
+    'host': '127.0.0.1',
+    'port': 8766,                      # JSON-lines event socket
+    'max_queue': 10_000,               # Producers wait when this many events are queued
+    'max_batch_size': 1000,            # Events applied per micro-batch
+    'max_batch_wait_ms': 250,          # Oldest event waits at most this long for a batch
+    'tail_poll_seconds': 0.5,          # Check interval for tailed files
+    'checkpoint_seconds': 300,         # Detector checkpoint interval
+    'state_dir': 'ingest_state',       # Detector checkpoint directory
+    'event_log': 'ingest_events.jsonl',  # Events since the checkpoint, as <path>.<n> segments (outside state_dir)
+    'latency_samples': 10_000,         # Recent end-to-end latencies kept for percentiles
+}
+
+# ===== COLD START BUDGETS (checked by test_demo.py) =====
+IMPORT_BUDGETS_MS = {
+    'gap_detector': 200,   # Detector only needs NumPy at import time
+    'edu_sense': 150,      # Batch CLI
+    'service': 300,        # HTTP service
+}
+
+# ===== BENCHMARK SUITE (benchmark.py) =====
+BENCHMARK = {
+    'sizes': [1_000, 10_000, 100_000, 1_000_000],  # Default dataset sizes (attempts)
+    'attempts_per_student': 17,          # Average attempts per generated student
+    'history_file': 'benchmark_history.json',
+    'tolerance': 0.20,                   # Flag stages >20% slower or hungrier than baseline
+    'min_compare_seconds': 0.05,         # Shorter stages are too noisy to flag on time
+    'min_compare_bytes': 256 * 1024,     # Smaller allocations are too noisy to flag on memory
+    'stage_max_attempts': {              # Skip slow per-row/per-student stages on huge data
+        'generate_synthetic_data': 100_000,
+        'analyze_student': 1_000_000,
+        'analysis_utils': 100_000,
+        'report_generation': 1_000_000,
+    },
+}
+
+# ===== MEMORY PROFILING (memory_profile.py) =====
+MEMORY_PROFILE = {
+    'rss_sample_interval': 0.01,  # Seconds between RSS samples
+    'top_allocations': 10,        # Allocation sites reported per stage
+    'in_benchmark': True,         # Profile the pipeline in each benchmark run
+}
+
+# ===== INSTRUMENTATION (instrumentation.py) =====
+INSTRUMENTATION = {
+    'enabled': False,           # Record timing spans (near-zero cost when off)
+    'max_samples': 10_000,      # Recent samples kept per stage for percentiles
+    'show_diagnostics': False,  # Always list the Diagnostics page (else ?diagnostics=1)
+}
+
 # ===== UI SETTINGS =====
 UI = {
     'page_title': 'EDU-SENSE: Learning Gap Detection',
     'page_icon': '🧠',
     'layout': 'wide',
     'show_version': True,
-    'version': '1.0.0'
+    'version': '1.0.0',
+    'refresh_seconds': 2,  # Auto-refresh interval of live dashboard fragments
 }
 
 # ===== LOGGING =====
@@ -142,13 +310,14 @@ CONSERVATIVE_MODE = {
 # Default mode
 DETECTION_MODE = 'standard'  # 'standard', 'early_detection', or 'conservative'
 
-def get_active_config():
-    """Get the currently active configuration."""
-    if DETECTION_MODE == 'early_detection':
+def get_active_config(mode=None):
+    """Get the configuration for a detection mode (defaults to DETECTION_MODE)."""
+    mode = mode or DETECTION_MODE
+    if mode == 'early_detection':
         config = GAP_DETECTION.copy()
         config.update(EARLY_DETECTION_MODE)
         return config
-    elif DETECTION_MODE == 'conservative':
+    elif mode == 'conservative':
         config = GAP_DETECTION.copy()
         config.update(CONSERVATIVE_MODE)
         return config
@@ -124,6 +124,81 @@ def generate_synthetic_data(num_students=12, num_questions=50, random_seed=42) -
     return df
 
 
+def generate_large_dataset(num_attempts: int, attempts_per_student: int = 17,
+                           num_questions: int = 500, random_seed: int = 42) -> pd.DataFrame:
+    """
+    Generate a synthetic attempt table of an exact size, fully vectorized.
+    Uses the same student profiles and patterns as generate_synthetic_data,
+    but scales to millions of attempts (IDs and topics are categorical).
+    
+    Args:
+        num_attempts: Number of attempt rows to generate
+        attempts_per_student: Average attempts per student (15-20 in the demo data)
+        num_questions: Number of questions in the dataset
+        random_seed: Random seed for reproducibility
+    
+    Returns:
+        DataFrame with student question attempts, sorted by student and time
+    """
+    import config
+    
+    rng = np.random.default_rng(random_seed)
+    topics = list(config.TOPICS)
+    profile_names = list(config.STUDENT_PROFILES)
+    profiles = [config.STUDENT_PROFILES[name] for name in profile_names]
+    
+    # Attempts per student, trimmed so the total is exactly num_attempts
+    low, high = max(1, attempts_per_student - 2), attempts_per_student + 3
+    counts = rng.integers(low, high, size=num_attempts // low + 1)
+    totals = np.cumsum(counts)
+    num_students = int(np.searchsorted(totals, num_attempts)) + 1
+    counts = counts[:num_students]
+    counts[-1] -= totals[num_students - 1] - num_attempts
+    
+    student_codes = np.repeat(np.arange(num_students), counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    attempt_index = np.arange(num_attempts) - starts
+    profile_codes = student_codes % len(profiles)
+    
+    def profile_values(key, default=0.0):
+        return np.array([profile.get(key, default) for profile in profiles])[profile_codes]
+    
+    weak_topics = np.array([
+        topics.index(profile['weak_topic']) if 'weak_topic' in profile else -1
+        for profile in profiles
+    ])[profile_codes]
+    topic_codes = rng.integers(0, len(topics), size=num_attempts)
+    
+    # Weak topics reduce accuracy; the trend changes it over time
+    accuracy = profile_values('accuracy') * np.where(topic_codes == weak_topics, 0.7, 1.0)
+    accuracy = np.clip(accuracy + profile_values('improvement_trend') * attempt_index, 0.1, 0.95)
+    correct = rng.random(num_attempts) < accuracy
+    
+    # Wrong answers usually took longer
+    base_time = profile_values('base_time') * np.where(correct, 1.0, 1.2)
+    time_taken = np.maximum(10, rng.normal(base_time, profile_values('time_variance')))
+    
+    now = pd.Timestamp.now().floor('s')
+    seconds_back = rng.integers(0, 30, size=num_attempts) * 86400 + rng.integers(0, 86400, size=num_attempts)
+    timestamps = now.to_datetime64() - seconds_back.astype('timedelta64[s]')
+    
+    order = np.lexsort((timestamps, student_codes))
+    student_ids = [f"STU_{1001 + i}" for i in range(num_students)]
+    question_ids = [f"Q_{i}" for i in range(1, num_questions + 1)]
+    
+    return pd.DataFrame({
+        'Student_ID': pd.Categorical.from_codes(student_codes[order], categories=student_ids),
+        'Question_ID': pd.Categorical.from_codes(rng.integers(0, num_questions, size=num_attempts)[order],
+                                                 categories=question_ids),
+        'Topic': pd.Categorical.from_codes(topic_codes[order], categories=topics),
+        'Correct': correct[order].astype(np.int8),
+        'Time_Taken': time_taken[order],
+        'Attempt_Number': (attempt_index[order] + 1).astype(np.int32),
+        'Timestamp': timestamps[order].astype('datetime64[ns]'),
+        'Profile': pd.Categorical.from_codes(profile_codes[order], categories=profile_names),
+    })
+
+
 def get_data_summary() -> str:
     """Get summary of synthetic data generation approach."""
     return """
@@ -0,0 +1,315 @@
+"""
+Typed data loader for real student attempt files.
+Reads CSV, Parquet and JSONL attempt logs into the same layout produced by
+the synthetic data generator, with an Arrow IPC cache for fast reloads.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+import config
+from instrumentation import span, traced
+from utils import DataValidator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Explicit dtype schema for attempt files
+ATTEMPT_SCHEMA = {
+    'Student_ID': 'category',
+    'Question_ID': 'category',
+    'Topic': 'category',
+    'Correct': 'int8',
+    'Time_Taken': 'float32',
+    'Attempt_Number': 'int32',
+    'Timestamp': 'datetime64[ns]',
+    'Profile': 'category',
+}
+
+SUPPORTED_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+ProgressCallback = Callable[[int, Optional[float]], None]
+
+
+@traced('loader.load_attempts')
+def load_attempts(path: str,
+                  columns: Optional[List[str]] = None,
+                  chunk_size: Optional[int] = None,
+                  progress_callback: Optional[ProgressCallback] = None,
+                  use_cache: Optional[bool] = None,
+                  validate: bool = True) -> pd.DataFrame:
+    """
+    Load a student attempt file with the typed attempt schema.
+
+    Args:
+        path: Path to a .csv, .parquet or .jsonl attempt file
+        columns: Optional list of columns to load (all columns if None)
+        chunk_size: Rows per chunk (defaults to config.DATA_LOADING)
+        progress_callback: Called as callback(rows_read, fraction_done)
+            after each chunk; fraction_done is None when unknown
+        use_cache: Read/write the Arrow IPC cache (defaults to config)
+        validate: Run DataValidator checks on the loaded data
+
+    Returns:
+        DataFrame with student question attempts
+    """
+    settings = config.DATA_LOADING
+    file_format = detect_format(path)
+    chunk_size = chunk_size or settings['chunk_size']
+    if use_cache is None:
+        use_cache = settings['use_arrow_cache']
+
+    cache_path = None
+    if use_cache and _pyarrow_available():
+        cache_path = _cache_path(path, columns)
+        if os.path.exists(cache_path):
+            with span('loader.read_arrow_cache'):
+                df = _read_arrow_cache(cache_path)
+            if progress_callback:
+                progress_callback(len(df), 1.0)
+            return df
+
+    with span(f'loader.read_{file_format}'):
+        if file_format == 'csv':
+            df = _read_csv(path, columns, chunk_size, progress_callback)
+        elif file_format == 'parquet':
+            df = _read_parquet(path, columns, chunk_size, progress_callback)
+        else:
+            df = _read_jsonl(path, columns, chunk_size, progress_callback)
+
+    if validate and columns is None:
+        with span('loader.validate'):
+            is_valid, errors = DataValidator.validate_student_data(df)
+        if not is_valid:
+            raise ValueError(f"Invalid attempt file {path}: {'; '.join(errors)}")
+
+    if cache_path is not None:
+        with span('loader.write_arrow_cache'):
+            _write_arrow_cache(df, cache_path)
+
+    return df
+
+
+def detect_format(path: str) -> str:
+    """Detect the attempt file format from its extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SUPPORTED_FORMATS:
+        raise ValueError(
+            f"Unsupported attempt file format '{extension}'. "
+            f"Expected one of: {', '.join(sorted(SUPPORTED_FORMATS))}"
+        )
+    return SUPPORTED_FORMATS[extension]
+
+
+def apply_attempt_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast attempt columns to the typed attempt schema.
+    Columns not in the schema are left untouched.
+
+    Args:
+        df: DataFrame with student question attempts
+
+    Returns:
+        DataFrame with schema dtypes applied
+    """
+    import pandas as pd
+
+    casts = {}
+    for column, dtype in ATTEMPT_SCHEMA.items():
+        if column not in df.columns or column == 'Timestamp':
+            continue
+        if str(df[column].dtype) != dtype:
+            casts[column] = dtype
+    if casts:
+        df = df.astype(casts)
+
+    if 'Timestamp' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Timestamp']):
+        # JSON writers usually emit epoch milliseconds
+        unit = 'ms' if pd.api.types.is_numeric_dtype(df['Timestamp']) else None
+        df = df.assign(Timestamp=pd.to_datetime(df['Timestamp'], unit=unit))
+
+    return df
+
+
+def file_fingerprint(path: str, columns: Optional[List[str]] = None) -> str:
+    """
+    Fingerprint a file by path, size and modification time.
+
+    Args:
+        path: Path to the attempt file
+        columns: Optional column projection included in the key
+
+    Returns:
+        Short hex digest identifying this version of the file
+    """
+    stat = os.stat(path)
+    key = {
+        'path': os.path.abspath(path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'columns': sorted(columns) if columns else None,
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Fingerprint an in-memory attempt table by its contents.
+
+    Args:
+        df: DataFrame with student question attempts
+
+    Returns:
+        Short hex digest identifying this dataset
+    """
+    import pandas as pd
+
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update(','.join(df.columns).encode())
+    return digest.hexdigest()[:16]
+
+
+def _read_csv(path: str, columns: Optional[List[str]], chunk_size: int,
+              progress_callback: Optional[ProgressCallback]) -> pd.DataFrame:
+    """Read a CSV file in chunks, reporting progress by bytes consumed."""
+    import pandas as pd
+
+    total_bytes = os.path.getsize(path) or 1
+    dtypes = _reader_dtypes(columns)
+
+    chunks = []
+    rows_read = 0
+    with open(path, 'rb') as handle:
+        # Timestamp is optional, so it is parsed per chunk by apply_attempt_schema
+        reader = pd.read_csv(handle, usecols=columns, dtype=dtypes, chunksize=chunk_size)
+        for chunk in reader:
+            chunks.append(apply_attempt_schema(chunk))
+            rows_read += len(chunk)
+            if progress_callback:
+                progress_callback(rows_read, min(1.0, handle.tell() / total_bytes))
+
+    return _concat_chunks(chunks)
+
+
+def _read_parquet(path: str, columns: Optional[List[str]], chunk_size: int,
+                  progress_callback: Optional[ProgressCallback]) -> pd.DataFrame:
+    """Read a Parquet file batch by batch, reporting progress by rows."""
+    if not _pyarrow_available():
+        raise ImportError("Reading Parquet attempt files requires pyarrow (pip install pyarrow)")
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    total_rows = parquet_file.metadata.num_rows or 1
+
+    chunks = []
+    rows_read = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+        chunks.append(apply_attempt_schema(batch.to_pandas()))
+        rows_read += batch.num_rows
+        if progress_callback:
+            progress_callback(rows_read, min(1.0, rows_read / total_rows))
+
+    return _concat_chunks(chunks)
+
+
+def _read_jsonl(path: str, columns: Optional[List[str]], chunk_size: int,
+                progress_callback: Optional[ProgressCallback]) -> pd.DataFrame:
+    """Read a JSON-lines file in chunks, reporting progress by bytes consumed."""
+    import pandas as pd
+
+    total_bytes = os.path.getsize(path) or 1
+
+    chunks = []
+    rows_read = 0
+    with open(path, 'rb') as handle:
+        reader = pd.read_json(handle, lines=True, chunksize=chunk_size,
+                              dtype=False, convert_dates=False)
+        for chunk in reader:
+            if columns is not None:
+                chunk = chunk[columns]
+            chunks.append(apply_attempt_schema(chunk))
+            rows_read += len(chunk)
+            if progress_callback:
+                progress_callback(rows_read, min(1.0, handle.tell() / total_bytes))
+
+    return _concat_chunks(chunks)
+
+
+def _reader_dtypes(columns: Optional[List[str]]) -> Dict[str, str]:
+    """Dtypes handed to the CSV reader (timestamps are parsed separately)."""
+    return {
+        column: dtype for column, dtype in ATTEMPT_SCHEMA.items()
+        if column != 'Timestamp' and (columns is None or column in columns)
+    }
+
+
+def _concat_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate chunks, unifying categories so categoricals survive."""
+    import pandas as pd
+
+    if not chunks:
+        return apply_attempt_schema(pd.DataFrame(columns=list(ATTEMPT_SCHEMA)))
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+
+    categorical = [
+        column for column in chunks[0].columns
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype)
+    ]
+    df = pd.concat(chunks, ignore_index=True)
+    for column in categorical:
+        if not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = pd.api.types.union_categoricals(
+                [chunk[column] for chunk in chunks]
+            )
+    return df
+
+
+def _cache_path(path: str, columns: Optional[List[str]]) -> str:
+    """Location of the Arrow IPC cache for this version of the file."""
+    cache_dir = config.DATA_LOADING['cache_dir']
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}-{file_fingerprint(path, columns)}.arrow")
+
+
+def _read_arrow_cache(cache_path: str) -> pd.DataFrame:
+    """Read a cached table through a memory map."""
+    import pyarrow as pa
+
+    with pa.memory_map(cache_path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+def _write_arrow_cache(df: pd.DataFrame, cache_path: str) -> None:
+    """Write an uncompressed Arrow IPC file so it can be memory-mapped."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = cache_path + '.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, cache_path)
+
+
+def _pyarrow_available() -> bool:
+    """Check whether pyarrow is installed."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,479 @@
+"""
+Command-line entry point for offline cohort analysis.
+Reads an attempts file, runs gap detection and recommendations for every
+student on a pool of worker processes and writes one result row per student.
+Does not import Streamlit, plotly or matplotlib, so it starts quickly in
+cron jobs.
+
+Usage:
+    python -m edu_sense analyze attempts.parquet --out results.parquet
+    python -m edu_sense analyze attempts.csv --out results.jsonl --workers 8 --mode early_detection
+    python -m edu_sense analyze today.parquet --store edu_sense.db --out changed.parquet
+    python -m edu_sense analyze attempts.parquet --anomaly-model profiles.joblib
+    python -m edu_sense tenants schools/ --out all-schools.parquet --report run.json
+    python -m edu_sense co-errors attempts.parquet --out co-errors.parquet --top 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import config
+
+OUTPUT_FORMATS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+# Attempt table shared with worker processes (set by _init_worker)
+_worker_state: Dict = {}
+
+
+def analysis_record(student_id: str, analysis: Dict, recommendations: List[Dict], mode: str) -> Dict:
+    """
+    Flatten one student's analysis into an output row.
+
+    Args:
+        student_id: Student the results belong to
+        analysis: Dictionary from LearningGapDetector
+        recommendations: List from RecommendationEngine
+        mode: Detection mode used
+
+    Returns:
+        Dictionary of plain Python values (JSON and Parquet friendly)
+    """
+    from utils import AnalysisUtils
+
+    return {
+        'student_id': student_id,
+        'mode': mode,
+        'total_attempts': int(analysis['total_attempts']),
+        'correct_answers': int(analysis['correct_answers']),
+        'accuracy': float(analysis['accuracy']),
+        'avg_time': float(analysis['avg_time']),
+        'overall_score': float(analysis['overall_score']),
+        'risk_band': AnalysisUtils.get_risk_band(analysis),
+        'num_gaps': len(analysis['gaps']),
+        'gaps': [
+            {
+                'gap': gap_name,
+                'severity': details['severity'],
+                'confidence': float(details['confidence']),
+                'affected_questions': int(details['affected_questions']),
+                'description': details['description'],
+            }
+            for gap_name, details in analysis['gaps'].items()
+        ],
+        'recommendations': [
+            {
+                'title': rec['title'],
+                'priority': rec['priority'],
+                'practice_type': rec['practice_type'],
+                'duration': rec['duration'],
+                'expected_impact': float(rec['expected_impact']),
+                'target_topics': list(rec['target_topics']),
+                'steps': list(rec['steps']),
+            }
+            for rec in recommendations
+        ],
+    }
+
+
+def analyze_file(path: str,
+                 mode: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None,
+                 progress: bool = False,
+                 anomaly=None) -> List[Dict]:
+    """
+    Analyze every student in an attempts file.
+
+    Args:
+        path: Path to a .csv, .parquet or .jsonl attempt file
+        mode: Detection mode (defaults to config.DETECTION_MODE)
+        workers: Worker processes (1 analyzes in this process)
+        chunk_size: Students analyzed per task
+        progress: Print progress to stderr
+        anomaly: Fitted ProfileAnomalyDetector (adds 'profile_gap')
+
+    Returns:
+        List of result rows (see analysis_record), sorted by student ID
+    """
+    from data_loader import load_attempts
+
+    return analyze_frame(load_attempts(path), mode, workers, chunk_size, progress, anomaly)
+
+
+def analyze_frame(data,
+                  mode: Optional[str] = None,
+                  workers: Optional[int] = None,
+                  chunk_size: Optional[int] = None,
+                  progress: bool = False,
+                  anomaly=None) -> List[Dict]:
+    """
+    Analyze every student in an attempts DataFrame.
+
+    Args:
+        data: DataFrame with question attempts
+        mode: Detection mode (defaults to config.DETECTION_MODE)
+        workers: Worker processes (1 analyzes in this process)
+        chunk_size: Students analyzed per task
+        progress: Print progress to stderr
+        anomaly: Fitted ProfileAnomalyDetector (adds 'profile_gap')
+
+    Returns:
+        List of result rows (see analysis_record), sorted by student ID
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    from attempt_index import AttemptIndex
+
+    settings = config.CLI
+    mode = mode or config.DETECTION_MODE
+    workers = workers or settings['workers'] or os.cpu_count() or 1
+    chunk_size = chunk_size or settings['chunk_size']
+
+    index = AttemptIndex(data)
+    students = index.students()
+    chunks = [(start, min(start + chunk_size, len(students)))
+              for start in range(0, len(students), chunk_size)]
+    if progress:
+        print(f"Loaded {len(data):,} attempts for {len(students):,} students", file=sys.stderr)
+
+    records: List[Dict] = []
+    if workers == 1 or len(chunks) <= 1:
+        _init_worker(index, mode, anomaly)
+        for chunk in chunks:
+            records.extend(_analyze_chunk(chunk))
+            _report(progress, len(records), len(students))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)),
+                                 initializer=_init_worker,
+                                 initargs=(index, mode, anomaly)) as executor:
+            for chunk_records in executor.map(_analyze_chunk, chunks):
+                records.extend(chunk_records)
+                _report(progress, len(records), len(students))
+    return records
+
+
+def write_results(records: List[Dict], out_path: str, output_format: Optional[str] = None) -> str:
+    """
+    Write result rows as Parquet or JSON lines.
+
+    Args:
+        records: Rows from analyze_file
+        out_path: Output file path
+        output_format: 'parquet' or 'jsonl' (inferred from the extension if None)
+
+    Returns:
+        The format written
+    """
+    if output_format is None:
+        extension = os.path.splitext(out_path)[1].lower()
+        output_format = OUTPUT_FORMATS.get(extension, config.CLI['output_format'])
+
+    out_dir = os.path.dirname(out_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if output_format == 'parquet':
+        import pandas as pd
+        pd.DataFrame.from_records(records).to_parquet(out_path, index=False)
+    elif output_format == 'jsonl':
+        with open(out_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+    else:
+        raise ValueError(f"Unsupported output format '{output_format}'; use parquet or jsonl")
+    return output_format
+
+
+def _init_worker(index, mode: str, anomaly=None) -> None:
+    """Give a worker the attempt index, its detector/engine and the profile model."""
+    from gap_detector import LearningGapDetector
+    from recommendation_engine import RecommendationEngine
+
+    _worker_state['index'] = index
+    _worker_state['mode'] = mode
+    _worker_state['detector'] = LearningGapDetector(mode)
+    _worker_state['engine'] = RecommendationEngine()
+    _worker_state['anomaly'] = anomaly
+
+
+def _analyze_chunk(bounds) -> List[Dict]:
+    """Analyze students [start, end) of the sorted student list."""
+    index = _worker_state['index']
+    start, end = bounds
+    rows = index.order[index.offsets[start]:index.offsets[end]]
+    analyses = _worker_state['detector'].analyze_cohort(index.data.iloc[rows],
+                                                        anomaly=_worker_state['anomaly'])
+
+    records = []
+    for student_id in index.student_ids[start:end]:
+        analysis = analyses[student_id]
+        recommendations = _worker_state['engine'].generate_recommendations(analysis)
+        records.append(analysis_record(student_id, analysis, recommendations, _worker_state['mode']))
+    return records
+
+
+def _report(progress: bool, done: int, total: int) -> None:
+    if progress:
+        print(f"  {done:,}/{total:,} students analyzed", file=sys.stderr)
+
+
+def _analyze_with_store(args, anomaly=None) -> Optional[List[Dict]]:
+    """Ingest into the local store and re-analyze only students with new attempts."""
+    from data_loader import load_attempts
+    from result_store import open_store
+
+    store = open_store(args.store)
+    if store is None:
+        print("error: --store needs config.PRIVACY['store_results_locally'] = True", file=sys.stderr)
+        return None
+
+    with store:
+        added = store.add_attempts(load_attempts(args.path))
+        stale = store.stale_students(args.mode)
+        if not args.quiet:
+            print(f"Stored {added:,} new attempts; {len(stale):,} of {store.num_students():,} "
+                  f"students need re-analysis", file=sys.stderr)
+        run_start = time.time()
+        records = store.reanalyze(args.mode, analyze=lambda data: analyze_frame(
+            data, args.mode, args.workers, args.chunk_size, progress=not args.quiet,
+            anomaly=anomaly))
+        events = store.gap_events(args.mode, since=run_start)
+        if args.changes:
+            _write_changes(events, args.changes)
+        if not args.quiet:
+            counts = events['event'].value_counts()
+            summary = ', '.join(f"{counts[event]:,} {event}" for event in counts.index)
+            print(f"Gap changes: {summary or 'none'}", file=sys.stderr)
+        return records
+
+
+def _load_anomaly_model(args):
+    """Load --anomaly-model, or fit it on the input file and save it there (None without scikit-learn)."""
+    try:
+        import sklearn  # noqa: F401
+    except ImportError as e:
+        print(f"error: --anomaly-model needs scikit-learn ({e})", file=sys.stderr)
+        return None
+
+    from anomaly import ProfileAnomalyDetector
+
+    if os.path.exists(args.anomaly_model):
+        return ProfileAnomalyDetector.load(args.anomaly_model)
+
+    from data_loader import load_attempts
+
+    start = time.perf_counter()
+    model = ProfileAnomalyDetector().fit(load_attempts(args.path))
+    model.save(args.anomaly_model)
+    if not args.quiet:
+        print(f"Fitted profile model on {args.path} in {time.perf_counter() - start:.1f}s "
+              f"-> {args.anomaly_model}", file=sys.stderr)
+    return model
+
+
+def _write_changes(events, path: str) -> None:
+    """Write gap change events as JSON lines with a teacher-facing message."""
+    from change_feed import describe_event
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for event in events.astype(object).where(events.notna(), None).to_dict('records'):
+            event['message'] = describe_event(event['gap'], event['event'],
+                                              event['old_severity'], event['new_severity'])
+            f.write(json.dumps(event) + '\n')
+
+
+def load_tenants(paths: List[str], tenant_column: Optional[str] = None) -> Dict:
+    """
+    Load attempt tables per tenant.
+
+    Args:
+        paths: Attempt files and/or directories of attempt files
+        tenant_column: Split every file by this column; otherwise each file
+            is one tenant named after the file
+
+    Returns:
+        Dictionary mapping tenant ID to its attempts DataFrame
+    """
+    from data_loader import SUPPORTED_FORMATS, load_attempts
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if os.path.splitext(name)[1].lower() in SUPPORTED_FORMATS))
+        else:
+            files.append(path)
+
+    tenants = {}
+    for path in files:
+        data = load_attempts(path)
+        if tenant_column is None:
+            tenants[os.path.splitext(os.path.basename(path))[0]] = data
+            continue
+        if tenant_column not in data.columns:
+            raise ValueError(f"{path} has no '{tenant_column}' column")
+        for tenant, group in data.groupby(tenant_column, observed=True, sort=True):
+            tenants[str(tenant)] = group
+    return tenants
+
+
+def _cmd_tenants(args) -> int:
+    from scheduler import TenantScheduler
+
+    try:
+        tenants = load_tenants(args.paths, args.tenant_column)
+    except (OSError, ValueError) as e:
+        print(f"error: could not load tenants: {e}", file=sys.stderr)
+        return 1
+    if not tenants:
+        print("error: no attempt files found", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        print(f"Loaded {len(tenants):,} tenants", file=sys.stderr)
+
+    scheduler = TenantScheduler(args.mode, args.workers, args.chunk_size, args.max_tenant_share)
+    results, report = scheduler.run(tenants, progress=not args.quiet)
+    records = [dict(record, tenant=tenant) for tenant, rows in results.items() for record in rows]
+    output_format = write_results(records, args.out, args.format)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if not args.quiet:
+        print(f"Analyzed {report['students']:,} students of {report['tenants']:,} tenants in "
+              f"{report['makespan_seconds']:.1f}s (lower bound {report['makespan_lower_bound_seconds']:.1f}s, "
+              f"utilization {report['utilization']:.0%}, {report['steals']:,} steals) "
+              f"-> {args.out} ({output_format})", file=sys.stderr)
+    return 0
+
+
+def _cmd_analyze(args) -> int:
+    out_path = args.out or f"{os.path.splitext(args.path)[0]}-analysis.{args.format or 'parquet'}"
+
+    start = time.perf_counter()
+    try:
+        anomaly = None
+        if args.anomaly_model:
+            anomaly = _load_anomaly_model(args)
+            if anomaly is None:
+                return 1
+        if args.store:
+            records = _analyze_with_store(args, anomaly)
+            if records is None:
+                return 1
+        else:
+            records = analyze_file(args.path, mode=args.mode, workers=args.workers,
+                                   chunk_size=args.chunk_size, progress=not args.quiet,
+                                   anomaly=anomaly)
+    except (OSError, ValueError) as e:
+        print(f"error: could not analyze {args.path}: {e}", file=sys.stderr)
+        return 1
+
+    output_format = write_results(records, out_path, args.format)
+    if not args.quiet:
+        flagged = sum(1 for record in records if record['risk_band'] != 'on_track')
+        print(f"Analyzed {len(records):,} students ({flagged:,} need intervention) "
+              f"in {time.perf_counter() - start:.1f}s -> {out_path} ({output_format})",
+              file=sys.stderr)
+    return 0
+
+
+def _cmd_co_errors(args) -> int:
+    from data_loader import load_attempts
+
+    out_path = args.out or f"{os.path.splitext(args.path)[0]}-co-errors.{args.format or 'parquet'}"
+    try:
+        import scipy  # noqa: F401
+    except ImportError as e:
+        print(f"error: co-errors needs SciPy ({e})", file=sys.stderr)
+        return 1
+
+    from co_errors import CoErrorMiner
+
+    start = time.perf_counter()
+    try:
+        miner = CoErrorMiner(min_co_errors=args.min_co_errors, top_n=args.top).fit(load_attempts(args.path))
+        associations = miner.associations(rank_by=args.rank_by)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"error: could not mine {args.path}: {e}", file=sys.stderr)
+        return 1
+
+    output_format = write_results(associations.to_dict('records'), out_path, args.format)
+    if not args.quiet:
+        print(f"Found {len(associations):,} associations among {len(miner.question_ids):,} questions "
+              f"({miner.num_students:,} students) in {time.perf_counter() - start:.1f}s "
+              f"-> {out_path} ({output_format})", file=sys.stderr)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='edu_sense', description="EDU-SENSE offline analysis")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    analyze = subparsers.add_parser('analyze', help="Analyze every student in an attempts file")
+    analyze.add_argument('path', help="Attempts file (.csv, .parquet or .jsonl)")
+    analyze.add_argument('--out', help="Output file (default: <input>-analysis.parquet)")
+    analyze.add_argument('--format', choices=['parquet', 'jsonl'],
+                         help="Output format (default: from --out extension)")
+    analyze.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    analyze.add_argument('--chunk-size', type=int, help="Students per task")
+    analyze.add_argument('--mode', choices=['standard', 'early_detection', 'conservative'],
+                         default=config.DETECTION_MODE, help="Detection mode")
+    analyze.add_argument('--store', metavar='DB',
+                         help="SQLite store: keep attempts/results and only re-analyze "
+                              "students with new attempts (needs PRIVACY store_results_locally)")
+    analyze.add_argument('--changes', metavar='JSONL',
+                         help="With --store: write this run's gap changes (added/removed/"
+                              "escalated/de-escalated) as JSON lines")
+    analyze.add_argument('--anomaly-model', metavar='JOBLIB',
+                         help="Flag unusual attempt profiles (profile_gap) with this "
+                              "IsolationForest model; fitted on the input and saved if missing "
+                              "(needs scikit-learn)")
+    analyze.add_argument('--quiet', action='store_true', help="Only print errors")
+    analyze.set_defaults(handler=_cmd_analyze)
+
+    tenants = subparsers.add_parser('tenants', help="Analyze many tenants (schools) on one worker pool")
+    tenants.add_argument('paths', nargs='+', help="Attempt files or directories (one tenant per file)")
+    tenants.add_argument('--tenant-column', help="Split files by this column instead")
+    tenants.add_argument('--out', required=True, help="Output file (rows carry a 'tenant' field)")
+    tenants.add_argument('--format', choices=['parquet', 'jsonl'],
+                         help="Output format (default: from --out extension)")
+    tenants.add_argument('--report', metavar='JSON', help="Write the makespan/utilization report here")
+    tenants.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    tenants.add_argument('--chunk-size', type=int, help="Students per task")
+    tenants.add_argument('--max-tenant-share', type=float,
+                         help="Share of workers one tenant may hold while others wait")
+    tenants.add_argument('--mode', choices=['standard', 'early_detection', 'conservative'],
+                         default=config.DETECTION_MODE, help="Detection mode")
+    tenants.add_argument('--quiet', action='store_true', help="Only print errors")
+    tenants.set_defaults(handler=_cmd_tenants)
+
+    co_errors = subparsers.add_parser('co-errors', help="Find questions students tend to miss together")
+    co_errors.add_argument('path', help="Attempts file (.csv, .parquet or .jsonl)")
+    co_errors.add_argument('--out', help="Output file (default: <input>-co-errors.parquet)")
+    co_errors.add_argument('--format', choices=['parquet', 'jsonl'],
+                           help="Output format (default: from --out extension)")
+    co_errors.add_argument('--top', type=int, help="Associations kept per question")
+    co_errors.add_argument('--min-co-errors', type=int,
+                           help="Ignore pairs missed together by fewer students")
+    co_errors.add_argument('--rank-by', choices=['lift', 'co_errors', 'confidence'], default='lift',
+                           help="Order of each question's associations")
+    co_errors.add_argument('--quiet', action='store_true', help="Only print errors")
+    co_errors.set_defaults(handler=_cmd_co_errors)
+
+    args = parser.parse_args(argv)
+    if args.command == 'analyze' and args.changes and not args.store:
+        analyze.error("--changes needs --store (gap changes are diffed against the stored results)")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
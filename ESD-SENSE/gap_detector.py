@@ -1,6 +1,17 @@
-import pandas as pd
+from __future__ import annotations
+
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import config
+from instrumentation import traced
+from quantile_sketch import QuantileSketches
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from anomaly import ProfileAnomalyDetector
+    from baselines import CohortBaselines
 
 class LearningGapDetector:
     """
@@ -8,16 +19,31 @@ class LearningGapDetector:
     Analyzes mistakes, timing, and conceptual weaknesses.
     """
     
-    def __init__(self):
+    def __init__(self, mode: Optional[str] = None):
         self.gaps_detected = {}
-        self.min_attempts_threshold = 3
+        self.mode = mode or config.DETECTION_MODE
+        settings = config.get_active_config(self.mode)
+        self.min_attempts_threshold = settings['min_attempts_threshold']
+        self.concept_gap_threshold = settings['concept_gap_threshold']
+        self.confidence_time_multiplier = settings['confidence_time_multiplier']
+        self.speed_time_multiplier = settings['speed_time_multiplier']
+        self.timing_rule = settings['timing_rule']
+        self.hesitation_percentile = settings['hesitation_percentile']
+        self.rushing_percentile = settings['rushing_percentile']
         
-    def analyze_student(self, student_df: pd.DataFrame) -> Dict:
+    @traced('detector.analyze_student')
+    def analyze_student(self, student_df: pd.DataFrame,
+                        baselines: Optional[CohortBaselines] = None,
+                        anomaly: Optional[ProfileAnomalyDetector] = None) -> Dict:
         """
         Comprehensive analysis of a student's learning patterns.
         
         Args:
             student_df: DataFrame with student's question attempts
+            baselines: Cohort baselines; adds 'topic_pace' (timing and
+                accuracy relative to the cohort, per topic)
+            anomaly: Fitted profile model; adds a 'profile_gap' if the
+                student's attempt profile is unusual for the cohort
             
         Returns:
             Dictionary with detected gaps and metrics
@@ -39,6 +65,9 @@ class LearningGapDetector:
         
         # Combine all gaps
         all_gaps = {**concept_gaps, **confidence_gaps, **speed_gaps}
+        if anomaly is not None:
+            for profile_gap in anomaly.gaps(student_df).values():
+                all_gaps['profile_gap'] = profile_gap
         
         # Calculate overall score
         overall_score = self._calculate_overall_score(
@@ -47,7 +76,7 @@ class LearningGapDetector:
             student_df
         )
         
-        return {
+        analysis = {
             'total_attempts': total_attempts,
             'correct_answers': correct_answers,
             'accuracy': accuracy,
@@ -56,7 +85,204 @@ class LearningGapDetector:
             'overall_score': overall_score,
             'student_id': student_df['Student_ID'].iloc[0] if 'Student_ID' in student_df.columns else 'Unknown'
         }
+        if baselines is not None:
+            analysis['topic_pace'] = self._topic_pace(student_df, baselines).get(str(analysis['student_id']), {})
+        return analysis
+    
+    @traced('detector.analyze_cohort')
+    def analyze_cohort(self, attempts_df: pd.DataFrame,
+                       baselines: Optional[CohortBaselines] = None,
+                       anomaly: Optional[ProfileAnomalyDetector] = None) -> Dict[str, Dict]:
+        """
+        Analyze every student in an attempt table in one vectorized pass.
+        Applies the same rules as analyze_student() without per-student masking.
+        
+        Args:
+            attempts_df: DataFrame with question attempts for many students
+            baselines: Cohort baselines; adds 'topic_pace' to every analysis
+            anomaly: Fitted profile model; adds 'profile_gap' to unusual
+                students (scored in one batch)
+            
+        Returns:
+            Dictionary mapping student ID to its analysis dictionary
+        """
+        import pandas as pd
+
+        if len(attempts_df) == 0:
+            return {}
+        
+        student_codes, student_ids = pd.factorize(attempts_df['Student_ID'])
+        num_students = len(student_ids)
+        times = attempts_df['Time_Taken'].to_numpy(dtype=np.float64)
+        correct = (attempts_df['Correct'] == 1).to_numpy()
+        wrong = (attempts_df['Correct'] == 0).to_numpy()
+        
+        # Basic metrics
+        total_attempts = np.bincount(student_codes, minlength=num_students)
+        correct_answers = np.bincount(student_codes, weights=correct, minlength=num_students)
+        time_sums = np.bincount(student_codes, weights=times, minlength=num_students)
+        avg_time = time_sums / total_attempts
+        time_std = self._time_std(student_codes, times, avg_time, total_attempts)
+        
+        # Per (student, topic) totals, topics in order of first attempt
+        pair_students = pair_topics = pair_attempts = pair_correct = np.array([], dtype=np.int64)
+        if 'Topic' in attempts_df.columns:
+            topic_codes, topics = pd.factorize(attempts_df['Topic'])
+            # Null topics (code -1) would alias another student's pair; analyze_student skips them too
+            known = topic_codes >= 0
+            pair_codes, pairs = pd.factorize(student_codes[known].astype(np.int64) * len(topics) + topic_codes[known])
+            pair_students, topic_of_pair = np.divmod(np.asarray(pairs), len(topics))
+            pair_topics = np.asarray(topics, dtype=object)[topic_of_pair]
+            pair_attempts = np.bincount(pair_codes)
+            pair_correct = np.bincount(pair_codes, weights=correct[known])
+        
+        # Unusual profiles: one batch of model scores for the whole table
+        profile_gaps = None
+        if anomaly is not None:
+            position_of = {str(student_id): i for i, student_id in enumerate(student_ids)}
+            profile_gaps = {position_of[student_id]: gap for student_id, gap in anomaly.gaps(attempts_df).items()}
+        
+        analyses = self._analyses_from_totals(
+            student_ids, total_attempts, correct_answers, time_sums, time_std,
+            pair_students, pair_topics, pair_attempts, pair_correct,
+            self._timing_counts(student_codes, times, wrong, avg_time),
+            profile_gaps=profile_gaps,
+        )
+        if baselines is not None:
+            pace = self._topic_pace(attempts_df, baselines)
+            for student_id, analysis in analyses.items():
+                analysis['topic_pace'] = pace.get(student_id, {})
+        return analyses
+    
+    def _analyses_from_totals(self, student_ids, total_attempts: np.ndarray, correct_answers: np.ndarray,
+                              time_sums: np.ndarray, time_std: np.ndarray,
+                              pair_students: np.ndarray, pair_topics: np.ndarray,
+                              pair_attempts: np.ndarray, pair_correct: np.ndarray,
+                              timing: Tuple[np.ndarray, ...],
+                              profile_gaps: Optional[Dict[int, Dict]] = None) -> Dict[str, Dict]:
+        """
+        Apply the gap rules and the overall score to per-student and
+        per-(student, topic) totals. analyze_cohort(), TimeTravelIndex and
+        IncrementalDetector keep their totals differently but all build
+        their analyses here.
+        
+        Args:
+            student_ids: One ID per student position
+            total_attempts: Attempts per student
+            correct_answers: Correct attempts per student
+            time_sums: Total time per student
+            time_std: Sample standard deviation of time per student
+            pair_students: Student position of each (student, topic) pair
+            pair_topics: Topic name of each pair
+            pair_attempts: Attempts per pair
+            pair_correct: Correct attempts per pair (concept gaps are listed in pair order)
+            timing: Slow and fast attempt counts, as from _timing_counts()
+            profile_gaps: Student position -> 'profile_gap' from the anomaly model
+            
+        Returns:
+            Dictionary mapping student ID to its analysis dictionary
+        """
+        num_students = len(student_ids)
+        accuracy = correct_answers / total_attempts
+        avg_time = time_sums / total_attempts
+        gaps = [dict() for _ in range(num_students)]
+        
+        # Concept gaps: low accuracy on a topic with enough attempts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pair_accuracy = pair_correct / pair_attempts
+        flagged = np.flatnonzero(
+            (pair_attempts >= self.min_attempts_threshold) &
+            (pair_accuracy < self.concept_gap_threshold)
+        )
+        for pair in flagged:
+            topic = pair_topics[pair]
+            topic_accuracy = pair_accuracy[pair]
+            gaps[pair_students[pair]][f'concept_gap_{topic.lower().replace(" ", "_")}'] = {
+                'severity': self._severity_from_accuracy(topic_accuracy),
+                'confidence': 1 - topic_accuracy,
+                'affected_questions': int(pair_attempts[pair]),
+                'description': f"Struggling with {topic}: {topic_accuracy:.1%} accuracy"
+            }
+        
+        high_time_threshold, high_time_attempts, high_time_wrong, fast_attempts, fast_wrong = timing
+        
+        # Confidence gaps: slow attempts that are still wrong
+        with np.errstate(divide='ignore', invalid='ignore'):
+            high_time_ratio = high_time_wrong / high_time_attempts
+        for student in np.flatnonzero((high_time_attempts > 0) & (high_time_ratio > 0.5)):
+            ratio = high_time_ratio[student]
+            gaps[student]['confidence_gap'] = {
+                'severity': 'medium' if ratio < 0.7 else 'high',
+                'confidence': ratio,
+                'affected_questions': int(high_time_attempts[student]),
+                'description': f"Takes excessive time ({high_time_threshold[student]:.1f}s+) but still gets answers wrong"
+            }
+        
+        # Speed gaps: fast attempts that are wrong
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fast_ratio = fast_wrong / fast_attempts
+        for student in np.flatnonzero((fast_attempts > 2) & (fast_ratio > 0.4)):
+            gaps[student]['speed_gap'] = {
+                'severity': 'medium',
+                'confidence': fast_ratio[student],
+                'affected_questions': int(fast_attempts[student]),
+                'description': "Answers too quickly without careful consideration"
+            }
+        
+        for student, gap in (profile_gaps or {}).items():
+            gaps[student]['profile_gap'] = gap
+        
+        # Overall score, same formula as _calculate_overall_score
+        consistency_bonus = np.where(time_std < avg_time * 0.5, 0.05, 0)
+        num_gaps = np.array([len(student_gaps) for student_gaps in gaps])
+        overall_score = np.clip(accuracy - num_gaps * 0.1 + consistency_bonus, 0, 1)
+        
+        return {
+            str(student_id): {
+                'total_attempts': int(total_attempts[i]),
+                'correct_answers': int(correct_answers[i]),
+                'accuracy': accuracy[i],
+                'avg_time': avg_time[i],
+                'gaps': gaps[i],
+                'overall_score': overall_score[i],
+                'student_id': str(student_id)
+            }
+            for i, student_id in enumerate(student_ids)
+        }
     
+    def _timing_counts(self, student_codes: np.ndarray, times: np.ndarray, wrong: np.ndarray,
+                       avg_time: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        Slow and fast attempt counts per student, against the student's mean
+        time or time percentiles depending on the timing rule.
+        
+        Returns:
+            Tuple of (slow threshold seconds, slow attempts, slow wrong,
+            fast attempts, fast wrong), one entry per student
+        """
+        num_students = len(avg_time)
+        if self.timing_rule == 'percentile':
+            return self._percentile_timing(*self._timing_sketches(student_codes, times, wrong, num_students))
+        
+        def per_student(weights):
+            return np.bincount(student_codes, weights=weights, minlength=num_students)
+        
+        high_time_threshold = avg_time * self.confidence_time_multiplier
+        high_time = times > high_time_threshold[student_codes]
+        fast = times < (avg_time * self.speed_time_multiplier)[student_codes]
+        return (high_time_threshold, per_student(high_time), per_student(high_time & wrong),
+                per_student(fast), per_student(fast & wrong))
+    
+    @staticmethod
+    def _time_std(student_codes: np.ndarray, times: np.ndarray, avg_time: np.ndarray,
+                  total_attempts: np.ndarray) -> np.ndarray:
+        """Sample standard deviation of time per student (NaN for a single attempt)."""
+        squared = np.bincount(student_codes, weights=(times - avg_time[student_codes]) ** 2,
+                              minlength=len(avg_time))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.sqrt(squared / (total_attempts - 1))
+    
+    @traced('detector.detect_concept_gaps')
     def _detect_concept_gaps(self, student_df: pd.DataFrame) -> Dict:
         """Detect conceptual misunderstandings through repeated mistakes."""
         gaps = {}
@@ -75,7 +301,7 @@ class LearningGapDetector:
             topic_accuracy = (topic_data['Correct'] == 1).sum() / topic_attempts
             
             # Flag as concept gap if accuracy is low
-            if topic_accuracy < 0.6:
+            if topic_accuracy < self.concept_gap_threshold:
                 gaps[f'concept_gap_{topic.lower().replace(" ", "_")}'] = {
                     'severity': self._severity_from_accuracy(topic_accuracy),
                     'confidence': 1 - topic_accuracy,
@@ -85,50 +311,127 @@ class LearningGapDetector:
         
         return gaps
     
+    @traced('detector.detect_confidence_gaps')
     def _detect_confidence_gaps(self, student_df: pd.DataFrame) -> Dict:
         """Detect confidence issues through hesitation patterns."""
         gaps = {}
         
         # Analyze time patterns - too much time might indicate confusion
-        avg_time = student_df['Time_Taken'].mean()
-        high_time_attempts = student_df[student_df['Time_Taken'] > avg_time * 1.5]
-        
-        if len(high_time_attempts) > 0:
+        if self.timing_rule == 'percentile':
+            high_time_threshold, num_high_time, high_time_wrong, _, _ = self._student_percentile_timing(student_df)
+        else:
+            avg_time = student_df['Time_Taken'].mean()
+            high_time_threshold = avg_time * self.confidence_time_multiplier
+            high_time_attempts = student_df[student_df['Time_Taken'] > high_time_threshold]
+            num_high_time = len(high_time_attempts)
             high_time_wrong = (high_time_attempts['Correct'] == 0).sum()
-            high_time_ratio = high_time_wrong / len(high_time_attempts)
+        
+        if num_high_time > 0:
+            high_time_ratio = high_time_wrong / num_high_time
             
             if high_time_ratio > 0.5:
                 gaps['confidence_gap'] = {
                     'severity': 'medium' if high_time_ratio < 0.7 else 'high',
                     'confidence': high_time_ratio,
-                    'affected_questions': len(high_time_attempts),
-                    'description': f"Takes excessive time ({avg_time*1.5:.1f}s+) but still gets answers wrong"
+                    'affected_questions': num_high_time,
+                    'description': f"Takes excessive time ({high_time_threshold:.1f}s+) but still gets answers wrong"
                 }
         
         return gaps
     
+    @traced('detector.detect_speed_gaps')
     def _detect_speed_gaps(self, student_df: pd.DataFrame) -> Dict:
         """Detect speed-related gaps."""
         gaps = {}
         
         # Fast but wrong answers indicate rushing or lack of understanding
-        avg_time = student_df['Time_Taken'].mean()
-        fast_attempts = student_df[student_df['Time_Taken'] < avg_time * 0.5]
-        
-        if len(fast_attempts) > 2:
+        if self.timing_rule == 'percentile':
+            _, _, _, num_fast, fast_wrong = self._student_percentile_timing(student_df)
+        else:
+            avg_time = student_df['Time_Taken'].mean()
+            fast_attempts = student_df[student_df['Time_Taken'] < avg_time * self.speed_time_multiplier]
+            num_fast = len(fast_attempts)
             fast_wrong = (fast_attempts['Correct'] == 0).sum()
-            fast_ratio = fast_wrong / len(fast_attempts)
+        
+        if num_fast > 2:
+            fast_ratio = fast_wrong / num_fast
             
             if fast_ratio > 0.4:
                 gaps['speed_gap'] = {
                     'severity': 'medium',
                     'confidence': fast_ratio,
-                    'affected_questions': len(fast_attempts),
+                    'affected_questions': num_fast,
                     'description': "Answers too quickly without careful consideration"
                 }
         
         return gaps
     
+    def _topic_pace(self, attempts_df: pd.DataFrame, baselines: CohortBaselines) -> Dict[str, Dict]:
+        """
+        Per-student, per-topic timing z-scores and accuracy against cohort baselines.
+
+        Returns:
+            Student ID -> topic -> attempts, time_z, question_time_z,
+            accuracy and expected_accuracy (NaN z-scores become None)
+        """
+        if 'Topic' not in attempts_df.columns or 'Question_ID' not in attempts_df.columns:
+            return {}
+        pace = baselines.student_topic_pace(attempts_df)
+        pace = pace.astype(object).where(pace.notna(), None)
+        result: Dict[str, Dict] = {}
+        for row in pace.itertuples(index=False):
+            result.setdefault(row.Student_ID, {})[row.Topic] = {
+                'attempts': int(row.attempts),
+                'time_z': row.time_z,
+                'question_time_z': row.question_time_z,
+                'accuracy': row.accuracy,
+                'expected_accuracy': row.expected_accuracy,
+            }
+        return result
+
+    def _timing_sketches(self, student_codes: np.ndarray, times: np.ndarray, wrong: np.ndarray,
+                         num_students: int) -> Tuple[QuantileSketches, QuantileSketches]:
+        """Per-student sketches of all attempt times and of wrong attempts' times."""
+        time_sketch = QuantileSketches(num_students)
+        time_sketch.update(student_codes, times)
+        wrong_sketch = QuantileSketches(num_students)
+        wrong_sketch.update(student_codes[wrong], times[wrong])
+        return time_sketch, wrong_sketch
+
+    def _percentile_timing(self, time_sketch: QuantileSketches, wrong_sketch: QuantileSketches,
+                           keys: Optional[np.ndarray] = None) -> Tuple[np.ndarray, ...]:
+        """
+        Slow and fast attempt counts from time sketches (the 'percentile' timing rule).
+        Slow attempts fall in or above the bucket of the hesitation percentile,
+        fast ones in or below the bucket of the rushing percentile.
+
+        Args:
+            time_sketch: Per-student sketches of attempt times
+            wrong_sketch: Per-student sketches of wrong attempts' times
+            keys: Students to evaluate (all rows if None)
+
+        Returns:
+            Tuple of (slow threshold seconds, slow attempts, slow wrong,
+            fast attempts, fast wrong), one entry per student
+        """
+        slow_buckets = time_sketch.quantile_buckets(self.hesitation_percentile / 100, keys)
+        fast_buckets = time_sketch.quantile_buckets(self.rushing_percentile / 100, keys)
+        return (
+            time_sketch.quantile(self.hesitation_percentile / 100, keys),
+            time_sketch.count_at_or_above(slow_buckets, keys),
+            wrong_sketch.count_at_or_above(slow_buckets, keys),
+            time_sketch.count_at_or_below(fast_buckets, keys),
+            wrong_sketch.count_at_or_below(fast_buckets, keys),
+        )
+
+    def _student_percentile_timing(self, student_df: pd.DataFrame) -> Tuple:
+        """_percentile_timing for a single student's attempts."""
+        times = student_df['Time_Taken'].to_numpy(dtype=np.float64)
+        wrong = (student_df['Correct'] == 0).to_numpy()
+        timing = self._percentile_timing(*self._timing_sketches(
+            np.zeros(len(times), dtype=np.int64), times, wrong, 1))
+        return tuple(value[0].item() for value in timing)
+
     def _severity_from_accuracy(self, accuracy: float) -> str:
         """Convert accuracy to severity level."""
         if accuracy < 0.4:
@@ -0,0 +1,485 @@
+"""
+Incremental gap detection with checkpoint/restore.
+Keeps running per-student and per-(student, topic) statistics in NumPy
+arrays, updated as attempts arrive, so a long-lived process never rescans
+the attempt table. Checkpoints write the arrays as .npy files plus a
+manifest; restore memory-maps them and replays only the tail of an
+append-only event log written since the checkpoint. Each checkpoint starts
+a new log segment and deletes the segments it has fully applied, so the log
+only ever holds the attempts since the last checkpoint.
+With the 'percentile' timing rule, attempt times are kept as per-student
+quantile sketches (quantile_sketch.py) instead of raw per-attempt history.
+
+Usage:
+    detector = IncrementalDetector.restore('state/', log_path='state/events.jsonl')
+    detector.update(new_attempts_df)
+    analysis = detector.analyze('STU0001')
+    detector.checkpoint('state/')
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from gap_detector import LearningGapDetector
+from instrumentation import traced
+from quantile_sketch import QuantileSketches
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+MANIFEST = 'manifest.json'
+STATE_ARRAYS = ('student_stats', 'topic_attempts', 'topic_correct',
+                'time_offsets', 'attempt_times', 'attempt_wrong')
+# Kept instead of attempt times under the 'percentile' timing rule
+SKETCHES = ('time_sketch', 'wrong_sketch', 'topic_time_sketch')
+
+# Columns of student_stats
+ATTEMPTS, CORRECT, TIME_SUM, TIME_SQ_SUM = range(4)
+
+
+class EventLog:
+    """
+    Append-only JSON-lines log of applied attempts, split into numbered
+    segment files `<path>.<n>`. Positions are (segment, byte offset), so a
+    checkpoint records where replay starts; rotate() starts a new segment
+    and prune() deletes the ones before it.
+    """
+
+    def __init__(self, path: str, first_segment: int = 0):
+        """
+        Open the log for appending to its newest segment.
+
+        Args:
+            path: Log path; segments are written next to it as `<path>.<n>`
+            first_segment: Segment to start at if the log has none yet (keeps
+                numbering in line with a checkpoint taken against a moved log)
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        segments = self.segments()
+        self.segment = segments[-1] if segments else first_segment
+        self._file = open(self.segment_path(self.segment), 'ab')
+
+    def segment_path(self, segment: int) -> str:
+        """File holding one segment."""
+        return f'{self.path}.{segment:06d}'
+
+    def segments(self) -> List[int]:
+        """Numbers of the segment files on disk, oldest first."""
+        directory = os.path.dirname(self.path) or '.'
+        prefix = os.path.basename(self.path) + '.'
+        return sorted(
+            int(name[len(prefix):]) for name in os.listdir(directory)
+            if name.startswith(prefix) and name[len(prefix):].isdigit()
+        )
+
+    @property
+    def offset(self) -> int:
+        """Byte offset of the end of the current segment."""
+        return self._file.tell()
+
+    def rotate(self) -> int:
+        """
+        Start a new segment (unless the current one is still empty).
+
+        Returns:
+            Number of the segment new attempts are written to
+        """
+        if self.offset > 0:
+            self._file.close()
+            self.segment += 1
+            self._file = open(self.segment_path(self.segment), 'ab')
+        return self.segment
+
+    def prune(self, segment: int) -> None:
+        """Delete every segment before `segment`."""
+        for old in self.segments():
+            if old < segment:
+                os.remove(self.segment_path(old))
+
+    def append(self, student_ids: np.ndarray, topics: np.ndarray,
+               correct: np.ndarray, times: np.ndarray) -> None:
+        """Append attempts and flush them to the OS."""
+        lines = [
+            json.dumps([student_id, topic, int(is_correct), float(time_taken)]) + '\n'
+            for student_id, topic, is_correct, time_taken in zip(
+                student_ids.tolist(), topics.tolist(), correct.tolist(), times.tolist())
+        ]
+        self._file.write(''.join(lines).encode('utf-8'))
+        self._file.flush()
+
+    def read_from(self, segment: int = 0, offset: int = 0) -> List[list]:
+        """Events written at or after a byte offset of a segment, through the newest segment."""
+        events = []
+        for number in self.segments():
+            if number < segment:
+                continue
+            with open(self.segment_path(number), 'rb') as f:
+                if number == segment:
+                    f.seek(offset)
+                events.extend(json.loads(line) for line in f if line.strip())
+        return events
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class IncrementalDetector:
+    """
+    Running-statistics version of LearningGapDetector with the same results
+    as analyze_cohort(). Counts and sums live in dense per-student and
+    per-(student, topic) arrays. Confidence and speed gaps compare every
+    attempt's time to the student's current average, so each student's
+    times and wrong flags are also kept (9 bytes per attempt) as a CSR
+    array from the last checkpoint plus the attempts added since. Under
+    the 'percentile' timing rule they are replaced by fixed-size time
+    sketches per student (all and wrong attempts) and per topic.
+    """
+
+    def __init__(self, mode: Optional[str] = None, log: Optional[EventLog] = None,
+                 timing_rule: Optional[str] = None):
+        self.rules = LearningGapDetector(mode)
+        if timing_rule is not None:
+            # A restored state can only serve the timing rule it was built under
+            self.rules.timing_rule = timing_rule
+        self.mode = self.rules.mode
+        self.log = log
+
+        self.student_ids: List[str] = []
+        self.topics: List[str] = []
+        self._student_rows: Dict[str, int] = {}
+        self._topic_cols: Dict[str, int] = {}
+
+        self.student_stats = np.zeros((0, 4), dtype=np.float64)
+        self.topic_attempts = np.zeros((0, 0), dtype=np.int32)
+        self.topic_correct = np.zeros((0, 0), dtype=np.int32)
+        self.time_offsets = np.zeros(1, dtype=np.int64)
+        self.attempt_times = np.zeros(0, dtype=np.float64)
+        self.attempt_wrong = np.zeros(0, dtype=bool)
+        # Attempts since the CSR arrays were built, per student row
+        self._tail_times: Dict[int, List[float]] = {}
+        self._tail_wrong: Dict[int, List[bool]] = {}
+        self.events_applied = 0
+
+        self.time_sketch: Optional[QuantileSketches] = None
+        self.wrong_sketch: Optional[QuantileSketches] = None
+        self.topic_time_sketch: Optional[QuantileSketches] = None
+        if self.rules.timing_rule == 'percentile':
+            self.time_sketch = QuantileSketches()
+            self.wrong_sketch = QuantileSketches()
+            self.topic_time_sketch = QuantileSketches()
+
+    def __len__(self) -> int:
+        return len(self.student_ids)
+
+    @traced('incremental.update')
+    def update(self, attempts_df: pd.DataFrame) -> None:
+        """
+        Apply new attempts (logged first when an event log is attached).
+
+        Args:
+            attempts_df: DataFrame with Student_ID, Topic, Correct and Time_Taken
+        """
+        student_ids = attempts_df['Student_ID'].astype(str).to_numpy()
+        # Missing topics stay None (logged as null): they count for the student, not for a topic
+        topics = attempts_df['Topic'].astype(object)
+        topics = topics.map(str, na_action='ignore').where(topics.notna(), None).to_numpy()
+        correct = (attempts_df['Correct'] == 1).to_numpy()
+        times = attempts_df['Time_Taken'].to_numpy(dtype=np.float64)
+        if self.log is not None:
+            self.log.append(student_ids, topics, correct, times)
+        self._apply(student_ids, topics, correct, times)
+
+    def analyze(self, student_id: str) -> Dict:
+        """
+        Analysis of one student in the LearningGapDetector.analyze_student format.
+
+        Args:
+            student_id: Student to analyze
+
+        Returns:
+            Dictionary with detected gaps and metrics
+        """
+        row = self._student_rows.get(str(student_id))
+        if row is None:
+            return self.rules._empty_analysis()
+
+        rules = self.rules
+        total, correct, time_sum, time_sq_sum = self.student_stats[row]
+        avg_time = time_sum / total
+
+        # Slow and fast attempts, against the student's mean or time percentiles
+        if self.time_sketch is not None:
+            timing = rules._percentile_timing(self.time_sketch, self.wrong_sketch, keys=[row])
+            with np.errstate(invalid='ignore'):
+                time_std = np.sqrt((time_sq_sum - total * avg_time ** 2) / (total - 1)) if total > 1 else np.nan
+            time_std = np.array([time_std])
+        else:
+            times, wrong = self._student_times(row)
+            student_codes = np.zeros(len(times), dtype=np.int64)
+            timing = rules._timing_counts(student_codes, times, wrong, np.array([avg_time]))
+            time_std = rules._time_std(student_codes, times, np.array([avg_time]), np.array([total]))
+
+        # Topics in order of first appearance
+        cols = np.flatnonzero(self.topic_attempts[row, :len(self.topics)] > 0)
+        return rules._analyses_from_totals(
+            [self.student_ids[row]], np.array([total]), np.array([correct]), np.array([time_sum]), time_std,
+            np.zeros(len(cols), dtype=np.int64), np.array([self.topics[col] for col in cols], dtype=object),
+            self.topic_attempts[row, cols], self.topic_correct[row, cols], timing,
+        )[self.student_ids[row]]
+
+    def topic_time_quantile(self, topic: str, q: float) -> Optional[float]:
+        """
+        Cohort-wide q-quantile of attempt time on a topic ('percentile' rule only).
+
+        Args:
+            topic: Topic name
+            q: Quantile in [0, 1]
+
+        Returns:
+            Seconds, or None if the topic has no attempts
+        """
+        col = self._topic_cols.get(str(topic))
+        if self.topic_time_sketch is None or col is None or col >= len(self.topic_time_sketch):
+            return None
+        value = self.topic_time_sketch.quantile(q, keys=[col])[0]
+        return None if np.isnan(value) else float(value)
+
+    def cohort_time_quantile(self, q: float) -> Optional[float]:
+        """Cohort-wide q-quantile of attempt time ('percentile' rule only; None if empty)."""
+        if self.time_sketch is None or len(self.time_sketch) == 0:
+            return None
+        value = self.time_sketch.combined().quantile(q)[0]
+        return None if np.isnan(value) else float(value)
+
+    def analyze_all(self) -> Dict[str, Dict]:
+        """Analyses of every tracked student."""
+        self._compact()
+        return {student_id: self.analyze(student_id) for student_id in self.student_ids}
+
+    @traced('incremental.checkpoint')
+    def checkpoint(self, directory: str) -> None:
+        """
+        Snapshot the running statistics to a directory.
+        Files are written to a temporary directory and swapped in, so a
+        crash mid-checkpoint leaves the previous snapshot intact. The event
+        log moves to a new segment first; once the snapshot is in place the
+        segments before it are deleted.
+
+        Args:
+            directory: Snapshot directory (created if missing)
+        """
+        self._compact()
+        log_segment = self.log.rotate() if self.log else None
+        tmp_dir = directory.rstrip(os.sep) + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in STATE_ARRAYS:
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), getattr(self, name))
+        if self.time_sketch is not None:
+            for name in SKETCHES:
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), getattr(self, name).counts)
+        manifest = {
+            'mode': self.mode,
+            'timing_rule': self.rules.timing_rule,
+            'student_ids': self.student_ids,
+            'topics': self.topics,
+            'events_applied': self.events_applied,
+            'log_path': os.path.abspath(self.log.path) if self.log else None,
+            'log_segment': log_segment,
+            'log_offset': 0 if self.log else None,
+            'sketch': None if self.time_sketch is None else {
+                'relative_accuracy': self.time_sketch.relative_accuracy,
+                'min_value': self.time_sketch.min_value,
+                'max_value': self.time_sketch.max_value,
+            },
+        }
+        with open(os.path.join(tmp_dir, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+        old_dir = directory.rstrip(os.sep) + '.old'
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(directory):
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if self.log is not None:
+            self.log.prune(log_segment)
+
+    @classmethod
+    @traced('incremental.restore')
+    def restore(cls, directory: str, log_path: Optional[str] = None,
+                mode: Optional[str] = None) -> 'IncrementalDetector':
+        """
+        Rebuild a detector from a checkpoint and the event log tail.
+        Arrays are memory-mapped copy-on-write, so restoring does not read
+        the snapshot up front; only events logged after the checkpoint are
+        replayed, from the (segment, offset) it recorded. The log may have
+        moved since: its position does not depend on the path. If a crash
+        interrupted checkpoint() while it swapped directories, the previous
+        snapshot is read from `<directory>.old`. The detector keeps the
+        snapshot's timing rule even if config now names another, since raw
+        times and sketches are not interchangeable.
+
+        Args:
+            directory: Snapshot directory (a fresh detector if neither it nor
+                `<directory>.old` holds a snapshot)
+            log_path: Event log to replay and keep appending to
+            mode: Detection mode for a fresh detector
+
+        Returns:
+            IncrementalDetector with the restored state
+        """
+        manifest_path = os.path.join(directory, MANIFEST)
+        if not os.path.exists(manifest_path):
+            # checkpoint() moves the snapshot to .old just before swapping in the new one
+            directory = directory.rstrip(os.sep) + '.old'
+            manifest_path = os.path.join(directory, MANIFEST)
+        if not os.path.exists(manifest_path):
+            log = EventLog(log_path) if log_path else None
+            detector = cls(mode, log)
+            if log is not None:
+                detector._replay(log.read_from())
+            return detector
+
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        # A snapshot taken without a log has applied none of the one given now
+        log_segment, log_offset = manifest['log_segment'] or 0, manifest['log_offset'] or 0
+        log = EventLog(log_path, first_segment=log_segment) if log_path else None
+        detector = cls(manifest['mode'], log, manifest['timing_rule'])
+        for name in STATE_ARRAYS:
+            setattr(detector, name, np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='c'))
+        detector.student_ids = list(manifest['student_ids'])
+        detector.topics = list(manifest['topics'])
+        detector._student_rows = {student_id: i for i, student_id in enumerate(detector.student_ids)}
+        detector._topic_cols = {topic: i for i, topic in enumerate(detector.topics)}
+        detector.events_applied = manifest['events_applied']
+        if manifest['sketch'] is not None:
+            for name in SKETCHES:
+                counts = np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='c')
+                setattr(detector, name, QuantileSketches.from_counts(counts, **manifest['sketch']))
+
+        if log is not None:
+            detector._replay(log.read_from(log_segment, log_offset))
+        return detector
+
+    def _replay(self, events: List[list]) -> None:
+        """Apply logged events without logging them again."""
+        if not events:
+            return
+        student_ids, topics, correct, times = zip(*events)
+        self._apply(np.array(student_ids, dtype=object), np.array(topics, dtype=object),
+                    np.array(correct, dtype=bool), np.array(times, dtype=np.float64))
+
+    def _apply(self, student_ids: np.ndarray, topics: np.ndarray,
+               correct: np.ndarray, times: np.ndarray) -> None:
+        """Add attempts to the running statistics."""
+        if len(student_ids) == 0:
+            return
+        rows = self._codes(student_ids, self.student_ids, self._student_rows)
+        known = np.array([topic is not None for topic in topics], dtype=bool)
+        topic_rows = rows[known]
+        cols = self._codes(topics[known], self.topics, self._topic_cols)
+        self._grow()
+
+        np.add.at(self.student_stats, (rows, ATTEMPTS), 1)
+        np.add.at(self.student_stats, (rows, CORRECT), correct)
+        np.add.at(self.student_stats, (rows, TIME_SUM), times)
+        np.add.at(self.student_stats, (rows, TIME_SQ_SUM), times ** 2)
+        np.add.at(self.topic_attempts, (topic_rows, cols), 1)
+        np.add.at(self.topic_correct, (topic_rows, cols), correct[known])
+        self.events_applied += len(rows)
+
+        if self.time_sketch is not None:
+            wrong = ~correct
+            self.time_sketch.resize(len(self.student_ids))
+            self.wrong_sketch.resize(len(self.student_ids))
+            self.topic_time_sketch.resize(len(self.topics))
+            self.time_sketch.update(rows, times)
+            self.wrong_sketch.update(rows[wrong], times[wrong])
+            self.topic_time_sketch.update(cols, times[known])
+            return
+
+        order = np.argsort(rows, kind='stable')
+        unique_rows, starts = np.unique(rows[order], return_index=True)
+        wrong = ~correct
+        for row, positions in zip(unique_rows.tolist(), np.split(order, starts[1:])):
+            self._tail_times.setdefault(row, []).extend(times[positions].tolist())
+            self._tail_wrong.setdefault(row, []).extend(wrong[positions].tolist())
+
+    def _student_times(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Times and wrong flags of every attempt of one student."""
+        if row + 1 < len(self.time_offsets):
+            start, end = self.time_offsets[row], self.time_offsets[row + 1]
+            times, wrong = self.attempt_times[start:end], self.attempt_wrong[start:end]
+        else:
+            times, wrong = self.attempt_times[:0], self.attempt_wrong[:0]
+        if row in self._tail_times:
+            times = np.concatenate((times, self._tail_times[row]))
+            wrong = np.concatenate((wrong, self._tail_wrong[row]))
+        return times, wrong
+
+    def _compact(self) -> None:
+        """Merge attempts added since the last checkpoint into the CSR arrays."""
+        if not self._tail_times:
+            return
+        num_base = len(self.time_offsets) - 1
+        base_counts = np.zeros(len(self.student_ids), dtype=np.int64)
+        base_counts[:num_base] = np.diff(self.time_offsets)
+        tail_counts = np.zeros(len(self.student_ids), dtype=np.int64)
+        for row, tail in self._tail_times.items():
+            tail_counts[row] = len(tail)
+        offsets = np.concatenate(([0], np.cumsum(base_counts + tail_counts)))
+
+        times = np.empty(offsets[-1], dtype=np.float64)
+        wrong = np.empty(offsets[-1], dtype=bool)
+        # Existing attempts keep their position at the start of each student's segment
+        base_rows = np.repeat(np.arange(num_base), base_counts[:num_base])
+        base_dest = offsets[base_rows] + np.arange(len(base_rows)) - self.time_offsets[base_rows]
+        times[base_dest] = self.attempt_times
+        wrong[base_dest] = self.attempt_wrong
+        for row, tail in self._tail_times.items():
+            start = offsets[row] + base_counts[row]
+            times[start:start + len(tail)] = tail
+            wrong[start:start + len(tail)] = self._tail_wrong[row]
+
+        self.time_offsets, self.attempt_times, self.attempt_wrong = offsets, times, wrong
+        self._tail_times.clear()
+        self._tail_wrong.clear()
+
+    @staticmethod
+    def _codes(values: Iterable[str], names: List[str], positions: Dict[str, int]) -> np.ndarray:
+        """Map values to row/column positions, registering unseen ones."""
+        codes = []
+        for value in values:
+            code = positions.get(value)
+            if code is None:
+                code = positions[value] = len(names)
+                names.append(value)
+            codes.append(code)
+        return np.array(codes, dtype=np.int64)
+
+    def _grow(self) -> None:
+        """Extend the statistics arrays to cover newly registered students/topics."""
+        num_students, num_topics = len(self.student_ids), len(self.topics)
+        if num_students == len(self.student_stats) and num_topics == self.topic_attempts.shape[1]:
+            return
+
+        def grown(array: np.ndarray, cols: int) -> np.ndarray:
+            result = np.zeros((num_students, cols), dtype=array.dtype)
+            result[:array.shape[0], :array.shape[1]] = array
+            return result
+
+        self.student_stats = grown(self.student_stats, self.student_stats.shape[1])
+        self.topic_attempts = grown(self.topic_attempts, num_topics)
+        self.topic_correct = grown(self.topic_correct, num_topics)
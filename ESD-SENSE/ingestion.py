@@ -0,0 +1,425 @@
+"""
+Streaming ingestion of attempt events.
+Producers (a local TCP socket, tailed files, in-process callers) put JSON
+attempt events on one bounded asyncio queue; a full queue makes producers
+wait, which pushes back on the socket and the file readers. A consumer
+groups events into micro-batches by size or age, drops rows failing the
+DataValidator rules and applies each batch to an IncrementalDetector and,
+optionally, the local result store (which records the gap change feed) and
+the student groups (StudentClusters.update, a partial_fit per batch).
+
+Events are JSON objects with Student_ID, Question_ID, Topic, Correct and
+Time_Taken (optionally Timestamp and Attempt_Number), one per line on the
+socket and in tailed files.
+
+Usage:
+    python ingestion.py --port 8766 --tail incoming.jsonl --state ingest_state --groups 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import config
+import instrumentation
+from incremental import IncrementalDetector
+from utils import DataValidator
+
+if TYPE_CHECKING:
+    from clustering import StudentClusters
+    from result_store import AnalysisStore
+
+
+ATTEMPT_FIELDS = ['Student_ID', 'Question_ID', 'Topic', 'Correct', 'Time_Taken',
+                  'Timestamp', 'Attempt_Number']
+
+
+class IngestionPipeline:
+    """
+    Bounded queue plus micro-batching consumer feeding the detector and store.
+    Batches are applied on a single worker thread, so the detector and the
+    SQLite connection are never used concurrently and the event loop stays
+    free to accept events while a batch is processed. Student groups are
+    refreshed with every batch when a StudentClusters is given.
+    """
+
+    def __init__(self, detector: IncrementalDetector,
+                 store: Optional[AnalysisStore] = None,
+                 max_queue: Optional[int] = None,
+                 max_batch_size: Optional[int] = None,
+                 max_batch_wait_ms: Optional[float] = None,
+                 clusters: Optional[StudentClusters] = None):
+        settings = config.INGESTION
+        self.detector = detector
+        self.store = store
+        self.clusters = clusters
+        self.max_queue = max_queue or settings['max_queue']
+        self.max_batch_size = max_batch_size or settings['max_batch_size']
+        wait_ms = max_batch_wait_ms if max_batch_wait_ms is not None else settings['max_batch_wait_ms']
+        self.max_batch_wait = wait_ms / 1000
+
+        self.queue: Optional[asyncio.Queue] = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='edu-sense-ingest')
+        self._consumer: Optional[asyncio.Task] = None
+        self._engine = None
+        # Applied batches the store has not accepted yet (retried with the next batch)
+        self._unstored: List = []
+
+        # Metrics
+        self.received = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.group_failures = 0
+        self.store_failures = 0
+        self.last_error: Optional[str] = None
+        self.group_sizes: Optional[List[int]] = None
+        self.max_queue_depth = 0
+        self.latencies: deque = deque(maxlen=settings['latency_samples'])
+
+    async def start(self) -> None:
+        """Create the queue and start the batching consumer."""
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._consumer = asyncio.create_task(self._consume(), name='edu-sense-ingest-consumer')
+
+    async def stop(self) -> None:
+        """Apply everything already queued, then stop the consumer."""
+        try:
+            # A consumer that already died would never take the stop marker off a full queue
+            if not self._consumer.done():
+                await self.queue.put(None)
+            await self._consumer
+        finally:
+            self.executor.shutdown(wait=True)
+
+    async def put(self, event: Dict) -> None:
+        """
+        Queue one attempt event, waiting while the queue is full.
+
+        Args:
+            event: Attempt fields (see module docstring)
+        """
+        self.received += 1
+        if not isinstance(event, dict):
+            self.rejected += 1
+            return
+        await self.queue.put((time.perf_counter(), event))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    async def put_many(self, events: Iterable[Dict]) -> None:
+        """Queue several events in order."""
+        for event in events:
+            await self.put(event)
+
+    async def put_line(self, line: bytes) -> None:
+        """Queue one JSON-lines record (malformed lines are counted as rejected)."""
+        if not line.strip():
+            return
+        try:
+            event = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self.received += 1
+            self.rejected += 1
+            return
+        await self.put(event)
+
+    async def serve_socket(self, host: str, port: int) -> asyncio.AbstractServer:
+        """
+        Accept newline-delimited JSON events over TCP.
+        Reading pauses while the queue is full, so TCP flow control slows
+        the sender down.
+
+        Args:
+            host: Interface to bind
+            port: TCP port (0 picks a free port)
+
+        Returns:
+            The running asyncio server
+        """
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                while line := await reader.readline():
+                    await self.put_line(line)
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+    async def tail_file(self, path: str, from_start: bool = False,
+                        poll_seconds: Optional[float] = None) -> None:
+        """
+        Follow a JSON-lines file, queueing lines as they are appended.
+        Runs until cancelled; a partially written last line waits for its newline.
+
+        Args:
+            path: File to follow (it may not exist yet)
+            from_start: Also queue lines already in the file
+            poll_seconds: Sleep between checks for new data
+        """
+        poll_seconds = poll_seconds or config.INGESTION['tail_poll_seconds']
+        while not os.path.exists(path):
+            await asyncio.sleep(poll_seconds)
+
+        with open(path, 'rb') as f:
+            if not from_start:
+                f.seek(0, os.SEEK_END)
+            partial = b''
+            while True:
+                chunk = f.readline()
+                if not chunk:
+                    await asyncio.sleep(poll_seconds)
+                    continue
+                partial += chunk
+                if partial.endswith(b'\n'):
+                    await self.put_line(partial)
+                    partial = b''
+
+    async def checkpoint(self, directory: str) -> None:
+        """Checkpoint the detector on the batch thread (between batches)."""
+        await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.detector.checkpoint, directory)
+
+    def metrics(self) -> Dict:
+        """
+        Queue depth, throughput counters and end-to-end latency.
+
+        Returns:
+            Dictionary of counters; latencies are from queueing an event to its
+            batch being applied, over the most recent events
+        """
+        latencies = np.array(self.latencies) * 1000
+        percentiles = np.percentile(latencies, [50, 95, 99]) if len(latencies) else [0.0] * 3
+        return {
+            'queue_depth': self.queue.qsize() if self.queue is not None else 0,
+            'max_queue_depth': self.max_queue_depth,
+            'queue_capacity': self.max_queue,
+            'received': self.received,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'failed_batches': self.failed_batches,
+            'group_failures': self.group_failures,
+            'store_failures': self.store_failures,
+            'unstored_attempts': sum(len(frame) for frame in self._unstored),
+            'last_error': self.last_error,
+            'mean_batch_size': self.accepted / self.batches if self.batches else 0.0,
+            'students': len(self.detector),
+            'group_sizes': self.group_sizes,
+            'latency_p50_ms': float(percentiles[0]),
+            'latency_p95_ms': float(percentiles[1]),
+            'latency_p99_ms': float(percentiles[2]),
+        }
+
+    async def _consume(self) -> None:
+        """Collect micro-batches and apply them until the stop marker arrives."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_batch_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self.queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                accepted, rejected = await loop.run_in_executor(
+                    self.executor, self._apply, [event for _, event in batch])
+            except Exception as e:
+                # A batch that cannot be applied is rejected; the consumer keeps going
+                accepted, rejected = 0, len(batch)
+                self.failed_batches += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            applied = time.perf_counter()
+            self.batches += 1
+            self.accepted += accepted
+            self.rejected += rejected
+            for received, _ in batch:
+                self.latencies.append(applied - received)
+                if instrumentation.is_enabled():
+                    instrumentation.record('ingestion.end_to_end', applied - received)
+
+    @instrumentation.traced('ingestion.apply_batch')
+    def _apply(self, events: List[Dict]) -> Tuple[int, int]:
+        """Validate a batch and apply the valid rows (runs on the batch thread)."""
+        import pandas as pd
+
+        frame = pd.DataFrame.from_records(events, columns=ATTEMPT_FIELDS)
+        frame = frame[DataValidator.valid_rows(frame)]
+        rejected = len(events) - len(frame)
+        if len(frame) == 0:
+            return 0, rejected
+
+        frame = frame.astype({'Student_ID': str, 'Question_ID': str, 'Topic': str})
+        frame['Correct'] = frame['Correct'].astype(np.int8)
+        frame['Time_Taken'] = pd.to_numeric(frame['Time_Taken'])
+        # Events may carry different UTC offsets; normalize them all to UTC
+        frame['Timestamp'] = pd.to_datetime(frame['Timestamp'], errors='coerce', format='mixed', utc=True)
+
+        self.detector.update(frame)
+        # The detector has applied (and logged) the batch, so it counts as accepted from
+        # here; a failing group refresh or store write is recorded on its own instead
+        if self.clusters is not None:
+            try:
+                self.clusters.update(frame)
+            except Exception as e:
+                self.group_failures += 1
+                self.last_error = f"groups: {type(e).__name__}: {e}"
+            if self.clusters.is_fitted:
+                self.group_sizes = self.clusters.labels.value_counts().reindex(
+                    range(self.clusters.n_clusters), fill_value=0).tolist()
+        if self.store is not None:
+            # Batches the store missed are retried, so it catches up with the detector
+            # (stored attempts are deduplicated, so a partly written batch is safe to resend)
+            pending = self._unstored + [frame]
+            try:
+                self._store_batch(pd.concat(pending, ignore_index=True))
+                self._unstored = []
+            except Exception as e:
+                self._unstored = pending
+                self.store_failures += 1
+                self.last_error = f"store: {type(e).__name__}: {e}"
+        return len(frame), rejected
+
+    def _store_batch(self, frame) -> None:
+        """Persist attempts and the touched students' new results."""
+        from edu_sense import analysis_record
+        from recommendation_engine import RecommendationEngine
+
+        if self._engine is None:
+            self._engine = RecommendationEngine()
+        self.store.add_attempts(frame)
+        students = frame['Student_ID'].unique().tolist()
+        records = []
+        for student_id in students:
+            analysis = self.detector.analyze(student_id)
+            records.append(analysis_record(student_id, analysis,
+                                           self._engine.generate_recommendations(analysis),
+                                           self.detector.mode))
+        self.store.save_results(records, self.store.watermarks(students), self.detector.mode)
+
+
+async def _checkpoint_periodically(pipeline: IngestionPipeline, directory: str, seconds: float,
+                                   quiet: bool) -> None:
+    while True:
+        await asyncio.sleep(seconds)
+        await pipeline.checkpoint(directory)
+        if not quiet:
+            print(f"checkpoint: {json.dumps(pipeline.metrics())}", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    settings = config.INGESTION
+    parser = argparse.ArgumentParser(description="EDU-SENSE streaming attempt ingestion")
+    parser.add_argument('--host', default=settings['host'], help="Interface for the event socket")
+    parser.add_argument('--port', type=int, default=settings['port'],
+                        help="TCP port for JSON-lines events (-1 disables the socket)")
+    parser.add_argument('--tail', action='append', default=[], metavar='JSONL',
+                        help="Follow a JSON-lines file (repeatable)")
+    parser.add_argument('--from-start', action='store_true', help="Also ingest lines already in tailed files")
+    parser.add_argument('--state', default=settings['state_dir'], help="Checkpoint directory")
+    parser.add_argument('--log', default=settings['event_log'],
+                        help="Event log replayed after the checkpoint, written as <LOG>.<n> segments (kept outside --state)")
+    parser.add_argument('--store', metavar='DB',
+                        help="Also persist attempts/results (needs PRIVACY store_results_locally)")
+    parser.add_argument('--mode', choices=['standard', 'early_detection', 'conservative'],
+                        default=config.DETECTION_MODE, help="Detection mode for a fresh state")
+    parser.add_argument('--groups', type=int, metavar='N',
+                        help="Keep N student groups updated with every batch (needs scikit-learn; "
+                             "seeded from --store, else built from the events received)")
+    parser.add_argument('--quiet', action='store_true', help="Only print errors")
+    args = parser.parse_args(argv)
+
+    if args.groups is not None:
+        try:
+            import sklearn  # noqa: F401
+        except ImportError as e:
+            print(f"error: --groups needs scikit-learn ({e})", file=sys.stderr)
+            return 1
+
+    store = None
+    if args.store:
+        from result_store import open_store
+        store = open_store(args.store)
+        if store is None:
+            print("error: --store needs config.PRIVACY['store_results_locally'] = True", file=sys.stderr)
+            return 1
+
+    detector = IncrementalDetector.restore(args.state, log_path=args.log, mode=args.mode)
+    if not args.quiet:
+        print(f"Restored {len(detector):,} students ({detector.events_applied:,} events)", file=sys.stderr)
+
+    clusters = None
+    if args.groups is not None:
+        from clustering import StudentClusters
+        clusters = StudentClusters(args.groups)
+        if store is not None:
+            clusters.fit(store.load_attempts())
+            if not args.quiet:
+                print(f"Grouped {len(clusters):,} stored students into {args.groups} groups", file=sys.stderr)
+
+    async def run():
+        pipeline = IngestionPipeline(detector, store, clusters=clusters)
+        await pipeline.start()
+        tasks = [asyncio.create_task(pipeline.tail_file(path, args.from_start)) for path in args.tail]
+        tasks.append(asyncio.create_task(
+            _checkpoint_periodically(pipeline, args.state, settings['checkpoint_seconds'], args.quiet)))
+        server = None
+        if args.port >= 0:
+            server = await pipeline.serve_socket(args.host, args.port)
+            if not args.quiet:
+                print(f"Accepting events on {args.host}:{args.port}", file=sys.stderr)
+        try:
+            # The consumer is gathered too, so if it dies the process ends instead of blocking producers
+            await asyncio.gather(*tasks, pipeline._consumer)
+        finally:
+            if server is not None:
+                server.close()
+            for task in tasks:
+                task.cancel()
+            try:
+                await pipeline.stop()
+            finally:
+                detector.checkpoint(args.state)
+                if not args.quiet:
+                    print(f"final: {json.dumps(pipeline.metrics())}", file=sys.stderr)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store is not None:
+            store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+Lightweight, toggleable timing instrumentation for EDU-SENSE hot paths.
+Spans record wall time per named stage into bounded per-stage sample
+buffers; summaries give count, total and p50/p95/p99 and can be exported
+as JSON or Prometheus text. When disabled (the default) a span costs one
+flag check.
+
+Usage:
+    import instrumentation
+    instrumentation.enable()
+
+    @instrumentation.traced('detector.analyze_student')
+    def analyze_student(...): ...
+
+    with instrumentation.span('loader.read_csv'):
+        ...
+
+    print(instrumentation.to_prometheus())
+"""
+
+import functools
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Optional
+
+import config
+
+
+_settings = config.INSTRUMENTATION
+_enabled = _settings['enabled']
+_lock = threading.Lock()
+_samples: Dict[str, Deque[float]] = {}
+_counts: Dict[str, int] = {}
+_totals: Dict[str, float] = {}
+
+
+def enable() -> None:
+    """Start recording spans."""
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop recording spans (recorded data is kept)."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Whether spans are currently recorded."""
+    return _enabled
+
+
+def reset() -> None:
+    """Drop all recorded samples."""
+    with _lock:
+        _samples.clear()
+        _counts.clear()
+        _totals.clear()
+
+
+def record(name: str, seconds: float) -> None:
+    """
+    Record one duration for a stage.
+
+    Args:
+        name: Stage name (e.g. 'detector.analyze_student')
+        seconds: Measured wall time
+    """
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=_settings['max_samples'])
+            _counts[name] = 0
+            _totals[name] = 0.0
+        samples.append(seconds)
+        _counts[name] += 1
+        _totals[name] += seconds
+
+
+@contextmanager
+def _timed(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+@contextmanager
+def _noop():
+    yield
+
+
+def span(name: str):
+    """
+    Context manager timing the enclosed block as stage `name`.
+    Returns a no-op context when instrumentation is disabled.
+    """
+    if not _enabled:
+        return _noop()
+    return _timed(name)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorator timing every call of a function as a stage.
+
+    Args:
+        name: Stage name (defaults to module.qualname of the function)
+    """
+    def decorator(func: Callable) -> Callable:
+        stage = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def _percentile(ordered, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    rank = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summary() -> Dict[str, Dict]:
+    """
+    Per-stage statistics (percentiles over the retained samples).
+
+    Returns:
+        Dictionary mapping stage name to count, total_seconds, mean_seconds,
+        p50/p95/p99 and max in seconds
+    """
+    with _lock:
+        snapshot = {name: (sorted(samples), _counts[name], _totals[name])
+                    for name, samples in _samples.items()}
+
+    return {
+        name: {
+            'count': count,
+            'total_seconds': total,
+            'mean_seconds': total / count if count else 0.0,
+            'p50_seconds': _percentile(ordered, 0.50),
+            'p95_seconds': _percentile(ordered, 0.95),
+            'p99_seconds': _percentile(ordered, 0.99),
+            'max_seconds': ordered[-1],
+        }
+        for name, (ordered, count, total) in sorted(snapshot.items())
+        if ordered
+    }
+
+
+def to_json(indent: Optional[int] = 2) -> str:
+    """Summary as a JSON document."""
+    return json.dumps({'enabled': _enabled, 'stages': summary()}, indent=indent)
+
+
+def to_prometheus(metric: str = 'edu_sense_stage_seconds') -> str:
+    """
+    Summary in the Prometheus text exposition format (summary metric).
+
+    Args:
+        metric: Metric name
+
+    Returns:
+        Text with quantile, _sum and _count series per stage
+    """
+    lines = [
+        f"# HELP {metric} Wall time of instrumented EDU-SENSE stages",
+        f"# TYPE {metric} summary",
+    ]
+    for name, stats in summary().items():
+        label = name.replace('\\', '\\\\').replace('"', '\\"')
+        for quantile, key in (('0.5', 'p50_seconds'), ('0.95', 'p95_seconds'), ('0.99', 'p99_seconds')):
+            lines.append(f'{metric}{{stage="{label}",quantile="{quantile}"}} {stats[key]:.9f}')
+        lines.append(f'{metric}_sum{{stage="{label}"}} {stats["total_seconds"]:.9f}')
+        lines.append(f'{metric}_count{{stage="{label}"}} {stats["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path: str) -> None:
+    """Write the Prometheus text export to a file (e.g. for node_exporter's textfile collector)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(to_prometheus())
@@ -0,0 +1,254 @@
+"""
+Memory profiling of the EDU-SENSE pipeline, stage by stage.
+Runs load -> index -> detect -> recommend -> report under tracemalloc while
+a background thread samples process RSS, and reports per stage the peak
+and retained bytes, the RSS high-water mark, the top allocation sites and
+bytes per attempt / per student. Arrow buffers (Parquet/IPC reads) are
+invisible to tracemalloc; the RSS columns cover them.
+
+Usage:
+    python memory_profile.py --size 1e6
+    python memory_profile.py --path attempts.parquet
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import threading
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import config
+
+
+PIPELINE_STAGES = ('load', 'index', 'detect', 'recommend', 'report')
+
+
+def _rss_reader() -> Optional[Callable[[], int]]:
+    """Return a function giving current RSS in bytes (None if unsupported)."""
+    try:
+        import psutil
+        process = psutil.Process()
+        return lambda: process.memory_info().rss
+    except ImportError:
+        pass
+    if os.path.exists('/proc/self/statm'):
+        page_size = os.sysconf('SC_PAGE_SIZE')
+
+        def read_statm() -> int:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * page_size
+        return read_statm
+    return None
+
+
+class RSSSampler:
+    """Samples process RSS on a background thread to catch short-lived peaks."""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or config.MEMORY_PROFILE['rss_sample_interval']
+        self._read = _rss_reader()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.peak = 0
+
+    @property
+    def available(self) -> bool:
+        return self._read is not None
+
+    def current(self) -> Optional[int]:
+        """Current RSS in bytes (None if RSS cannot be read on this platform)."""
+        return self._read() if self._read else None
+
+    def __enter__(self) -> 'RSSSampler':
+        if self._read:
+            self.peak = self._read()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name='edu-sense-rss-sampler')
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, self._read())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._read())
+
+
+def _top_allocations(after: tracemalloc.Snapshot, before: tracemalloc.Snapshot,
+                     limit: int) -> List[Dict]:
+    """Largest allocation growth between two snapshots, by source line."""
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, threading.__file__),
+    ]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+    return [
+        {
+            'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'size_bytes': stat.size_diff,
+            'count': stat.count_diff,
+        }
+        for stat in stats[:limit]
+        if stat.size_diff > 0
+    ]
+
+
+def profile_pipeline(path: Optional[str] = None,
+                     size: Optional[int] = None,
+                     top_n: Optional[int] = None,
+                     verbose: bool = False) -> Dict:
+    """
+    Profile memory of each pipeline stage.
+
+    Args:
+        path: Attempts file to load (a generated dataset of `size` is written
+            to a temporary Parquet file when None)
+        size: Attempts to generate when no path is given
+        top_n: Allocation sites reported per stage
+        verbose: Print a report table
+
+    Returns:
+        Dictionary with 'attempts', 'students', 'rss_available' and 'stages'
+        (stage name -> measurements)
+    """
+    from attempt_index import AttemptIndex
+    from data_loader import load_attempts
+    from gap_detector import LearningGapDetector
+    from recommendation_engine import RecommendationEngine
+    from utils import ReportGenerator
+
+    settings = config.MEMORY_PROFILE
+    top_n = top_n or settings['top_allocations']
+
+    temp_dir = None
+    if path is None:
+        from data_generator import generate_large_dataset
+        temp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(temp_dir.name, 'attempts.parquet')
+        generate_large_dataset(size or config.BENCHMARK['sizes'][0]).to_parquet(path, index=False)
+        gc.collect()
+
+    detector = LearningGapDetector()
+    engine = RecommendationEngine()
+    state: Dict = {}
+
+    def run_report():
+        return [
+            ReportGenerator.generate_csv_export(analysis)
+            for analysis in state['analyses'].values()
+        ]
+
+    stage_functions = {
+        'load': lambda: state.update(data=load_attempts(path, use_cache=False)),
+        'index': lambda: state.update(index=AttemptIndex(state['data'])),
+        'detect': lambda: state.update(analyses=detector.analyze_cohort(state['data'])),
+        'recommend': lambda: state.update(recommendations={
+            student_id: engine.generate_recommendations(analysis)
+            for student_id, analysis in state['analyses'].items()
+        }),
+        'report': lambda: state.update(reports=run_report()),
+    }
+
+    sampler = RSSSampler()
+    stages = {}
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        for name in PIPELINE_STAGES:
+            gc.collect()
+            before = tracemalloc.take_snapshot()
+            traced_before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            rss_before = sampler.current()
+
+            with sampler:
+                stage_functions[name]()
+            gc.collect()
+
+            traced_after, traced_peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            stages[name] = {
+                'peak_bytes': traced_peak - traced_before,
+                'retained_bytes': traced_after - traced_before,
+                'rss_before_bytes': rss_before,
+                'rss_peak_bytes': sampler.peak if sampler.available else None,
+                'rss_after_bytes': sampler.current(),
+                'top_allocations': _top_allocations(after, before, top_n),
+            }
+            del before, after
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    num_attempts = len(state['data'])
+    num_students = len(state['index'])
+    for result in stages.values():
+        result['peak_bytes_per_attempt'] = result['peak_bytes'] / num_attempts if num_attempts else None
+        result['peak_bytes_per_student'] = result['peak_bytes'] / num_students if num_students else None
+        result['retained_bytes_per_attempt'] = result['retained_bytes'] / num_attempts if num_attempts else None
+        result['retained_bytes_per_student'] = result['retained_bytes'] / num_students if num_students else None
+
+    report = {
+        'attempts': num_attempts,
+        'students': num_students,
+        'rss_available': sampler.available,
+        'stages': stages,
+    }
+    if verbose:
+        print_report(report)
+    return report
+
+
+def print_report(report: Dict) -> None:
+    """Print a per-stage memory table and the top allocation sites."""
+    mb = 1024 * 1024
+    print(f"{report['attempts']:,} attempts, {report['students']:,} students\n")
+    print(f"{'Stage':<12}{'peak MB':>10}{'retained MB':>13}{'RSS peak MB':>13}"
+          f"{'peak B/attempt':>16}{'retained B/student':>20}")
+    for name, result in report['stages'].items():
+        rss_peak = result['rss_peak_bytes']
+        print(f"{name:<12}{result['peak_bytes'] / mb:>10.1f}{result['retained_bytes'] / mb:>13.1f}"
+              f"{f'{rss_peak / mb:.1f}' if rss_peak is not None else '-':>13}"
+              f"{result['peak_bytes_per_attempt'] or 0:>16.1f}"
+              f"{result['retained_bytes_per_student'] or 0:>20.1f}")
+
+    for name, result in report['stages'].items():
+        if result['top_allocations']:
+            print(f"\nTop allocations during {name}:")
+            for allocation in result['top_allocations']:
+                print(f"  {allocation['size_bytes'] / mb:>8.2f} MB  {allocation['count']:>8,} blocks  "
+                      f"{allocation['site']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile EDU-SENSE memory per pipeline stage")
+    parser.add_argument('--path', help="Attempts file to profile (default: generated data)")
+    parser.add_argument('--size', default='100000', help="Attempts to generate (e.g. 1e6)")
+    parser.add_argument('--top', type=int, help="Allocation sites per stage")
+    parser.add_argument('--json', help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = profile_pipeline(args.path, int(float(args.size)), args.top, verbose=True)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
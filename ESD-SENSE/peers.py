@@ -0,0 +1,205 @@
+"""
+"Students like this one": nearest neighbours over attempt profiles.
+Each student is a point of standardized per-topic accuracy, log mean time
+and time coefficient of variation in a KD-tree (or ball tree), so a k-NN
+query is a tree search instead of a scan of the cohort. Builds run on a
+background thread and replace the served tree only when complete, so
+queries keep answering from the previous tree while data is re-indexed.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from instrumentation import traced
+from student_features import TOPIC_PREFIX, student_features
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from recommendation_engine import RecommendationEngine
+    from time_travel import TimeTravelIndex
+
+
+class PeerIndex:
+    """
+    Nearest-neighbour index of a cohort's students.
+    The served state (tree, student IDs, embedding) is swapped as one
+    tuple, so a query never sees a half-built index.
+    """
+
+    def __init__(self, algorithm: Optional[str] = None, leaf_size: Optional[int] = None):
+        settings = config.PEERS
+        self.algorithm = algorithm or settings['algorithm']
+        self.leaf_size = leaf_size or settings['leaf_size']
+        self._state: Optional[Tuple] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='edu-sense-peers')
+        self._pending: Optional[Future] = None
+
+    def __len__(self) -> int:
+        state = self._state
+        return 0 if state is None else len(state[1])
+
+    @property
+    def is_ready(self) -> bool:
+        """True once a build has completed."""
+        return self._state is not None
+
+    @property
+    def is_rebuilding(self) -> bool:
+        """True while a background build is queued or running."""
+        with self._lock:
+            return self._pending is not None and not self._pending.done()
+
+    @traced('peers.build')
+    def build(self, data: pd.DataFrame) -> 'PeerIndex':
+        """
+        Index every student of an attempt table (in this thread).
+
+        Args:
+            data: DataFrame with Student_ID, Topic, Correct, Time_Taken
+                and optionally Timestamp
+
+        Returns:
+            self
+        """
+        import pandas as pd
+        from sklearn.neighbors import BallTree, KDTree
+
+        features = student_features(data)
+        student_codes, _ = pd.factorize(data['Student_ID'])
+        attempts = np.bincount(student_codes, minlength=len(features))
+        mean_time = np.bincount(student_codes, weights=data['Time_Taken'].to_numpy(dtype=np.float64),
+                                minlength=len(features)) / attempts
+        topic_columns = [column for column in features.columns if column.startswith(TOPIC_PREFIX)]
+        raw = np.column_stack([features[topic_columns].to_numpy(), np.log1p(mean_time),
+                               features['time_cv'].to_numpy()])
+        spread = raw.std(axis=0)
+        embedding = (raw - raw.mean(axis=0)) / np.where(spread > 0, spread, 1.0)
+
+        tree_class = BallTree if self.algorithm == 'ball_tree' else KDTree
+        tree = tree_class(embedding, leaf_size=self.leaf_size)
+        student_ids = features.index.to_numpy()
+        positions = {student_id: i for i, student_id in enumerate(student_ids)}
+        self._state = (tree, student_ids, positions, embedding)
+        return self
+
+    def rebuild_in_background(self, data: pd.DataFrame) -> Future:
+        """
+        Rebuild the index on the background thread.
+        Queries keep using the current index until the new one is complete;
+        rebuilds requested while one is running run after it, in order.
+
+        Args:
+            data: The changed attempt table
+
+        Returns:
+            Future resolving to self
+        """
+        with self._lock:
+            self._pending = self._executor.submit(self.build, data)
+            return self._pending
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        """Exception raised by the latest background build (None unless it failed)."""
+        with self._lock:
+            pending = self._pending
+        if pending is None or not pending.done() or pending.cancelled():
+            return None
+        return pending.exception()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the latest requested build finishes; True if it did."""
+        with self._lock:
+            pending = self._pending
+        if pending is None:
+            return self.is_ready
+        try:
+            pending.result(timeout=timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    @traced('peers.neighbors')
+    def neighbors(self, student_id: str, k: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        The k students with the most similar profiles.
+
+        Args:
+            student_id: Student to find peers for
+            k: Number of peers (default from config)
+
+        Returns:
+            List of (student ID, distance in standardized units), nearest
+            first; empty if the index is not built or the student is unknown
+        """
+        state = self._state
+        if state is None:
+            return []
+        tree, student_ids, positions, embedding = state
+        position = positions.get(str(student_id))
+        if position is None:
+            return []
+        k = min(k or config.PEERS['k'], len(student_ids) - 1)
+        if k <= 0:
+            return []
+        distances, rows = tree.query(embedding[position:position + 1], k=k + 1)
+        return [
+            (str(student_ids[row]), float(distance))
+            for row, distance in zip(rows[0], distances[0])
+            if row != position
+        ][:k]
+
+
+def peer_outcomes(peers: List[Tuple[str, float]], history: TimeTravelIndex,
+                  engine: RecommendationEngine) -> List[Dict]:
+    """
+    What happened to each peer after the midpoint of their attempts.
+    Recommendations are the ones the engine made from the peer's analysis
+    at the midpoint; resolved gaps are gaps at the midpoint that are gone
+    from their latest analysis.
+
+    Args:
+        peers: Output of PeerIndex.neighbors()
+        history: TimeTravelIndex of the same dataset
+        engine: Recommendation engine
+
+    Returns:
+        One dictionary per peer: student_id, distance, earlier_accuracy,
+        recent_accuracy, improvement (None if fewer than 2 dated
+        attempts), gaps (latest), earlier_recommendations (titles) and
+        resolved_gaps
+    """
+    outcomes = []
+    for student_id, distance in peers:
+        outcome = {
+            'student_id': student_id,
+            'distance': distance,
+            'earlier_accuracy': None,
+            'recent_accuracy': None,
+            'improvement': None,
+            'gaps': [],
+            'earlier_recommendations': [],
+            'resolved_gaps': [],
+        }
+        progress = history.progress_of(student_id)
+        if progress is not None:
+            earlier = history.analyze_student_as_of(student_id, progress['midpoint'])
+            latest = history.analyze_student_as_of(student_id, progress['last'])
+            outcome.update({
+                'earlier_accuracy': progress['earlier_accuracy'],
+                'recent_accuracy': progress['recent_accuracy'],
+                'improvement': progress['recent_accuracy'] - progress['earlier_accuracy'],
+                'gaps': list(latest['gaps']),
+                'earlier_recommendations': [rec['title'] for rec in engine.generate_recommendations(earlier)],
+                'resolved_gaps': [gap for gap in earlier['gaps'] if gap not in latest['gaps']],
+            })
+        outcomes.append(outcome)
+    return outcomes
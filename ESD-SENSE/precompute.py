@@ -0,0 +1,170 @@
+"""
+Background precomputation of cohort analyses and recommendations.
+Started right after a dataset is loaded so the analysis pages can read
+finished results instead of analyzing on demand.
+"""
+
+import threading
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from anomaly import ProfileAnomalyDetector
+from attempt_index import AttemptIndex
+from baselines import CohortBaselines
+from gap_detector import LearningGapDetector
+from recommendation_engine import RecommendationEngine
+
+
+class AnalysisPrecomputer:
+    """
+    Analyzes every student of an indexed dataset on a thread pool.
+    Students are processed in chunks with LearningGapDetector.analyze_cohort;
+    results and progress are readable from any thread while work continues.
+    """
+
+    def __init__(self, index: AttemptIndex,
+                 detector: LearningGapDetector,
+                 engine: RecommendationEngine,
+                 chunk_size: Optional[int] = None,
+                 max_workers: Optional[int] = None,
+                 on_progress: Optional[Callable[[int, int], None]] = None,
+                 on_results: Optional[Callable[[Dict[str, Dict]], None]] = None,
+                 baselines: Optional[CohortBaselines] = None,
+                 anomaly: Optional[ProfileAnomalyDetector] = None):
+        settings = config.PRECOMPUTE
+        self.index = index
+        self.detector = detector
+        self.engine = engine
+        self.chunk_size = chunk_size or settings['chunk_size']
+        self.max_workers = max_workers or settings['max_workers']
+        self.on_progress = on_progress
+        self.on_results = on_results
+        self.baselines = baselines
+        self.anomaly = anomaly
+
+        self._analyses: Dict[str, Dict] = {}
+        self._recommendations: Dict[str, List[Dict]] = {}
+        self._errors: List[str] = []
+        self._failed = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures = []
+        self._cancelled = threading.Event()
+
+    def start(self) -> 'AnalysisPrecomputer':
+        """Submit all student chunks to the pool (no-op if already started)."""
+        with self._lock:
+            if self._executor is not None:
+                return self
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='edu-sense-precompute')
+            # Submitted under the lock so is_running never sees a started pool without its chunks
+            students = self.index.students()
+            for start in range(0, len(students), self.chunk_size):
+                chunk = students[start:start + self.chunk_size]
+                self._futures.append(self._executor.submit(self._process_chunk, chunk))
+        self._executor.shutdown(wait=False)
+        return self
+
+    def cancel(self) -> None:
+        """Stop processing chunks that have not started yet."""
+        self._cancelled.set()
+        for future in self._futures:
+            future.cancel()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until all chunks finish.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+
+        Returns:
+            True if every chunk finished
+        """
+        _, not_done = futures.wait(self._futures, timeout=timeout)
+        return not not_done
+
+    def progress(self) -> Tuple[int, int]:
+        """Return (students processed, total students)."""
+        with self._lock:
+            return len(self._analyses), len(self.index)
+
+    @property
+    def is_complete(self) -> bool:
+        """True once every student has been analyzed."""
+        done, total = self.progress()
+        return done >= total
+
+    @property
+    def is_started(self) -> bool:
+        """True once start() has submitted the chunks (False while precompute is disabled)."""
+        with self._lock:
+            return self._executor is not None
+
+    @property
+    def is_running(self) -> bool:
+        """
+        True while chunks are still queued or running. False before start(),
+        after cancel() and once every chunk has finished, including chunks
+        that failed (see failed and errors).
+        """
+        with self._lock:
+            return self._executor is not None and not all(future.done() for future in self._futures)
+
+    @property
+    def failed(self) -> int:
+        """Number of students in chunks that failed."""
+        with self._lock:
+            return self._failed
+
+    @property
+    def errors(self) -> List[str]:
+        """Error messages from chunks that failed."""
+        with self._lock:
+            return list(self._errors)
+
+    def get_analysis(self, student_id: str) -> Optional[Dict]:
+        """Precomputed analysis for a student, or None if not processed yet."""
+        with self._lock:
+            return self._analyses.get(student_id)
+
+    def get_recommendations(self, student_id: str) -> Optional[List[Dict]]:
+        """Precomputed recommendations for a student, or None if not processed yet."""
+        with self._lock:
+            return self._recommendations.get(student_id)
+
+    def all_recommendations(self) -> Dict[str, List[Dict]]:
+        """Snapshot of the recommendations of every student processed so far."""
+        with self._lock:
+            return dict(self._recommendations)
+
+    def _process_chunk(self, student_ids: List[str]) -> None:
+        """Analyze one chunk of students and publish the results."""
+        if self._cancelled.is_set():
+            return
+        try:
+            positions = np.concatenate([self.index.row_positions(s) for s in student_ids])
+            analyses = self.detector.analyze_cohort(self.index.data.iloc[positions], self.baselines, self.anomaly)
+            recommendations = {
+                student_id: self.engine.generate_recommendations(analysis)
+                for student_id, analysis in analyses.items()
+            }
+        except Exception as e:
+            with self._lock:
+                self._errors.append(f"{student_ids[0]}..{student_ids[-1]}: {e}")
+                self._failed += len(student_ids)
+            return
+
+        with self._lock:
+            self._analyses.update(analyses)
+            self._recommendations.update(recommendations)
+            done, total = len(self._analyses), len(self.index)
+        if self.on_results:
+            self.on_results(analyses)
+        if self.on_progress:
+            self.on_progress(done, total)
@@ -0,0 +1,163 @@
+"""
+Mergeable streaming quantile sketches for attempt times.
+Each key (a student, a topic, a shard's whole cohort) gets one row of
+logarithmic buckets (the DDSketch layout): a value lands in bucket
+ceil(log_gamma(value)), so any quantile read back is within the configured
+relative accuracy of the exact one. A row is a fixed few hundred bytes
+however many attempts it has seen, updates are vectorized over keys, and
+sketches built on different shards merge by adding their counts.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+import config
+
+
+class QuantileSketches:
+    """
+    One log-bucketed quantile sketch per key, stored as a (keys, buckets)
+    count array. Keys are row positions chosen by the caller.
+    """
+
+    def __init__(self, num_keys: int = 0,
+                 relative_accuracy: Optional[float] = None,
+                 min_value: Optional[float] = None,
+                 max_value: Optional[float] = None):
+        settings = config.QUANTILE_SKETCH
+        self.relative_accuracy = relative_accuracy or settings['relative_accuracy']
+        self.min_value = min_value or settings['min_value']
+        self.max_value = max_value or settings['max_value']
+
+        self.gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self._offset = int(np.ceil(np.log(self.min_value) / self._log_gamma))
+        self.num_buckets = int(np.ceil(np.log(self.max_value) / self._log_gamma)) - self._offset + 1
+        self.counts = np.zeros((num_keys, self.num_buckets), dtype=np.uint32)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @classmethod
+    def from_counts(cls, counts: np.ndarray, relative_accuracy: float,
+                    min_value: float, max_value: float) -> 'QuantileSketches':
+        """Wrap an existing count array (e.g. one loaded from a checkpoint)."""
+        sketches = cls(0, relative_accuracy, min_value, max_value)
+        if counts.shape[1] != sketches.num_buckets:
+            raise ValueError(f"Expected {sketches.num_buckets} buckets, got {counts.shape[1]}")
+        sketches.counts = counts
+        return sketches
+
+    @property
+    def nbytes_per_key(self) -> int:
+        """Memory of one key's sketch."""
+        return self.counts.itemsize * self.num_buckets
+
+    def bucket_of(self, values: np.ndarray) -> np.ndarray:
+        """Bucket of each value (values outside [min_value, max_value] go to the end buckets)."""
+        values = np.maximum(np.asarray(values, dtype=np.float64), self.min_value)
+        buckets = np.ceil(np.log(values) / self._log_gamma).astype(np.int64) - self._offset
+        return np.clip(buckets, 0, self.num_buckets - 1)
+
+    def bucket_values(self) -> np.ndarray:
+        """Value reported for each bucket (within relative_accuracy of anything in it)."""
+        upper = self.gamma ** (np.arange(self.num_buckets) + self._offset)
+        return 2 * upper / (self.gamma + 1)
+
+    def resize(self, num_keys: int) -> None:
+        """Grow to at least num_keys rows (new rows are empty)."""
+        if num_keys > len(self.counts):
+            counts = np.zeros((num_keys, self.num_buckets), dtype=self.counts.dtype)
+            counts[:len(self.counts)] = self.counts
+            self.counts = counts
+
+    def update(self, keys: np.ndarray, values: np.ndarray) -> None:
+        """
+        Add values to their keys' sketches.
+
+        Args:
+            keys: Row position of each value
+            values: Values to add (e.g. Time_Taken)
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(keys) == 0:
+            return
+        self.resize(int(keys.max()) + 1)
+        np.add.at(self.counts, (keys, self.bucket_of(values)), 1)
+
+    def merge(self, other: 'QuantileSketches') -> 'QuantileSketches':
+        """
+        Add another set of sketches with the same parameters, key by key.
+
+        Args:
+            other: Sketches built elsewhere (e.g. another shard)
+
+        Returns:
+            self
+        """
+        if (other.relative_accuracy, other.min_value, other.max_value) != \
+                (self.relative_accuracy, self.min_value, self.max_value):
+            raise ValueError("Cannot merge sketches with different accuracy or value range")
+        self.resize(len(other))
+        self.counts[:len(other)] += other.counts
+        return self
+
+    def combined(self) -> 'QuantileSketches':
+        """Single sketch of every key's values together (e.g. a cohort baseline)."""
+        total = QuantileSketches(0, self.relative_accuracy, self.min_value, self.max_value)
+        total.counts = self.counts.sum(axis=0, dtype=np.uint64).astype(self.counts.dtype)[None, :]
+        return total
+
+    def count(self, keys: Optional[np.ndarray] = None) -> np.ndarray:
+        """Number of values in each key's sketch."""
+        return self._rows(keys).sum(axis=1, dtype=np.int64)
+
+    def quantile_buckets(self, q: float, keys: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Bucket holding the q-quantile of each key (-1 for empty sketches).
+
+        Args:
+            q: Quantile in [0, 1]
+            keys: Row positions (all rows if None)
+
+        Returns:
+            Bucket index per key
+        """
+        cumulative = np.cumsum(self._rows(keys), axis=1, dtype=np.int64)
+        totals = cumulative[:, -1] if cumulative.shape[1] else np.zeros(len(cumulative), dtype=np.int64)
+        rank = np.floor(q * (totals - 1))
+        buckets = (cumulative <= rank[:, None]).sum(axis=1)
+        return np.where(totals > 0, buckets, -1)
+
+    def quantile(self, q: float, keys: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Approximate q-quantile of each key's values (NaN for empty sketches).
+
+        Args:
+            q: Quantile in [0, 1] (e.g. 0.9 for P90)
+            keys: Row positions (all rows if None)
+
+        Returns:
+            Quantile per key, within relative_accuracy of the exact value
+        """
+        buckets = self.quantile_buckets(q, keys)
+        return np.where(buckets >= 0, self.bucket_values()[np.maximum(buckets, 0)], np.nan)
+
+    def count_at_or_above(self, buckets: np.ndarray, keys: Optional[np.ndarray] = None) -> np.ndarray:
+        """Values in each key's sketch from the given bucket up."""
+        cumulative = np.cumsum(self._rows(keys), axis=1, dtype=np.int64)
+        rows = np.arange(len(cumulative))
+        below = np.where(buckets > 0, cumulative[rows, np.maximum(buckets - 1, 0)], 0)
+        return np.where(buckets >= 0, cumulative[:, -1] - below, 0)
+
+    def count_at_or_below(self, buckets: np.ndarray, keys: Optional[np.ndarray] = None) -> np.ndarray:
+        """Values in each key's sketch up to and including the given bucket."""
+        cumulative = np.cumsum(self._rows(keys), axis=1, dtype=np.int64)
+        rows = np.arange(len(cumulative))
+        return np.where(buckets >= 0, cumulative[rows, np.maximum(buckets, 0)], 0)
+
+    def _rows(self, keys: Optional[np.ndarray]) -> np.ndarray:
+        return self.counts if keys is None else self.counts[np.asarray(keys, dtype=np.int64)]
@@ -1,5 +1,7 @@
 from typing import Dict, List
 
+from instrumentation import traced
+
 class RecommendationEngine:
     """
     Generates personalized intervention recommendations based on detected gaps.
@@ -9,6 +11,7 @@ class RecommendationEngine:
     def __init__(self):
         self.intervention_library = self._build_intervention_library()
     
+    @traced('recommendations.generate')
     def generate_recommendations(self, analysis_results: Dict) -> List[Dict]:
         """
         Generate personalized recommendations based on analysis.
@@ -52,6 +55,8 @@ class RecommendationEngine:
             return self._recommend_confidence_building(gap_details)
         elif gap_type == 'speed':
             return self._recommend_deliberate_practice(gap_details)
+        elif gap_type == 'profile':
+            return self._recommend_profile_review(gap_details)
         
         return None
     
@@ -113,6 +118,24 @@ class RecommendationEngine:
             ]
         }
     
+    def _recommend_profile_review(self, gap_details: Dict) -> Dict:
+        """Recommend a teacher check-in for an unusual attempt profile."""
+        return {
+            'title': 'Teacher Check-In',
+            'description': gap_details['description'],
+            'priority': gap_details['severity'].upper(),
+            'practice_type': 'One-on-One Review',
+            'target_topics': ['Attempt patterns'],
+            'duration': '1 session, 15-20 min',
+            'expected_impact': 0.10,
+            'steps': [
+                '1. Look through the student\'s recent attempts together',
+                '2. Ask how they approach questions and manage their time',
+                '3. Check for guessing, outside help or disengagement',
+                '4. Agree on a practice routine and review it in a week',
+            ]
+        }
+    
     def _get_maintenance_recommendation(self) -> Dict:
         """Recommend continued practice for students on track."""
         return {
@@ -0,0 +1,394 @@
+"""
+Local SQLite store for attempts and analysis results.
+Tracks a per-student watermark (the last attempt included in the stored
+analysis) so re-analysis only reprocesses students with new attempts.
+Gap changes between runs are kept as a change feed (gap_events); the
+current gaps are the latest non-removed event per (student, gap).
+Only used when config.PRIVACY['store_results_locally'] is enabled.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
+
+import config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# SQLite treats NULLs as distinct in UNIQUE indexes, so missing values get sentinels
+DEDUPE_KEY = ("student_id, COALESCE(question_id, ''), COALESCE(attempt_number, -1), "
+              "COALESCE(timestamp_ns, -1)")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS attempts (
+    attempt_id     INTEGER PRIMARY KEY,
+    student_id     TEXT NOT NULL,
+    question_id    TEXT,
+    topic          TEXT,
+    correct        INTEGER NOT NULL,
+    time_taken     REAL NOT NULL,
+    attempt_number INTEGER,
+    timestamp_ns   INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS attempts_dedupe_key ON attempts ({DEDUPE_KEY});
+CREATE INDEX IF NOT EXISTS attempts_student ON attempts (student_id, attempt_id);
+CREATE INDEX IF NOT EXISTS attempts_topic ON attempts (topic);
+CREATE INDEX IF NOT EXISTS attempts_timestamp ON attempts (timestamp_ns);
+
+CREATE TABLE IF NOT EXISTS students (
+    student_id        TEXT PRIMARY KEY,
+    last_attempt_id   INTEGER NOT NULL,
+    last_timestamp_ns INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    student_id     TEXT NOT NULL,
+    mode           TEXT NOT NULL,
+    watermark      INTEGER NOT NULL,
+    analyzed_at    REAL NOT NULL,
+    total_attempts INTEGER,
+    accuracy       REAL,
+    overall_score  REAL,
+    risk_band      TEXT,
+    num_gaps       INTEGER,
+    result_json    TEXT NOT NULL,
+    PRIMARY KEY (student_id, mode)
+);
+CREATE INDEX IF NOT EXISTS analyses_risk ON analyses (mode, risk_band);
+
+CREATE TABLE IF NOT EXISTS gap_events (
+    event_id     INTEGER PRIMARY KEY,
+    run_at       REAL NOT NULL,
+    mode         TEXT NOT NULL,
+    student_id   TEXT NOT NULL,
+    gap          TEXT NOT NULL,
+    event        TEXT NOT NULL,
+    old_severity TEXT,
+    new_severity TEXT,
+    confidence   REAL
+);
+CREATE INDEX IF NOT EXISTS gap_events_key ON gap_events (mode, student_id, gap, event_id);
+CREATE INDEX IF NOT EXISTS gap_events_run ON gap_events (mode, run_at);
+"""
+
+ATTEMPT_COLUMNS = {
+    'Student_ID': 'student_id',
+    'Question_ID': 'question_id',
+    'Topic': 'topic',
+    'Correct': 'correct',
+    'Time_Taken': 'time_taken',
+    'Attempt_Number': 'attempt_number',
+    'Timestamp': 'timestamp_ns',
+}
+
+
+def open_store(path: Optional[str] = None) -> Optional['AnalysisStore']:
+    """
+    Open the local analysis store if local storage is allowed.
+
+    Args:
+        path: SQLite file (defaults to config.STORE['path'])
+
+    Returns:
+        AnalysisStore, or None when config.PRIVACY['store_results_locally'] is off
+    """
+    if not config.PRIVACY['store_results_locally']:
+        return None
+    return AnalysisStore(path)
+
+
+class AnalysisStore:
+    """
+    Attempts and per-student analysis results in one SQLite file.
+    Attempt IDs grow with every insert; a student's analysis is stale when
+    their newest attempt ID is above the watermark stored with the analysis.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or config.STORE['path']
+        # Callers may hand the store to one worker thread (e.g. ingestion.py)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> 'AnalysisStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add_attempts(self, attempts_df: pd.DataFrame) -> int:
+        """
+        Insert attempts, skipping rows already stored.
+
+        Args:
+            attempts_df: DataFrame with question attempts
+
+        Returns:
+            Number of newly stored attempts
+        """
+        import pandas as pd
+
+        if len(attempts_df) == 0:
+            return 0
+        columns = [column for column in ATTEMPT_COLUMNS if column in attempts_df.columns]
+        frame = attempts_df[columns].rename(columns=ATTEMPT_COLUMNS)
+        for column in ('student_id', 'question_id', 'topic'):
+            if column in frame.columns:
+                # Missing IDs and topics stay NULL instead of becoming 'None'/'nan'
+                frame[column] = frame[column].astype(object).map(str, na_action='ignore')
+        if 'timestamp_ns' in frame.columns:
+            timestamps = pd.to_datetime(frame['timestamp_ns'])
+            frame['timestamp_ns'] = timestamps.astype('int64').where(timestamps.notna(), None)
+        frame = frame.astype(object).where(frame.notna(), None)
+
+        placeholders = ', '.join('?' * len(frame.columns))
+        with self.conn:
+            start = self._max_attempt_id()
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO attempts ({', '.join(frame.columns)}) VALUES ({placeholders})",
+                frame.itertuples(index=False, name=None)
+            )
+            # Advance each touched student's newest attempt
+            self.conn.execute("""
+                INSERT INTO students (student_id, last_attempt_id, last_timestamp_ns)
+                SELECT student_id, MAX(attempt_id), MAX(timestamp_ns)
+                FROM attempts WHERE attempt_id > ? GROUP BY student_id
+                ON CONFLICT (student_id) DO UPDATE SET
+                    last_attempt_id = excluded.last_attempt_id,
+                    last_timestamp_ns = MAX(COALESCE(last_timestamp_ns, excluded.last_timestamp_ns),
+                                            COALESCE(excluded.last_timestamp_ns, last_timestamp_ns))
+            """, (start,))
+            inserted = self._max_attempt_id() - start
+        return inserted
+
+    def num_students(self) -> int:
+        """Number of students with stored attempts."""
+        return self.conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+    def stale_students(self, mode: Optional[str] = None) -> List[str]:
+        """
+        Students whose stored analysis is missing or older than their attempts.
+
+        Args:
+            mode: Detection mode (defaults to config.DETECTION_MODE)
+
+        Returns:
+            Sorted list of student IDs needing re-analysis
+        """
+        rows = self.conn.execute("""
+            SELECT s.student_id FROM students s
+            LEFT JOIN analyses a ON a.student_id = s.student_id AND a.mode = ?
+            WHERE a.watermark IS NULL OR s.last_attempt_id > a.watermark
+            ORDER BY s.student_id
+        """, (mode or config.DETECTION_MODE,))
+        return [row[0] for row in rows]
+
+    def load_attempts(self, student_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Read stored attempts in the attempt-table layout.
+
+        Args:
+            student_ids: Only these students (all students if None)
+
+        Returns:
+            DataFrame with question attempts, in insertion order per student
+        """
+        import pandas as pd
+
+        select = ', '.join(f"a.{column} AS {name}" for name, column in ATTEMPT_COLUMNS.items())
+        if student_ids is None:
+            query = f"SELECT {select} FROM attempts a ORDER BY a.student_id, a.attempt_id"
+        else:
+            self._fill_selection(student_ids)
+            query = (f"SELECT {select} FROM _selected s JOIN attempts a ON a.student_id = s.student_id "
+                     f"ORDER BY a.student_id, a.attempt_id")
+        df = pd.read_sql_query(query, self.conn)
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'], unit='ns')
+        return df
+
+    def watermarks(self, student_ids: Iterable[str]) -> Dict[str, int]:
+        """Newest attempt ID of each student (the watermark an analysis would get)."""
+        self._fill_selection(student_ids)
+        rows = self.conn.execute("""
+            SELECT st.student_id, st.last_attempt_id FROM _selected s
+            JOIN students st ON st.student_id = s.student_id
+        """)
+        return dict(rows.fetchall())
+
+    def save_results(self, records: List[Dict], watermarks: Dict[str, int],
+                     mode: Optional[str] = None) -> int:
+        """
+        Store analysis result rows (see edu_sense.analysis_record) and the
+        gap changes they cause.
+
+        Args:
+            records: One result row per student
+            watermarks: Attempt ID each result is up to date with
+            mode: Detection mode the results were computed with
+
+        Returns:
+            Number of gap change events recorded
+        """
+        from change_feed import diff_gap_tables, gap_table
+
+        mode = mode or config.DETECTION_MODE
+        analyzed_at = time.time()
+        students = [record['student_id'] for record in records]
+        events = diff_gap_tables(
+            self.current_gaps(mode, students),
+            gap_table({record['student_id']: {gap['gap']: gap for gap in record['gaps']}
+                       for record in records}),
+        )
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO gap_events
+                    (run_at, mode, student_id, gap, event, old_severity, new_severity, confidence)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(analyzed_at, mode, *row)
+                  for row in events.astype(object).where(events.notna(), None).itertuples(index=False)])
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO analyses
+                    (student_id, mode, watermark, analyzed_at, total_attempts, accuracy,
+                     overall_score, risk_band, num_gaps, result_json)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (record['student_id'], mode, watermarks[record['student_id']], analyzed_at,
+                 record['total_attempts'], record['accuracy'], record['overall_score'],
+                 record['risk_band'], record['num_gaps'], json.dumps(record))
+                for record in records
+            ])
+        return len(events)
+
+    def current_gaps(self, mode: Optional[str] = None,
+                     student_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Gaps as of the latest run, rebuilt from the change feed.
+
+        Args:
+            mode: Detection mode (defaults to config.DETECTION_MODE)
+            student_ids: Only these students (all students if None)
+
+        Returns:
+            Gap table (student_id, gap, severity, confidence)
+        """
+        import pandas as pd
+
+        latest = """
+            SELECT e.student_id, e.gap, e.new_severity AS severity, e.confidence
+            FROM gap_events e
+            JOIN (SELECT student_id, gap, MAX(event_id) AS event_id FROM gap_events
+                  WHERE mode = ? {students} GROUP BY student_id, gap) last
+              ON last.event_id = e.event_id
+            WHERE e.event != 'removed'
+        """
+        if student_ids is None:
+            query = latest.format(students='')
+        else:
+            self._fill_selection(student_ids)
+            query = latest.format(students='AND student_id IN (SELECT student_id FROM _selected)')
+        return pd.read_sql_query(query, self.conn, params=(mode or config.DETECTION_MODE,))
+
+    def gap_events(self, mode: Optional[str] = None, since: Optional[float] = None) -> pd.DataFrame:
+        """
+        Change feed of gap events, oldest first.
+
+        Args:
+            mode: Detection mode (defaults to config.DETECTION_MODE)
+            since: Only events of runs after this time.time() value
+
+        Returns:
+            DataFrame with run_at, student_id, gap, event, old_severity,
+            new_severity and confidence
+        """
+        import pandas as pd
+
+        return pd.read_sql_query("""
+            SELECT run_at, student_id, gap, event, old_severity, new_severity, confidence
+            FROM gap_events WHERE mode = ? AND run_at > ? ORDER BY event_id
+        """, self.conn, params=(mode or config.DETECTION_MODE, since or 0.0))
+
+    def get_result(self, student_id: str, mode: Optional[str] = None) -> Optional[Dict]:
+        """Stored result row of a student, or None if never analyzed."""
+        row = self.conn.execute(
+            "SELECT result_json FROM analyses WHERE student_id = ? AND mode = ?",
+            (student_id, mode or config.DETECTION_MODE)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def results_frame(self, mode: Optional[str] = None) -> pd.DataFrame:
+        """Scalar columns of every stored result for a mode."""
+        import pandas as pd
+
+        return pd.read_sql_query("""
+            SELECT student_id, watermark, analyzed_at, total_attempts, accuracy,
+                   overall_score, risk_band, num_gaps
+            FROM analyses WHERE mode = ? ORDER BY student_id
+        """, self.conn, params=(mode or config.DETECTION_MODE,))
+
+    def reanalyze(self, mode: Optional[str] = None,
+                  analyze: Optional[Callable[[pd.DataFrame], List[Dict]]] = None,
+                  batch_size: Optional[int] = None) -> List[Dict]:
+        """
+        Re-analyze only students with attempts newer than their stored analysis.
+
+        Args:
+            mode: Detection mode (defaults to config.DETECTION_MODE)
+            analyze: Function turning an attempts frame into result rows
+                (defaults to an in-process analyze_cohort + recommendations)
+            batch_size: Students loaded and analyzed at a time
+
+        Returns:
+            Result rows of the re-analyzed students
+        """
+        mode = mode or config.DETECTION_MODE
+        batch_size = batch_size or config.STORE['batch_size']
+        analyze = analyze or _analyzer(mode)
+
+        stale = self.stale_students(mode)
+        records: List[Dict] = []
+        for start in range(0, len(stale), batch_size):
+            batch = stale[start:start + batch_size]
+            # Capture watermarks before reading so later inserts stay stale
+            watermarks = self.watermarks(batch)
+            batch_records = analyze(self.load_attempts(batch))
+            self.save_results(batch_records, watermarks, mode)
+            records.extend(batch_records)
+        return records
+
+    def _fill_selection(self, student_ids: Iterable[str]) -> None:
+        """Load student IDs into a temp table for joins (avoids huge IN lists)."""
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS _selected (student_id TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM _selected")
+        self.conn.executemany("INSERT OR IGNORE INTO _selected VALUES (?)",
+                              ((str(student_id),) for student_id in student_ids))
+
+    def _max_attempt_id(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(attempt_id), 0) FROM attempts").fetchone()[0]
+
+
+def _analyzer(mode: str) -> Callable[[pd.DataFrame], List[Dict]]:
+    """Default in-process analysis producing edu_sense result rows."""
+    from edu_sense import analysis_record
+    from gap_detector import LearningGapDetector
+    from recommendation_engine import RecommendationEngine
+
+    detector = LearningGapDetector(mode)
+    engine = RecommendationEngine()
+
+    def analyze(attempts_df: pd.DataFrame) -> List[Dict]:
+        analyses = detector.analyze_cohort(attempts_df)
+        return [
+            analysis_record(student_id, analysis, engine.generate_recommendations(analysis), mode)
+            for student_id, analysis in analyses.items()
+        ]
+    return analyze
@@ -0,0 +1,275 @@
+"""
+Multi-tenant analysis scheduler.
+Each tenant (school) is split into chunks of students; tenants are spread
+over per-worker queues by size, and a worker that runs out of its own work
+steals chunks from the back of the fullest queue. A fairness limit caps how
+many workers one tenant may occupy while other tenants are waiting, so a
+large school cannot hold up every small one. Runs report makespan and
+worker utilization.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from instrumentation import traced
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Detector and engine of a worker (set by _init_worker)
+_worker_state: Dict = {}
+
+
+class WorkStealingQueues:
+    """
+    Per-worker deques of chunk tasks with a per-tenant concurrency limit.
+    Tasks are dictionaries with at least 'tenant' and 'cost' keys. Owners
+    take from the front of their deque, thieves from the back of the
+    deque with the most queued cost.
+    """
+
+    def __init__(self, tasks_by_tenant: Dict[str, List[Dict]], workers: int, max_tenant_workers: int):
+        self.workers = workers
+        self.max_tenant_workers = max_tenant_workers
+        self.queues: List[deque] = [deque() for _ in range(workers)]
+        self.queued_cost = [0.0] * workers
+        self.running: Counter = Counter()
+        self.steals = 0
+
+        # Largest tenant first onto the least loaded queue, keeping a tenant's chunks together
+        totals = {tenant: sum(task['cost'] for task in tasks) for tenant, tasks in tasks_by_tenant.items()}
+        for tenant in sorted(totals, key=totals.get, reverse=True):
+            worker = int(np.argmin(self.queued_cost))
+            self.queues[worker].extend(tasks_by_tenant[tenant])
+            self.queued_cost[worker] += totals[tenant]
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self.queues)
+
+    def next_task(self, worker: int) -> Optional[Dict]:
+        """
+        Pick the next task for an idle worker.
+        The tenant limit is only enforced while another tenant has work
+        that could run instead, so it never leaves a worker idle.
+
+        Args:
+            worker: Index of the idle worker
+
+        Returns:
+            Task dictionary (with 'stolen' set), or None if nothing is queued
+        """
+        for limit in (self.max_tenant_workers, None):
+            task = self._take(worker, self.queues[worker], limit, from_back=False)
+            if task is not None:
+                task['stolen'] = False
+                return task
+            victims = sorted((w for w in range(self.workers) if w != worker and self.queues[w]),
+                             key=lambda w: self.queued_cost[w], reverse=True)
+            for victim in victims:
+                task = self._take(victim, self.queues[victim], limit, from_back=True)
+                if task is not None:
+                    task['stolen'] = True
+                    self.steals += 1
+                    return task
+        return None
+
+    def task_done(self, task: Dict) -> None:
+        """Release the tenant slot held by a finished task."""
+        self.running[task['tenant']] -= 1
+
+    def _take(self, owner: int, queue: deque, limit: Optional[int], from_back: bool) -> Optional[Dict]:
+        positions = range(len(queue) - 1, -1, -1) if from_back else range(len(queue))
+        for position in positions:
+            task = queue[position]
+            if limit is None or self.running[task['tenant']] < limit:
+                del queue[position]
+                self.queued_cost[owner] -= task['cost']
+                self.running[task['tenant']] += 1
+                return task
+        return None
+
+
+class TenantScheduler:
+    """
+    Analyzes many tenants' attempt tables on one worker pool.
+    Every worker holds its own LearningGapDetector and RecommendationEngine.
+    """
+
+    def __init__(self, mode: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None,
+                 max_tenant_share: Optional[float] = None):
+        settings = config.SCHEDULER
+        self.mode = mode or config.DETECTION_MODE
+        self.workers = workers or settings['workers'] or os.cpu_count() or 1
+        self.chunk_size = chunk_size or settings['chunk_size']
+        share = max_tenant_share or settings['max_tenant_share']
+        self.max_tenant_workers = max(1, math.ceil(share * self.workers))
+
+    def plan(self, tenants: Dict[str, pd.DataFrame]) -> Dict[str, List[Dict]]:
+        """
+        Split every tenant into student chunks.
+
+        Args:
+            tenants: Tenant ID -> attempts DataFrame
+
+        Returns:
+            Tenant ID -> list of tasks; each task has tenant, data, rows,
+            student_ids and cost (its number of attempts)
+        """
+        from attempt_index import AttemptIndex
+
+        plan = {}
+        for tenant, data in tenants.items():
+            index = AttemptIndex(data)
+            tasks = []
+            for start in range(0, len(index), self.chunk_size):
+                end = min(start + self.chunk_size, len(index))
+                rows = index.order[index.offsets[start]:index.offsets[end]]
+                tasks.append({
+                    'tenant': tenant,
+                    'data': data,
+                    'rows': rows,
+                    'student_ids': index.student_ids[start:end].tolist(),
+                    'cost': float(len(rows)),
+                })
+            plan[tenant] = tasks
+        return plan
+
+    @traced('scheduler.run')
+    def run(self, tenants: Dict[str, pd.DataFrame],
+            progress: bool = False) -> Tuple[Dict[str, List[Dict]], Dict]:
+        """
+        Analyze every student of every tenant.
+
+        Args:
+            tenants: Tenant ID -> attempts DataFrame
+            progress: Print tenant completions to stderr
+
+        Returns:
+            Tuple of (tenant ID -> result rows as in edu_sense.analysis_record,
+            run report from report())
+        """
+        plan = self.plan(tenants)
+        queues = WorkStealingQueues(plan, self.workers, self.max_tenant_workers)
+        remaining = Counter({tenant: len(tasks) for tenant, tasks in plan.items()})
+        results: Dict[str, List[Dict]] = {tenant: [] for tenant in plan}
+        spans: List[Dict] = []
+        tenant_finished: Dict[str, float] = {}
+
+        executor_class = ThreadPoolExecutor if self.workers == 1 else ProcessPoolExecutor
+        run_start = time.time()
+        with executor_class(max_workers=self.workers, initializer=_init_worker,
+                            initargs=(self.mode,)) as executor:
+            running = {}
+            idle = list(range(self.workers))
+            while len(queues) or running:
+                for worker in list(idle):
+                    task = queues.next_task(worker)
+                    if task is None:
+                        break
+                    idle.remove(worker)
+                    chunk = task.pop('data').iloc[task.pop('rows')]
+                    running[executor.submit(_analyze_task, chunk, task['student_ids'])] = (worker, task)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    worker, task = running.pop(future)
+                    records, started, finished = future.result()
+                    queues.task_done(task)
+                    idle.append(worker)
+                    results[task['tenant']].extend(records)
+                    spans.append({
+                        'tenant': task['tenant'],
+                        'worker': worker,
+                        'students': len(task['student_ids']),
+                        'attempts': int(task['cost']),
+                        'start': started - run_start,
+                        'end': finished - run_start,
+                        'stolen': task['stolen'],
+                    })
+                    remaining[task['tenant']] -= 1
+                    if remaining[task['tenant']] == 0:
+                        tenant_finished[task['tenant']] = time.time() - run_start
+                        if progress:
+                            print(f"  {len(tenant_finished):,}/{len(plan):,} tenants done "
+                                  f"({task['tenant']}: {len(results[task['tenant']]):,} students)",
+                                  file=sys.stderr)
+        makespan = time.time() - run_start
+        return results, self.report(spans, makespan, tenant_finished, queues.steals)
+
+    def report(self, spans: List[Dict], makespan: float,
+               tenant_finished: Dict[str, float], steals: int) -> Dict:
+        """
+        Summarize a run.
+
+        Args:
+            spans: One entry per executed task (worker, start/end seconds, ...)
+            makespan: Seconds from the first dispatch to the last completion
+            tenant_finished: Tenant ID -> seconds until its last chunk finished
+            steals: Tasks run by a worker other than the one they were queued on
+
+        Returns:
+            Dictionary with makespan, utilization (busy worker time over
+            workers x makespan), per-worker busy seconds, steals and tenant
+            completion percentiles
+        """
+        busy = [0.0] * self.workers
+        for span in spans:
+            busy[span['worker']] += span['end'] - span['start']
+        total_busy = sum(busy)
+        longest_task = max((span['end'] - span['start'] for span in spans), default=0.0)
+        finished = np.array(list(tenant_finished.values()))
+        completion = np.percentile(finished, [50, 95]) if len(finished) else [0.0, 0.0]
+        return {
+            'workers': self.workers,
+            'tenants': len(tenant_finished),
+            'tasks': len(spans),
+            'students': sum(span['students'] for span in spans),
+            'attempts': sum(span['attempts'] for span in spans),
+            'makespan_seconds': makespan,
+            # No schedule can beat perfectly divided work or the longest single task
+            'makespan_lower_bound_seconds': max(total_busy / self.workers, longest_task),
+            'utilization': total_busy / (self.workers * makespan) if makespan else 0.0,
+            'worker_busy_seconds': busy,
+            'steals': steals,
+            'max_tenant_workers': self.max_tenant_workers,
+            'tenant_completion_p50_seconds': float(completion[0]),
+            'tenant_completion_p95_seconds': float(completion[1]),
+        }
+
+
+def _init_worker(mode: str) -> None:
+    """Give a worker its own detector and recommendation engine."""
+    from gap_detector import LearningGapDetector
+    from recommendation_engine import RecommendationEngine
+
+    _worker_state['mode'] = mode
+    _worker_state['detector'] = LearningGapDetector(mode)
+    _worker_state['engine'] = RecommendationEngine()
+
+
+def _analyze_task(chunk: pd.DataFrame, student_ids: List[str]) -> Tuple[List[Dict], float, float]:
+    """Analyze one chunk of a tenant; returns its rows and wall-clock start/end."""
+    from edu_sense import analysis_record
+
+    started = time.time()
+    analyses = _worker_state['detector'].analyze_cohort(chunk)
+    engine = _worker_state['engine']
+    records = [
+        analysis_record(student_id, analyses[student_id],
+                        engine.generate_recommendations(analyses[student_id]), _worker_state['mode'])
+        for student_id in student_ids
+    ]
+    return records, started, time.time()
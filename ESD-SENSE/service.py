@@ -0,0 +1,456 @@
+"""
+Headless HTTP analysis service for EDU-SENSE.
+Exposes the gap detector and recommendation engine over a small asyncio
+HTTP/1.1 server so an LMS can request analyses without the Streamlit UI.
+
+Endpoints:
+    GET  /health             Service status and batching counters
+    POST /analyze-student    {"student_id": ..., "attempts": [...], "mode": ...}
+    POST /analyze-batch      {"students": [{"student_id": ..., "attempts": [...]}, ...], "mode": ...}
+    POST /recommendations    Same body as /analyze-student
+
+Attempts are rows with Question_ID, Topic, Correct and Time_Taken. When the
+service is started with --data, "attempts" may be omitted and the student's
+attempts are read from that file instead.
+
+Concurrent single-student requests are coalesced by a MicroBatcher into one
+LearningGapDetector.analyze_cohort() call.
+
+Usage:
+    python service.py [--host 127.0.0.1] [--port 8765] [--data attempts.parquet]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from attempt_index import AttemptIndex
+from gap_detector import LearningGapDetector
+from recommendation_engine import RecommendationEngine
+from utils import DataValidator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+ATTEMPT_COLUMNS = ['Question_ID', 'Topic', 'Correct', 'Time_Taken']
+
+HTTP_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+class RequestError(Exception):
+    """Client error, reported with an HTTP status code."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent analysis requests into vectorized detector calls.
+    A batch is flushed when it reaches max_batch_size students or when the
+    oldest request has waited max_wait_ms, whichever comes first.
+    """
+
+    def __init__(self, detectors: Dict[str, LearningGapDetector],
+                 executor: ThreadPoolExecutor,
+                 max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None):
+        settings = config.SERVICE
+        self.detectors = detectors
+        self.executor = executor
+        self.max_batch_size = max_batch_size or settings['max_batch_size']
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else settings['max_batch_wait_ms']) / 1000
+
+        # mode -> pending (attempts frame, future) pairs
+        self._pending: Dict[str, List[Tuple[pd.DataFrame, asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self.batches = 0
+        self.students = 0
+
+    async def analyze(self, attempts: pd.DataFrame, mode: str) -> Dict:
+        """
+        Queue one student's attempts and wait for the batched analysis.
+
+        Args:
+            attempts: The student's attempts
+            mode: Detection mode
+
+        Returns:
+            Analysis dictionary (same as LearningGapDetector.analyze_student)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(mode, [])
+        pending.append((attempts, future))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(mode)
+        elif mode not in self._timers:
+            self._timers[mode] = loop.call_later(self.max_wait, self._flush, mode)
+        return await future
+
+    def _flush(self, mode: str) -> None:
+        """Hand the pending batch of a mode to the worker pool."""
+        timer = self._timers.pop(mode, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(mode, [])
+        if not batch:
+            return
+
+        self.batches += 1
+        self.students += len(batch)
+        work = asyncio.get_running_loop().run_in_executor(
+            self.executor, self._analyze_batch, mode, [frame for frame, _ in batch]
+        )
+        work.add_done_callback(lambda done: self._deliver(done, batch))
+
+    def _analyze_batch(self, mode: str, frames: List[pd.DataFrame]) -> List:
+        """
+        Analyze all frames of a batch, falling back to one frame at a time if
+        the batch fails, so one bad request cannot fail the others.
+
+        Returns:
+            One analysis per frame, or the exception that frame raised
+        """
+        try:
+            return self._analyze_frames(mode, frames)
+        except Exception:
+            if len(frames) == 1:
+                raise
+        results = []
+        for frame in frames:
+            try:
+                results.extend(self._analyze_frames(mode, [frame]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _analyze_frames(self, mode: str, frames: List[pd.DataFrame]) -> List[Dict]:
+        """Run one analyze_cohort call over several frames."""
+        import pandas as pd
+
+        # Key rows by batch position so requests for the same student stay separate
+        keys = np.repeat(np.arange(len(frames)).astype(str), [len(frame) for frame in frames])
+        attempts = pd.concat(frames, ignore_index=True)
+        student_ids = [str(frame['Student_ID'].iloc[0]) for frame in frames]
+        attempts['Student_ID'] = keys
+
+        analyses = self.detectors[mode].analyze_cohort(attempts)
+        results = []
+        for i, student_id in enumerate(student_ids):
+            analysis = analyses[str(i)]
+            analysis['student_id'] = student_id
+            results.append(analysis)
+        return results
+
+    @staticmethod
+    def _deliver(done: asyncio.Future, batch: List[Tuple[pd.DataFrame, asyncio.Future]]) -> None:
+        """Resolve each request future with its result (or its error)."""
+        error = done.exception()
+        results = [error] * len(batch) if error else done.result()
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class AnalysisService:
+    """
+    Request handling for the HTTP service: parses payloads, batches the
+    analyses and renders JSON responses.
+    """
+
+    def __init__(self, data: Optional[pd.DataFrame] = None,
+                 max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None,
+                 max_workers: Optional[int] = None):
+        settings = config.SERVICE
+        self.index = AttemptIndex(data) if data is not None else None
+        self.engine = RecommendationEngine()
+        self.detectors = {
+            mode: LearningGapDetector(mode)
+            for mode in ('standard', 'early_detection', 'conservative')
+        }
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or settings['max_workers'],
+                                           thread_name_prefix='edu-sense-service')
+        self.batcher = MicroBatcher(self.detectors, self.executor, max_batch_size, max_wait_ms)
+        self.max_body_bytes = settings['max_body_bytes']
+        self.requests = 0
+        self.started = time.time()
+
+        self.routes = {
+            ('GET', '/health'): self.health,
+            ('POST', '/analyze-student'): self.analyze_student,
+            ('POST', '/analyze-batch'): self.analyze_batch,
+            ('POST', '/recommendations'): self.recommendations,
+        }
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        """
+        Dispatch one request.
+
+        Returns:
+            Tuple of (HTTP status, JSON-serializable response body)
+        """
+        self.requests += 1
+        path = path.split('?', 1)[0].rstrip('/') or '/'
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                return 405, {'error': f"{method} not allowed on {path}"}
+            return 404, {'error': f"Unknown endpoint {path}"}
+
+        try:
+            payload = json.loads(body) if body else {}
+            if not isinstance(payload, dict):
+                raise RequestError(400, "Request body must be a JSON object")
+            return 200, await handler(payload)
+        except json.JSONDecodeError as e:
+            return 400, {'error': f"Invalid JSON: {e}"}
+        except RequestError as e:
+            return e.status, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': f"{type(e).__name__}: {e}"}
+
+    async def health(self, payload: Dict) -> Dict:
+        """Service status and batching counters."""
+        return {
+            'status': 'ok',
+            'uptime_seconds': time.time() - self.started,
+            'requests': self.requests,
+            'batches': self.batcher.batches,
+            'batched_students': self.batcher.students,
+            'dataset_students': len(self.index) if self.index is not None else 0,
+        }
+
+    async def analyze_student(self, payload: Dict) -> Dict:
+        """Analyze one student."""
+        mode = self._mode(payload)
+        return await self.batcher.analyze(self._student_attempts(payload), mode)
+
+    async def analyze_batch(self, payload: Dict) -> Dict:
+        """Analyze several students; results are keyed by student ID."""
+        mode = self._mode(payload)
+        students = payload.get('students')
+        if not isinstance(students, list) or not students:
+            raise RequestError(400, "'students' must be a non-empty list")
+
+        frames = [self._student_attempts(student) for student in students]
+        student_ids = [str(frame['Student_ID'].iloc[0]) for frame in frames]
+        duplicates = sorted({student_id for student_id in student_ids if student_ids.count(student_id) > 1})
+        if duplicates:
+            # Results are keyed by student ID, so a repeated ID would silently drop a result
+            raise RequestError(400, f"Duplicate student_id in 'students': {', '.join(duplicates)}")
+        analyses = await asyncio.gather(*(self.batcher.analyze(frame, mode) for frame in frames))
+        return {'results': {analysis['student_id']: analysis for analysis in analyses}}
+
+    async def recommendations(self, payload: Dict) -> Dict:
+        """Analyze one student and generate its recommendations."""
+        analysis = await self.analyze_student(payload)
+        return {
+            'student_id': analysis['student_id'],
+            'analysis': analysis,
+            'recommendations': self.engine.generate_recommendations(analysis),
+        }
+
+    def _mode(self, payload: Dict) -> str:
+        mode = payload.get('mode') or config.DETECTION_MODE
+        if mode not in self.detectors:
+            raise RequestError(400, f"Unknown mode '{mode}'; expected one of {', '.join(self.detectors)}")
+        return mode
+
+    def _student_attempts(self, payload: Dict) -> pd.DataFrame:
+        """Build and validate the attempts frame of one student request."""
+        import pandas as pd
+
+        if not isinstance(payload, dict):
+            raise RequestError(400, "Each student must be a JSON object")
+        student_id = payload.get('student_id')
+        if student_id is None:
+            raise RequestError(400, "'student_id' is required")
+        student_id = str(student_id)
+
+        rows = payload.get('attempts')
+        if rows is None:
+            if self.index is None:
+                raise RequestError(400, "'attempts' is required (no dataset loaded)")
+            if student_id not in self.index:
+                raise RequestError(404, f"Unknown student '{student_id}'")
+            return self.index.student_frame(student_id)
+
+        if not isinstance(rows, list) or not rows:
+            raise RequestError(400, "'attempts' must be a non-empty list")
+        try:
+            attempts = pd.DataFrame.from_records(rows, columns=ATTEMPT_COLUMNS)
+        except (TypeError, ValueError) as e:
+            raise RequestError(400, f"Invalid attempts: {e}")
+        attempts.insert(0, 'Student_ID', student_id)
+
+        is_valid, errors = DataValidator.validate_student_data(attempts)
+        if not is_valid:
+            raise RequestError(400, '; '.join(errors))
+        # Checked per request, so a bad row fails this request only, not its whole batch
+        invalid = np.flatnonzero(~DataValidator.valid_rows(attempts).to_numpy())
+        if len(invalid):
+            raise RequestError(400, f"Invalid attempts at positions {invalid[:10].tolist()}: every row needs "
+                                    f"Question_ID, Topic, Correct (0 or 1) and a non-negative Time_Taken")
+        return attempts.astype({'Question_ID': str, 'Topic': str})
+
+
+def _json_default(value):
+    """Convert numpy scalars for json.dumps."""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_response(status: int, body: Dict, keep_alive: bool = True) -> bytes:
+    """Render an HTTP/1.1 JSON response."""
+    content = json.dumps(body, default=_json_default).encode('utf-8')
+    headers = (
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(content)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return headers.encode('latin-1') + content
+
+
+async def _read_request(reader: asyncio.StreamReader,
+                        max_body_bytes: int) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """
+    Read one HTTP request from a connection.
+
+    Returns:
+        Tuple of (method, path, headers, body), or None when the client closed
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise RequestError(400, "Malformed request line")
+
+    headers = {'_version': version}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise RequestError(400, "Invalid Content-Length")
+    if length < 0:
+        raise RequestError(400, "Invalid Content-Length")
+    if length > max_body_bytes:
+        raise RequestError(413, f"Request body exceeds {max_body_bytes} bytes")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), path, headers, body
+
+
+async def _serve_connection(service: AnalysisService,
+                            reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+    """Serve requests on one keep-alive connection."""
+    try:
+        while True:
+            try:
+                request = await _read_request(reader, service.max_body_bytes)
+            except RequestError as e:
+                writer.write(encode_response(e.status, {'error': str(e)}, keep_alive=False))
+                break
+            if request is None:
+                break
+
+            method, path, headers, body = request
+            keep_alive = (headers.get('connection', '').lower() != 'close'
+                          and headers['_version'] != 'HTTP/1.0')
+            status, response = await service.handle(method, path, body)
+            writer.write(encode_response(status, response, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(service: AnalysisService, host: str, port: int) -> asyncio.AbstractServer:
+    """
+    Start listening for requests.
+
+    Args:
+        service: Request handler
+        host: Interface to bind
+        port: TCP port (0 picks a free port)
+
+    Returns:
+        The running asyncio server
+    """
+    return await asyncio.start_server(
+        lambda reader, writer: _serve_connection(service, reader, writer),
+        host, port
+    )
+
+
+def main():
+    settings = config.SERVICE
+    parser = argparse.ArgumentParser(description="EDU-SENSE headless analysis service")
+    parser.add_argument('--host', default=settings['host'], help="Interface to bind")
+    parser.add_argument('--port', type=int, default=settings['port'], help="TCP port")
+    parser.add_argument('--data', help="Attempts file to answer requests without 'attempts'")
+    args = parser.parse_args()
+
+    data = None
+    if args.data:
+        from data_loader import load_attempts
+        data = load_attempts(args.data)
+        print(f"Loaded {len(data):,} attempts from {args.data}")
+
+    # Long-running server: pay the pandas import now, not on the first request
+    import pandas  # noqa: F401
+
+    async def run():
+        server = await serve(AnalysisService(data), args.host, args.port)
+        print(f"EDU-SENSE service listening on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Read-only attempt tables shared by every Streamlit session.
+Streamlit runs sessions as threads of one process, so a dataset cached with
+st.cache_resource is already held once; freeze() makes that single copy
+safe to share by marking its arrays read-only, and session_view() gives a
+session a copy-on-write view it may modify without affecting anyone else.
+The pages store a session view, never the cached frame itself, since a
+frozen frame still accepts new columns.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def enable_copy_on_write() -> None:
+    """Make derived frames copy their data on first write (pandas Copy-on-Write)."""
+    import pandas as pd
+    pd.set_option('mode.copy_on_write', True)
+
+
+def freeze(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Prepare a DataFrame for concurrent read-only use, in place.
+    Blocks are consolidated up front (pandas may otherwise consolidate
+    lazily during a read, which is not safe while other threads read the
+    same frame) and every NumPy buffer is marked read-only, so an in-place
+    write raises instead of changing the data other sessions see.
+    Adding columns is not prevented, and once views of the frame exist
+    Copy-on-Write copies on a write instead of raising, so sessions must
+    hold a session_view(), never the frame itself.
+
+    This reaches into pandas internals (DataFrame._consolidate_inplace,
+    the BlockManager's blocks and the `_ndarray` of NDArray-backed
+    extension arrays) as of pandas 2.x, the version requirements.txt pins;
+    re-check it when upgrading pandas.
+
+    Args:
+        data: Attempts DataFrame about to be shared
+
+    Returns:
+        The same DataFrame
+    """
+    data._consolidate_inplace()
+    for block in data._mgr.blocks:
+        # Categorical codes and datetime values sit in a wrapped ndarray
+        values = getattr(block.values, '_ndarray', block.values)
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+    return data
+
+
+def session_view(data: pd.DataFrame, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    A session's own view of a shared DataFrame.
+    Without rows this is a shallow copy (no data copied); with Copy-on-Write
+    enabled, writing to it copies only the modified columns.
+
+    Args:
+        data: Shared (frozen) DataFrame
+        rows: Optional row positions to keep (e.g. a per-session filter)
+
+    Returns:
+        DataFrame that can be modified without affecting the shared one
+    """
+    if rows is None:
+        return data.copy(deep=False)
+    return data.take(rows)
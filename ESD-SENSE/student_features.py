@@ -0,0 +1,126 @@
+"""
+Per-student behavior features for the whole cohort.
+One row per student: overall accuracy, time coefficient of variation,
+learning velocity, engagement (attempts per day) and accuracy per topic,
+computed with a few bincounts over the attempt table instead of a
+per-student loop.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+BASE_FEATURES = ['accuracy', 'time_cv', 'velocity', 'engagement']
+TOPIC_PREFIX = 'topic_accuracy:'
+
+
+def topic_feature(topic: str) -> str:
+    """Feature name of a topic's accuracy."""
+    return f'{TOPIC_PREFIX}{topic}'
+
+
+def student_features(attempts_df: pd.DataFrame, topics: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Feature matrix of every student in an attempt table.
+
+    Velocity follows PerformanceMetrics.calculate_learning_velocity (change
+    in rolling-window accuracy per window step, 0 below 3 attempts) and
+    engagement is the attempts-per-day rate behind
+    PerformanceMetrics.get_engagement_level. A topic the student has not
+    attempted gets their overall accuracy, so it never looks unusual.
+
+    Args:
+        attempts_df: DataFrame with Student_ID, Correct, Time_Taken and
+            optionally Topic and Timestamp
+        topics: Topics to add accuracy columns for (default: every topic
+            in attempts_df, sorted)
+
+    Returns:
+        Float DataFrame indexed by Student_ID (as strings), columns
+        BASE_FEATURES followed by one topic_feature() column per topic
+    """
+    import pandas as pd
+
+    student_codes, student_ids = pd.factorize(attempts_df['Student_ID'])
+    num_students = len(student_ids)
+    correct = (attempts_df['Correct'] == 1).to_numpy(dtype=np.float64)
+    times = attempts_df['Time_Taken'].to_numpy(dtype=np.float64)
+
+    def per_student(weights=None):
+        return np.bincount(student_codes, weights=weights, minlength=num_students)
+
+    attempts = per_student()
+    accuracy = per_student(correct) / attempts
+    mean_time = per_student(times) / attempts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        time_std = np.sqrt(per_student((times - mean_time[student_codes]) ** 2) / (attempts - 1))
+        time_cv = np.where((attempts > 1) & (mean_time > 0), time_std / mean_time, 0.0)
+
+    # Attempts of each student in time order, as one contiguous run per student
+    has_timestamps = 'Timestamp' in attempts_df.columns
+    if has_timestamps:
+        stamps = attempts_df['Timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        order = np.lexsort((stamps, student_codes))
+    else:
+        order = np.argsort(student_codes, kind='stable')
+    counts = attempts.astype(np.int64)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    cumulative = np.concatenate([[0.0], np.cumsum(correct[order])])
+
+    # Velocity: (last window accuracy - first window accuracy) / (windows - 1)
+    window = np.maximum(3, counts // 3)
+    steps = counts - window
+    valid = (counts >= 3) & (steps > 0)
+    safe_window = np.where(valid, window, 0)
+    first = cumulative[starts + safe_window] - cumulative[starts]
+    last = cumulative[starts + counts] - cumulative[starts + counts - safe_window]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        velocity = np.where(valid, (last - first) / window / steps, 0.0)
+
+    # Engagement: attempts per whole day between first and last attempt
+    if has_timestamps:
+        span_ns = np.maximum.reduceat(stamps[order], starts) - np.minimum.reduceat(stamps[order], starts)
+        days = span_ns // (86_400 * 10**9)
+        engagement = np.where(days > 0, attempts / np.maximum(days, 1), attempts)
+    else:
+        engagement = attempts.copy()
+
+    features = {
+        'accuracy': accuracy,
+        'time_cv': time_cv,
+        'velocity': velocity,
+        'engagement': engagement,
+    }
+
+    if 'Topic' in attempts_df.columns:
+        topic_codes, observed_topics = pd.factorize(attempts_df['Topic'])
+        observed_topics = [str(topic) for topic in observed_topics]
+        if topics is None:
+            topics = sorted(observed_topics)
+        # Null topics (code -1) would alias another student's pair; they count towards no topic
+        known = topic_codes >= 0
+        pair = student_codes[known].astype(np.int64) * len(observed_topics) + topic_codes[known]
+        size = num_students * len(observed_topics)
+        pair_attempts = np.bincount(pair, minlength=size).reshape(num_students, -1)
+        pair_correct = np.bincount(pair, weights=correct[known], minlength=size).reshape(num_students, -1)
+        column_of = {topic: position for position, topic in enumerate(observed_topics)}
+        for topic in topics:
+            position = column_of.get(str(topic))
+            if position is None:
+                features[topic_feature(topic)] = accuracy
+                continue
+            seen = pair_attempts[:, position] > 0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                features[topic_feature(topic)] = np.where(
+                    seen, pair_correct[:, position] / pair_attempts[:, position], accuracy)
+    else:
+        for topic in topics or []:
+            features[topic_feature(topic)] = accuracy
+
+    return pd.DataFrame(features, index=pd.Index(student_ids.astype(str), name='Student_ID'))
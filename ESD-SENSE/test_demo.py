@@ -3,14 +3,51 @@ Testing and demo script for EDU-SENSE.
 Run this to test the system without using Streamlit UI.
 """
 
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import subprocess
 import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, deque
+import joblib
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Import components
+import benchmark
+import config
+import data_loader
+import edu_sense
+import instrumentation
+import memory_profile
+from aggregates import CohortAggregates, week_numbers
+from attempt_index import AttemptIndex
+from anomaly import ProfileAnomalyDetector
+from change_feed import diff_gap_tables, gap_table
+from clustering import StudentClusters
 from gap_detector import LearningGapDetector
-from data_generator import generate_synthetic_data
+from data_generator import generate_synthetic_data, generate_large_dataset
+from data_loader import dataset_fingerprint, file_fingerprint, load_attempts
+from baselines import CohortBaselines
+from co_errors import CoErrorMiner
+from incremental import IncrementalDetector
+from peers import PeerIndex
+from ingestion import ATTEMPT_FIELDS, IngestionPipeline
+from quantile_sketch import QuantileSketches
+from result_store import AnalysisStore
+from scheduler import WorkStealingQueues
+from time_travel import TimeTravelIndex
 from recommendation_engine import RecommendationEngine
+from service import ATTEMPT_COLUMNS, AnalysisService, MicroBatcher
+from shared_data import enable_copy_on_write, freeze, session_view
 from utils import AnalysisUtils, ReportGenerator, PerformanceMetrics
 
 
@@ -166,6 +203,1347 @@ def compare_students(data):
     return comparison_df
 
 
+def test_data_loading(data):
+    """Test typed loading of CSV, Parquet and JSONL attempt files and the Arrow cache."""
+    print_header("TEST 7: DATA LOADING")
+    
+    # JSON timestamps are epoch milliseconds, so write millisecond times to every format
+    source = data.drop(columns=['Profile']).assign(Timestamp=data['Timestamp'].dt.floor('ms'))
+    cache_reads = []
+    read_arrow_cache = data_loader._read_arrow_cache
+    
+    def counting_read(cache_path):
+        cache_reads.append(cache_path)
+        return read_arrow_cache(cache_path)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {
+            'CSV': os.path.join(tmp_dir, 'attempts.csv'),
+            'Parquet': os.path.join(tmp_dir, 'attempts.parquet'),
+            'JSONL': os.path.join(tmp_dir, 'attempts.jsonl'),
+        }
+        source.to_csv(paths['CSV'], index=False)
+        source.to_parquet(paths['Parquet'], index=False)
+        source.to_json(paths['JSONL'], orient='records', lines=True)
+        
+        cache_dir = config.DATA_LOADING['cache_dir']
+        config.DATA_LOADING['cache_dir'] = os.path.join(tmp_dir, 'cache')
+        data_loader._read_arrow_cache = counting_read
+        try:
+            for name, path in paths.items():
+                start = time.perf_counter()
+                loaded = load_attempts(path, use_cache=False)
+                load_time = time.perf_counter() - start
+                
+                dtypes = {column: str(dtype) for column, dtype in loaded.dtypes.items()}
+                expected = {column: dtype for column, dtype in data_loader.ATTEMPT_SCHEMA.items()
+                            if column in source.columns and column != 'Timestamp'}
+                if any(dtypes[column] != dtype for column, dtype in expected.items()) or \
+                        not pd.api.types.is_datetime64_any_dtype(loaded['Timestamp']):
+                    raise AssertionError(f"{name} loaded with dtypes {dtypes}")
+                if loaded['Student_ID'].astype(str).tolist() != source['Student_ID'].astype(str).tolist() or \
+                        not np.array_equal(loaded['Correct'], source['Correct']) or \
+                        not np.allclose(loaded['Time_Taken'], source['Time_Taken'], rtol=1e-6) or \
+                        not np.array_equal(loaded['Timestamp'].to_numpy(dtype='datetime64[ns]'),
+                                           source['Timestamp'].to_numpy(dtype='datetime64[ns]')):
+                    raise AssertionError(f"{name} values differ from the written frame")
+                
+                load_attempts(path, use_cache=True)
+                reads = len(cache_reads)
+                cached = load_attempts(path, use_cache=True)
+                if len(cache_reads) != reads + 1:
+                    raise AssertionError(f"{name} reload did not read the Arrow cache")
+                pd.testing.assert_frame_equal(cached, loaded)
+                print(f"✓ {name}: {len(loaded)} attempts in {load_time*1000:.1f} ms, "
+                      f"schema dtypes, cached reload identical")
+        finally:
+            data_loader._read_arrow_cache = read_arrow_cache
+            config.DATA_LOADING['cache_dir'] = cache_dir
+        
+        projected = load_attempts(paths['CSV'], columns=['Student_ID', 'Correct'], use_cache=False)
+        if list(projected.columns) != ['Student_ID', 'Correct']:
+            raise AssertionError(f"column projection returned {list(projected.columns)}")
+        print(f"✓ Column projection: {list(projected.columns)}")
+        
+        # Timestamp is optional
+        untimed_path = os.path.join(tmp_dir, 'untimed.csv')
+        data.drop(columns=['Profile', 'Timestamp']).to_csv(untimed_path, index=False)
+        untimed = load_attempts(untimed_path, use_cache=False)
+        if 'Timestamp' in untimed.columns or len(untimed) != len(data):
+            raise AssertionError(f"CSV without Timestamp loaded as {list(untimed.columns)}")
+        print(f"✓ CSV without a Timestamp column: {len(untimed)} attempts")
+        
+        loaded = load_attempts(paths['CSV'], use_cache=False)
+        detector = LearningGapDetector()
+        student_id = data['Student_ID'].iloc[0]
+        results = detector.analyze_student(loaded[loaded['Student_ID'] == student_id])
+        print(f"✓ Analysis on loaded data for {student_id}: {results['accuracy']:.1%} accuracy")
+    
+    return loaded
+
+
+def test_import_budget():
+    """Test cold-start import time of the non-UI entry points."""
+    print_header("TEST 8: IMPORT BUDGET")
+    
+    heavy_modules = ['pandas', 'streamlit', 'plotly', 'matplotlib', 'sklearn']
+    probe = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import {module}\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        f"print(json.dumps([elapsed, [m for m in {heavy_modules!r} if m in sys.modules]]))"
+    )
+    here = os.path.dirname(os.path.abspath(__file__))
+    
+    for module, budget_ms in config.IMPORT_BUDGETS_MS.items():
+        # Best of three fresh interpreters to smooth out disk cache noise
+        timings = []
+        for _ in range(3):
+            output = subprocess.run([sys.executable, '-c', probe.format(module=module)],
+                                    cwd=here, capture_output=True, text=True, check=True).stdout
+            elapsed, loaded = json.loads(output.strip().splitlines()[-1])
+            timings.append(elapsed)
+        
+        if loaded:
+            raise AssertionError(f"import {module} pulled in {', '.join(loaded)}")
+        if min(timings) > budget_ms:
+            raise AssertionError(f"import {module} took {min(timings):.0f} ms (budget {budget_ms} ms)")
+        print(f"✓ import {module}: {min(timings):.0f} ms (budget {budget_ms} ms, no heavy modules)")
+
+
+def test_cohort_analysis(data):
+    """Test that the vectorized cohort analysis matches per-student analysis."""
+    print_header("TEST 9: COHORT ANALYSIS")
+    
+    # Blank out some topics, including the first attempt of the first student
+    data = data.copy()
+    data['Topic'] = data['Topic'].astype(object).where(data.index % 7 != 0, None)
+    print(f"Attempts with no topic: {data['Topic'].isna().sum()}")
+    
+    detector = LearningGapDetector()
+    cohort = detector.analyze_cohort(data)
+    for student_id, student_data in data.groupby('Student_ID', sort=False):
+        expected = detector.analyze_student(student_data)
+        got = cohort[str(student_id)]
+        expected_gaps = {name: gap['affected_questions'] for name, gap in expected['gaps'].items()}
+        got_gaps = {name: gap['affected_questions'] for name, gap in got['gaps'].items()}
+        if got_gaps != expected_gaps or got['total_attempts'] != expected['total_attempts']:
+            raise AssertionError(f"{student_id}: cohort gaps {got_gaps} != per-student gaps {expected_gaps}")
+    print(f"✓ analyze_cohort matches analyze_student for {len(cohort)} students")
+    
+    # As-of analysis must match analyzing only the attempts up to the date
+    cutoff = data['Timestamp'].quantile(0.6)
+    as_of = TimeTravelIndex(data, detector).cohort_as_of(cutoff)
+    for student_id, expected in detector.analyze_cohort(data[data['Timestamp'] <= cutoff]).items():
+        expected_gaps = {name: gap['affected_questions'] for name, gap in expected['gaps'].items()}
+        got_gaps = {name: gap['affected_questions'] for name, gap in as_of[student_id]['gaps'].items()}
+        if got_gaps != expected_gaps:
+            raise AssertionError(f"{student_id}: as-of gaps {got_gaps} != gaps of earlier attempts {expected_gaps}")
+    print(f"✓ TimeTravelIndex.cohort_as_of matches analyzing attempts up to {cutoff:%Y-%m-%d}")
+
+
+def test_quantile_sketches(data):
+    """Test sketch quantiles against exact ones and timing-rule checkpoints."""
+    print_header("TEST 10: QUANTILE SKETCHES")
+    
+    student_codes, students = pd.factorize(data['Student_ID'])
+    times = data['Time_Taken'].to_numpy(dtype=np.float64)
+    sketches = QuantileSketches(len(students))
+    sketches.update(student_codes, times)
+    for q in (0.1, 0.5, 0.9):
+        exact = np.array([np.quantile(times[student_codes == i], q, method='lower')
+                          for i in range(len(students))])
+        error = np.max(np.abs(sketches.quantile(q) - exact) / exact)
+        if error > sketches.relative_accuracy:
+            raise AssertionError(f"P{q * 100:.0f} off by {error:.1%} (allowed {sketches.relative_accuracy:.0%})")
+        print(f"✓ P{q * 100:.0f} per student within {error:.1%} of exact "
+              f"(allowed {sketches.relative_accuracy:.0%})")
+    
+    half = len(times) // 2
+    first, second = QuantileSketches(len(students)), QuantileSketches(len(students))
+    first.update(student_codes[:half], times[:half])
+    second.update(student_codes[half:], times[half:])
+    if not np.array_equal(first.merge(second).counts, sketches.counts):
+        raise AssertionError("merged sketches differ from one sketch of all attempts")
+    print("✓ Sketches of two halves merge into the sketch of all attempts")
+    
+    # A checkpoint restored under another configured rule keeps the rule it was built with
+    saved_rule = config.GAP_DETECTION['timing_rule']
+    try:
+        config.GAP_DETECTION['timing_rule'] = 'percentile'
+        detector = IncrementalDetector()
+        detector.update(data)
+        expected = detector.analyze_all()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            detector.checkpoint(os.path.join(tmp_dir, 'state'))
+            config.GAP_DETECTION['timing_rule'] = 'mean'
+            restored = IncrementalDetector.restore(os.path.join(tmp_dir, 'state'))
+        if restored.analyze_all() != expected:
+            raise AssertionError("restored 'percentile' checkpoint differs under timing_rule='mean'")
+    finally:
+        config.GAP_DETECTION['timing_rule'] = saved_rule
+    print(f"✓ 'percentile' checkpoint restored with its own rule ({len(expected)} students match)")
+
+
+def test_result_store(data):
+    """Test attempt deduplication and watermark-based re-analysis in the local store."""
+    print_header("TEST 11: RESULT STORE")
+    
+    attempts = data.drop(columns=['Profile'])
+    # Without Attempt_Number and Timestamp (NULL in the store) rows must still be stored once
+    keyless = attempts.drop(columns=['Attempt_Number', 'Timestamp']).drop_duplicates('Question_ID') \
+        .assign(Student_ID='STU_KEYLESS')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with AnalysisStore(os.path.join(tmp_dir, 'store.db')) as store:
+            for rows in (attempts, keyless):
+                inserted = store.add_attempts(rows)
+                reinserted = store.add_attempts(rows)
+                if inserted != len(rows) or reinserted != 0:
+                    raise AssertionError(f"stored {inserted} then {reinserted} of {len(rows)} attempts")
+                print(f"✓ Stored {inserted} attempts once; re-adding them stored {reinserted}")
+            attempts = store.load_attempts()
+            
+            analyzed = store.reanalyze()
+            if len(analyzed) != attempts['Student_ID'].nunique() or store.stale_students():
+                raise AssertionError("first run did not bring every student up to date")
+            print(f"✓ First run analyzed {len(analyzed)} students; none left stale")
+            
+            student_id = str(attempts['Student_ID'].iloc[0])
+            store.add_attempts(pd.DataFrame([{'Student_ID': student_id, 'Question_ID': 'Q_NEW',
+                                              'Topic': 'Algebra', 'Correct': 0, 'Time_Taken': 40.0}]))
+            if store.stale_students() != [student_id]:
+                raise AssertionError(f"stale after one new attempt: {store.stale_students()}")
+            rerun = store.reanalyze()
+            watermark = store.results_frame().set_index('student_id').loc[student_id, 'watermark']
+            if [record['student_id'] for record in rerun] != [student_id] or \
+                    watermark != store.watermarks([student_id])[student_id]:
+                raise AssertionError("re-analysis did not advance the student's watermark")
+            print(f"✓ A new attempt re-analyzed only {student_id} (watermark {watermark})")
+        
+        # Missing topics are stored as NULL and analyzed like analyze_cohort() does
+        untopiced = data.drop(columns=['Profile']).copy()
+        untopiced['Topic'] = untopiced['Topic'].astype(object).where(untopiced.index % 7 != 0, None)
+        with AnalysisStore(os.path.join(tmp_dir, 'untopiced.db')) as store:
+            store.add_attempts(untopiced)
+            stored_topics = store.load_attempts()['Topic']
+            records = store.reanalyze()
+        expected = LearningGapDetector().analyze_cohort(untopiced)
+        got = {record['student_id']: {gap['gap']: gap['affected_questions'] for gap in record['gaps']}
+               for record in records}
+        expected_gaps = {student_id: {name: gap['affected_questions'] for name, gap in analysis['gaps'].items()}
+                         for student_id, analysis in expected.items()}
+        if stored_topics.isna().sum() != untopiced['Topic'].isna().sum() or got != expected_gaps:
+            raise AssertionError("stored attempts with no topic analyze differently from analyze_cohort")
+        print(f"✓ {stored_topics.isna().sum()} attempts with no topic stored as NULL; "
+              f"re-analysis matches analyze_cohort")
+
+
+def test_change_feed():
+    """Test gap change events between two analysis runs."""
+    print_header("TEST 12: CHANGE FEED")
+    
+    def gap(severity):
+        return {'severity': severity, 'confidence': 0.5}
+    
+    previous = gap_table({
+        'S1': {'concept_gap_algebra': gap('medium'), 'speed_gap': gap('medium')},
+        'S2': {'confidence_gap': gap('high')},
+        'S3': {'concept_gap_geometry': gap('low')},
+    })
+    current = gap_table({
+        'S1': {'concept_gap_algebra': gap('high'), 'concept_gap_fractions': gap('low')},
+        'S2': {'confidence_gap': gap('medium')},
+    })
+    # S3 was not re-analyzed, so its gap is not reported as removed
+    events = diff_gap_tables(previous, current, students=['S1', 'S2'])
+    got = list(events[['student_id', 'gap', 'event']].itertuples(index=False, name=None))
+    expected = [
+        ('S1', 'concept_gap_algebra', 'escalated'),
+        ('S1', 'concept_gap_fractions', 'added'),
+        ('S1', 'speed_gap', 'removed'),
+        ('S2', 'confidence_gap', 'de-escalated'),
+    ]
+    if got != expected:
+        raise AssertionError(f"events {got} != {expected}")
+    for student_id, gap_name, event in got:
+        print(f"✓ {student_id} {gap_name}: {event}")
+    
+    # Changes are diffed against stored results, so --changes without --store is rejected
+    with contextlib.redirect_stderr(io.StringIO()) as stderr:
+        try:
+            edu_sense.main(['analyze', 'attempts.csv', '--changes', 'changes.jsonl'])
+        except SystemExit as e:
+            rejected = e.code == 2
+        else:
+            rejected = False
+    if not rejected:
+        raise AssertionError("analyze --changes without --store was accepted")
+    print(f"✓ {stderr.getvalue().strip().splitlines()[-1]}")
+
+
+def test_checkpoint_restore(data):
+    """Test incremental checkpoints, event-log replay and segment pruning."""
+    print_header("TEST 13: CHECKPOINT RESTORE")
+    
+    parts = [data.iloc[rows] for rows in np.array_split(np.arange(len(data)), 3)]
+    
+    def expected(num_parts):
+        reference = IncrementalDetector()
+        for part in parts[:num_parts]:
+            reference.update(part)
+        return reference.analyze_all()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state = os.path.join(tmp_dir, 'state')
+        log_path = os.path.join(tmp_dir, 'log', 'events.jsonl')
+        detector = IncrementalDetector.restore(state, log_path=log_path)
+        detector.update(parts[0])
+        detector.checkpoint(state)
+        detector.update(parts[1])
+        detector.log.close()
+        
+        # Attempts logged after the checkpoint are replayed on restore
+        restored = IncrementalDetector.restore(state, log_path=log_path)
+        if restored.analyze_all() != expected(2):
+            raise AssertionError("restored detector differs from one that saw every attempt")
+        print(f"✓ Restore replayed {len(parts[1])} logged attempts ({len(restored)} students match)")
+        
+        restored.checkpoint(state)
+        segments = restored.log.segments()
+        if len(segments) != 1 or os.path.getsize(restored.log.segment_path(segments[0])) != 0:
+            raise AssertionError(f"log segments {segments} left after checkpoint")
+        print(f"✓ Checkpoint pruned applied log segments (kept empty segment {segments[0]})")
+        restored.update(parts[2])
+        restored.log.close()
+        
+        # The log's position does not depend on its path, so a moved log is not replayed twice
+        os.rename(os.path.join(tmp_dir, 'log'), os.path.join(tmp_dir, 'moved'))
+        moved = IncrementalDetector.restore(state, log_path=os.path.join(tmp_dir, 'moved', 'events.jsonl'))
+        moved.log.close()
+        if moved.events_applied != len(data) or moved.analyze_all() != expected(3):
+            raise AssertionError(f"restore from a moved log applied {moved.events_applied} of {len(data)} attempts")
+        print(f"✓ Restore from a moved log applied each of {moved.events_applied} attempts once")
+        
+        # A crash between checkpoint()'s two renames leaves only the previous snapshot in .old
+        os.replace(state, state + '.old')
+        interrupted = IncrementalDetector.restore(state, log_path=os.path.join(tmp_dir, 'moved', 'events.jsonl'))
+        interrupted.log.close()
+        if interrupted.analyze_all() != expected(3):
+            raise AssertionError("restore without the snapshot directory did not use the .old snapshot")
+        print("✓ Restore after an interrupted checkpoint fell back to the previous snapshot")
+        
+        # Attempts with no topic count for the student but never as a topic
+        untopiced = data.copy()
+        untopiced['Topic'] = untopiced['Topic'].astype(object).where(untopiced.index % 7 != 0, None)
+        state = os.path.join(tmp_dir, 'untopiced')
+        log_path = os.path.join(tmp_dir, 'untopiced-log', 'events.jsonl')
+        detector = IncrementalDetector.restore(state, log_path=log_path)
+        detector.update(untopiced.iloc[:100])
+        detector.checkpoint(state)
+        detector.update(untopiced.iloc[100:])
+        detector.log.close()
+        restored = IncrementalDetector.restore(state, log_path=log_path)
+        restored.log.close()
+        got = {student_id: (analysis['total_attempts'],
+                            {name: gap['affected_questions'] for name, gap in analysis['gaps'].items()})
+               for student_id, analysis in restored.analyze_all().items()}
+        cohort = {student_id: (analysis['total_attempts'],
+                               {name: gap['affected_questions'] for name, gap in analysis['gaps'].items()})
+                  for student_id, analysis in LearningGapDetector().analyze_cohort(untopiced).items()}
+        if got != cohort:
+            raise AssertionError("incremental analysis of attempts with no topic differs from analyze_cohort")
+        print(f"✓ {untopiced['Topic'].isna().sum()} attempts with no topic: restored detector "
+              f"matches analyze_cohort")
+
+
+def test_co_errors(data):
+    """Test sparse co-error counts and lift against brute-force set intersections."""
+    print_header("TEST 14: CO-ERRORS")
+    
+    missed = data.loc[data['Correct'] == 0, ['Student_ID', 'Question_ID']].astype(str)
+    students_missing = missed.groupby('Question_ID')['Student_ID'].apply(set)
+    num_students = data['Student_ID'].nunique()
+    expected = {}
+    for question, students in students_missing.items():
+        for other, other_students in students_missing.items():
+            co_errors = len(students & other_students)
+            if other != question and co_errors >= 2:
+                expected[(question, other)] = (co_errors, co_errors * num_students /
+                                               (len(students) * len(other_students)))
+    
+    # Small blocks so the blocked product covers several row blocks
+    miner = CoErrorMiner(min_co_errors=2, top_n=len(students_missing), block_size=7).fit(data)
+    pairs = miner.associations()
+    got = {(row.question, row.associated_question): (row.co_errors, row.lift)
+           for row in pairs.itertuples(index=False)}
+    if got.keys() != expected.keys() or any(
+            got[pair][0] != expected[pair][0] or not np.isclose(got[pair][1], expected[pair][1])
+            for pair in expected):
+        raise AssertionError("co-error counts or lift differ from brute force")
+    print(f"✓ {len(got):,} question pairs match brute-force co-error counts and lift")
+    
+    top = CoErrorMiner(min_co_errors=2, top_n=5).fit(data)
+    top_pairs = top.associations()
+    for question in students_missing.index:
+        best = sorted((lift for (q, _), (_, lift) in expected.items() if q == question), reverse=True)[:5]
+        listed = top_pairs.loc[top_pairs['question'] == question, 'lift'].to_numpy()
+        single = top.for_question(question)['lift'].to_numpy()
+        if not (np.allclose(listed, best) and np.allclose(single, best)):
+            raise AssertionError(f"top associations of {question} differ from brute force")
+    print(f"✓ Top 5 by lift match brute force for all {len(students_missing)} missed questions "
+          f"(associations and for_question)")
+    
+    # Attempts without a student or question ID are skipped instead of failing the fit
+    blanked = data.copy()
+    first_wrong, second_wrong = blanked.index[blanked['Correct'] == 0][:2]
+    blanked['Question_ID'] = blanked['Question_ID'].astype(object).where(blanked.index != first_wrong, None)
+    blanked['Student_ID'] = blanked['Student_ID'].astype(object).where(blanked.index != second_wrong, None)
+    kept = blanked[blanked['Question_ID'].notna() & blanked['Student_ID'].notna()]
+    def pair_counts(frame):
+        pairs = CoErrorMiner(min_co_errors=2, top_n=len(students_missing)).fit(frame).associations()
+        return set(pairs[['question', 'associated_question', 'co_errors']].itertuples(index=False, name=None))
+    
+    if pair_counts(blanked) != pair_counts(kept):
+        raise AssertionError("attempts with missing IDs changed the co-error counts")
+    print("✓ Wrong attempts with a missing student or question ID are skipped")
+
+
+def test_cohort_baselines(data):
+    """Test that incremental and merged baselines match baselines of all attempts."""
+    print_header("TEST 15: COHORT BASELINES")
+    
+    expected = CohortBaselines.from_data(data)
+    parts = [data.iloc[rows] for rows in np.array_split(np.arange(len(data)), 4)]
+    updated = CohortBaselines()
+    for part in parts:
+        updated.update(part)
+    merged = CohortBaselines.from_data(parts[0])
+    for part in parts[1:]:
+        merged.merge(CohortBaselines.from_data(part))
+    
+    for name, baselines in (('update()', updated), ('merge()', merged)):
+        for table in ('topic_table', 'question_table'):
+            got = getattr(baselines, table)().sort_index()
+            want = getattr(expected, table)().sort_index()
+            if not (got.index.equals(want.index) and np.allclose(
+                    got[['attempts', 'accuracy', 'mean_time', 'std_time']].to_numpy(),
+                    want[['attempts', 'accuracy', 'mean_time', 'std_time']].to_numpy(), equal_nan=True)):
+                raise AssertionError(f"{table} after {name} over {len(parts)} batches differs from from_data")
+        print(f"✓ {name} over {len(parts)} batches matches from_data "
+              f"({len(expected.topic_sums)} topics, {len(expected.question_sums)} questions)")
+
+
+def test_student_groups(data):
+    """Test incremental student groups (partial_fit per batch) and group plans."""
+    print_header("TEST 16: STUDENT GROUPS")
+    
+    clusters = StudentClusters(n_clusters=3)
+    relabeled = set()
+    for rows in np.array_split(np.arange(len(data)), 5):
+        last_batch = clusters.update(data.iloc[rows])
+        relabeled.update(last_batch)
+    labels = clusters.labels
+    students = set(data['Student_ID'].astype(str))
+    if set(labels.index) != students or relabeled != students or not labels.between(0, 2).all():
+        raise AssertionError(f"after 5 batches labels are {labels.to_dict()}")
+    # Students of the last batch were moved to their nearest updated centroid
+    rows = np.array([clusters.student_ids.index(student_id) for student_id in last_batch])
+    if not np.array_equal(clusters.model.predict(clusters._embed(rows)), labels.iloc[rows].to_numpy()):
+        raise AssertionError("last batch's labels do not match the updated centroids")
+    print(f"✓ update() over 5 batches grouped all {len(labels)} students: "
+          f"{labels.value_counts().sort_index().tolist()}")
+    
+    detector = LearningGapDetector()
+    engine = RecommendationEngine()
+    recommendations = {student_id: engine.generate_recommendations(analysis)
+                       for student_id, analysis in detector.analyze_cohort(data).items()}
+    groups = clusters.group_recommendations(recommendations)
+    members = [student_id for group in groups for student_id in group['students']]
+    if sorted(members) != sorted(students):
+        raise AssertionError("groups do not partition the students")
+    for group in groups:
+        for plan in group['recommendations']:
+            having = sum(plan['title'] in {rec['title'] for rec in recommendations[student_id]}
+                         for student_id in group['students'])
+            if plan['students'] != having or not np.isclose(plan['share'], having / group['analyzed']):
+                raise AssertionError(f"group {group['group']}: '{plan['title']}' counted for "
+                                     f"{plan['students']} students, recommended to {having}")
+        print(f"✓ Group {group['group']}: {len(group['students'])} students, "
+              f"top plan {group['recommendations'][0]['title'] if group['recommendations'] else None}")
+
+
+def test_service(data):
+    """Test request micro-batching, per-request error isolation and batch payload checks."""
+    print_header("TEST 17: SERVICE")
+    
+    detector = LearningGapDetector()
+    frames = [student_df.reset_index(drop=True) for _, student_df in data.groupby('Student_ID', observed=True)]
+    bad = frames[1].assign(Time_Taken='slow')
+    requests = [frames[0], bad, frames[2], frames[0], frames[3]]
+    
+    async def submit(batcher):
+        return await asyncio.gather(*(batcher.analyze(frame, 'standard') for frame in requests),
+                                    return_exceptions=True)
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        batcher = MicroBatcher({'standard': detector}, executor, max_batch_size=len(requests), max_wait_ms=1000)
+        results = asyncio.run(submit(batcher))
+    if batcher.batches != 1 or batcher.students != len(requests):
+        raise AssertionError(f"{len(requests)} requests ran as {batcher.batches} batches")
+    if not isinstance(results[1], ValueError):
+        raise AssertionError(f"bad frame returned {results[1]!r}")
+    for frame, result in zip(requests, results):
+        if frame is bad:
+            continue
+        expected = detector.analyze_student(frame)
+        if isinstance(result, BaseException) or result['student_id'] != str(expected['student_id']) or \
+                result['total_attempts'] != expected['total_attempts'] or \
+                result['gaps'].keys() != expected['gaps'].keys() or \
+                not np.isclose(result['overall_score'], expected['overall_score']):
+            raise AssertionError(f"batched result for {expected['student_id']} differs: {result!r}")
+    print(f"✓ {len(requests)} requests coalesced into 1 batch; the bad frame failed alone "
+          f"({type(results[1]).__name__}), the others match analyze_student")
+    
+    def student(student_id):
+        rows = data.loc[data['Student_ID'] == student_id, ATTEMPT_COLUMNS].to_dict('records')
+        return {'student_id': student_id, 'attempts': rows}
+    
+    def post(service, payload):
+        return asyncio.run(service.handle('POST', '/analyze-batch', json.dumps(payload).encode()))
+    
+    first, second = sorted(data['Student_ID'].astype(str).unique())[:2]
+    service = AnalysisService(data, max_wait_ms=1)
+    try:
+        status, response = post(service, {'students': [student(first), student(second)]})
+        if status != 200 or set(response['results']) != {first, second}:
+            raise AssertionError(f"batch request returned {status}: {response}")
+        status, response = post(service, {'students': [student(first), {'student_id': second}, student(first)]})
+        if status != 400 or first not in response['error']:
+            raise AssertionError(f"duplicate student_id returned {status}: {response}")
+        bad_row = {'Question_ID': 'Q1', 'Topic': 'Algebra', 'Correct': 2, 'Time_Taken': 5}
+        status, response = post(service, {'students': [student(first), {'student_id': second, 'attempts': [bad_row]}]})
+        if status != 400:
+            raise AssertionError(f"invalid attempt returned {status}: {response}")
+    finally:
+        service.executor.shutdown()
+    print(f"✓ /analyze-batch: 200 with one result per student, 400 for a repeated student_id "
+          f"and for an invalid attempt")
+
+
+def test_caching_layer(data):
+    """Test dataset fingerprints, the attempt index and the process-wide Streamlit caches."""
+    print_header("TEST 18: CACHING LAYER")
+    
+    fingerprint = dataset_fingerprint(data)
+    changed = data.copy()
+    changed.loc[changed.index[0], 'Time_Taken'] += 1
+    if dataset_fingerprint(data.copy()) != fingerprint or dataset_fingerprint(changed) == fingerprint:
+        raise AssertionError("dataset fingerprint does not follow the contents")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'attempts.csv')
+        data.to_csv(path, index=False)
+        before = file_fingerprint(path)
+        data.iloc[:-1].to_csv(path, index=False)
+        if file_fingerprint(path) == before:
+            raise AssertionError("file fingerprint did not change with the file")
+    print(f"✓ Fingerprints follow the dataset and file contents ({fingerprint})")
+    
+    index = AttemptIndex(data)
+    for student_id in data['Student_ID'].astype(str).unique():
+        pd.testing.assert_frame_equal(index.student_frame(student_id), data[data['Student_ID'] == student_id])
+    matching = sorted(s for s in data['Student_ID'].astype(str).unique() if s.startswith('STU_100'))
+    if index.search_students('STU_100') != matching or index.count_students('STU_100') != len(matching):
+        raise AssertionError(f"prefix search returned {index.search_students('STU_100')}")
+    print(f"✓ AttemptIndex.student_frame matches a boolean mask for all {len(index)} students")
+    
+    import streamlit.logger
+    streamlit.logger.set_log_level('error')
+    import app_cache
+    
+    cache_dir = config.DATA_LOADING['cache_dir']
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config.DATA_LOADING['cache_dir'] = tmp_dir
+        try:
+            first_key, first = app_cache.load_sample_dataset()
+            second_key, second = app_cache.load_sample_dataset()
+            if first is not second or first_key != second_key or first_key != dataset_fingerprint(first):
+                raise AssertionError("sample dataset was not shared between calls")
+            shared_index = app_cache.get_attempt_index(first_key, first)
+            if app_cache.get_attempt_index(first_key, first) is not shared_index:
+                raise AssertionError("attempt index was rebuilt for the same dataset")
+            student_id = shared_index.students()[0]
+            analysis = app_cache.analyze_student(first_key, 'standard', student_id, shared_index)
+            expected = LearningGapDetector('standard').analyze_student(shared_index.student_frame(student_id))
+            if analysis != app_cache.analyze_student(first_key, 'standard', student_id, shared_index) or \
+                    analysis['total_attempts'] != expected['total_attempts'] or \
+                    not np.isclose(analysis['accuracy'], expected['accuracy']):
+                raise AssertionError(f"cached analysis of {student_id} differs: {analysis}")
+        finally:
+            config.DATA_LOADING['cache_dir'] = cache_dir
+    print(f"✓ Sample dataset, attempt index and {student_id}'s analysis are computed once and shared")
+
+
+def test_cohort_aggregates(data):
+    """Test incrementally maintained dashboard metrics against a recompute."""
+    print_header("TEST 19: COHORT AGGREGATES")
+    
+    detector = LearningGapDetector()
+    ordered = data.sort_values('Timestamp', kind='stable')
+    aggregates = CohortAggregates()
+    for rows in np.array_split(np.arange(len(ordered)), 4):
+        stale = aggregates.add_attempts(ordered.iloc[rows])
+        analyses = detector.analyze_cohort(ordered.iloc[:rows[-1] + 1])
+        aggregates.apply_analyses({student_id: analyses[student_id] for student_id in stale})
+    
+    # Recompute every metric from the full table
+    analyses = detector.analyze_cohort(data)
+    weeks = pd.Series(week_numbers(data['Timestamp']), index=data.index).groupby(data['Student_ID'].astype(str))
+    first_week, last_week = weeks.min(), weeks.max()
+    week = int(last_week.max())
+    bands = {student_id: AnalysisUtils.get_risk_band(analysis) for student_id, analysis in analyses.items()}
+    
+    def rate(students):
+        return np.mean([bands[s] != 'on_track' for s in students]) if len(students) else 0.0
+    
+    expected = {
+        'total_students': len(analyses),
+        'analyzed_students': len(analyses),
+        'gaps_detected': sum(len(analysis['gaps']) for analysis in analyses.values()),
+        'risk_bands': {band: list(bands.values()).count(band) for band in ('high', 'medium', 'on_track')},
+        'intervention_rate': rate(list(bands)),
+        'new_students_this_week': int((first_week == week).sum()),
+        'gaps_this_week': sum(len(analyses[s]['gaps']) for s in last_week.index[last_week == week]),
+        'intervention_rate_delta': rate(last_week.index[last_week == week]) - rate(last_week.index[last_week == week - 1]),
+    }
+    for snapshot in (aggregates.snapshot(), CohortAggregates.from_data(data, analyses).snapshot()):
+        if snapshot.keys() != expected.keys() or any(
+                not np.isclose(snapshot[key], value) if isinstance(value, float) else snapshot[key] != value
+                for key, value in expected.items()):
+            raise AssertionError(f"aggregates {snapshot} != recompute {expected}")
+    print(f"✓ 4 batches with re-analysis match a recompute: {expected['gaps_detected']} gaps, "
+          f"bands {expected['risk_bands']}, {expected['new_students_this_week']} new this week")
+    
+    high = set(aggregates.students_in_bands(['high']))
+    if high != {s for s, band in bands.items() if band == 'high'}:
+        raise AssertionError(f"students_in_bands(['high']) returned {sorted(high)}")
+    print(f"✓ students_in_bands(['high']): {len(high)} students")
+
+
+def test_attempt_pagination(data):
+    """Test AttemptIndex.query filters, sorting and pages against pandas."""
+    print_header("TEST 20: ATTEMPT PAGINATION")
+    
+    index = AttemptIndex(data)
+    student_ids = data['Student_ID'].astype(str)
+    students = sorted(student_ids.unique().tolist())
+    topics = sorted(str(topic) for topic in data['Topic'].unique())[:2]
+    middle = data['Timestamp'].sort_values().iloc[len(data) // 2]
+    cases = [
+        {},
+        {'student_prefix': 'STU_100'},
+        {'topics': topics, 'sort_by': 'Time_Taken', 'ascending': False},
+        {'student_ids': students[::3], 'start': middle, 'sort_by': 'Timestamp'},
+        {'student_prefix': 'STU_10', 'end': middle, 'sort_by': 'Topic'},
+        {'sort_by': 'Correct', 'ascending': False},
+    ]
+    page_size = 7
+    for case in cases:
+        mask = student_ids.str.startswith(case.get('student_prefix', ''))
+        if 'topics' in case:
+            mask &= data['Topic'].isin(case['topics'])
+        if 'student_ids' in case:
+            mask &= student_ids.isin(case['student_ids'])
+        if 'start' in case:
+            mask &= data['Timestamp'] >= case['start']
+        if 'end' in case:
+            mask &= data['Timestamp'] <= case['end']
+        # Index order is students in ID order, each in row order
+        expected = data[mask].iloc[np.argsort(student_ids[mask].to_numpy(), kind='stable')]
+        if 'sort_by' in case:
+            expected = expected.sort_values(case['sort_by'], ascending=case.get('ascending', True), kind='stable')
+        
+        pages = []
+        for page in range(len(expected) // page_size + 2):
+            rows, total = index.query(**case, page=page, page_size=page_size)
+            if total != len(expected):
+                raise AssertionError(f"{case}: total {total}, pandas filter has {len(expected)}")
+            pages.append(rows)
+        if len(pages[-1]):
+            raise AssertionError(f"{case}: page past the end returned {len(pages[-1])} rows")
+        pd.testing.assert_frame_equal(pd.concat(pages), expected)
+        print(f"✓ {', '.join(case) or 'no filters'}: {len(expected)} rows over {len(pages) - 1} pages match pandas")
+
+
+def test_app_pages(data):
+    """Test lazily loaded pages and the student analysis fragment with Streamlit's AppTest."""
+    print_header("TEST 21: APP PAGES")
+    
+    import streamlit.logger
+    streamlit.logger.set_log_level('error')
+    from streamlit.testing.v1 import AppTest
+    
+    here = os.path.dirname(os.path.abspath(__file__))
+    app_path = os.path.join(here, 'app.py')
+    other_pages = [f"views.{name[:-3]}" for name in sorted(os.listdir(os.path.join(here, 'views')))
+                   if name.endswith('.py') and name not in ('__init__.py', 'dashboard.py')]
+    loaded_before = [module for module in other_pages if module in sys.modules]
+    
+    at = AppTest.from_file(app_path, default_timeout=60)
+    at.run()
+    at.button(key='load_data').click().run()
+    if at.exception:
+        raise AssertionError(f"dashboard raised: {at.exception[0].value}")
+    loaded = [module for module in other_pages if module in sys.modules and module not in loaded_before]
+    if loaded:
+        raise AssertionError(f"opening the dashboard imported {loaded}")
+    print(f"✓ Dashboard rendered without importing the other {len(other_pages)} page modules")
+    
+    pages = at.sidebar.radio[0].options
+    for name in pages:
+        at.sidebar.radio[0].set_value(name).run()
+        if at.exception:
+            raise AssertionError(f"page '{name}' raised: {at.exception[0].value}")
+    print(f"✓ All {len(pages)} pages render on the loaded dataset")
+    
+    at.sidebar.radio[0].set_value('Student Analysis').run()
+    student_id = at.selectbox(key='student_select').options[1]
+    at.selectbox(key='student_select').set_value(student_id).run()
+    at.button(key='analyze_btn').click().run()
+    analysis = at.session_state.analysis_results
+    expected = LearningGapDetector().analyze_student(data[data['Student_ID'] == student_id])
+    if at.exception or at.session_state.analyzed_student != student_id or \
+            analysis['total_attempts'] != expected['total_attempts'] or \
+            not np.isclose(analysis['accuracy'], expected['accuracy']):
+        raise AssertionError(f"analyzing {student_id} in the app gave {analysis}")
+    print(f"✓ Student Analysis: {student_id} analyzed in the fragment, "
+          f"{analysis['total_attempts']} attempts, {analysis['accuracy']:.1%} accuracy")
+
+
+def test_batch_cli(data):
+    """Test the offline analyze command: output rows, worker pool and exit codes."""
+    print_header("TEST 22: BATCH CLI")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, 'attempts.csv')
+        data.drop(columns=['Profile']).to_csv(csv_path, index=False)
+        jsonl_path = os.path.join(tmp_dir, 'results.jsonl')
+        parquet_path = os.path.join(tmp_dir, 'results.parquet')
+        
+        default_mode = config.DETECTION_MODE
+        code = edu_sense.main(['analyze', csv_path, '--out', jsonl_path, '--workers', '1',
+                               '--mode', 'early_detection', '--quiet'])
+        if config.DETECTION_MODE != default_mode:
+            raise AssertionError(f"--mode changed config.DETECTION_MODE to {config.DETECTION_MODE}")
+        with open(jsonl_path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        analyses = LearningGapDetector('early_detection').analyze_cohort(load_attempts(csv_path, use_cache=False))
+        if code != 0 or [record['student_id'] for record in records] != sorted(analyses):
+            raise AssertionError(f"analyze exited {code} with {len(records)} rows")
+        for record in records:
+            analysis = analyses[record['student_id']]
+            if record['mode'] != 'early_detection' or record['total_attempts'] != analysis['total_attempts'] or \
+                    not np.isclose(record['accuracy'], analysis['accuracy']) or \
+                    [gap['gap'] for gap in record['gaps']] != list(analysis['gaps']) or \
+                    record['risk_band'] != AnalysisUtils.get_risk_band(analysis):
+                raise AssertionError(f"row for {record['student_id']} differs from analyze_cohort")
+        print(f"✓ analyze --mode early_detection -> JSONL exited 0 with {len(records)} rows matching "
+              f"analyze_cohort (config.DETECTION_MODE still {default_mode})")
+        
+        code = edu_sense.main(['analyze', csv_path, '--out', parquet_path, '--workers', '2',
+                               '--chunk-size', '5', '--mode', 'early_detection', '--quiet'])
+        pooled = pd.read_parquet(parquet_path)
+        if code != 0 or pooled['student_id'].tolist() != [record['student_id'] for record in records] or \
+                pooled['num_gaps'].tolist() != [record['num_gaps'] for record in records]:
+            raise AssertionError(f"analyze on 2 workers exited {code} with different rows")
+        print(f"✓ analyze on 2 worker processes -> Parquet gives the same {len(pooled)} rows")
+        
+        unsupported = os.path.join(tmp_dir, 'attempts.txt')
+        with open(unsupported, 'w', encoding='utf-8') as f:
+            f.write('not attempts\n')
+        for path in (os.path.join(tmp_dir, 'missing.csv'), unsupported):
+            with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                code = edu_sense.main(['analyze', path, '--out', jsonl_path, '--workers', '1', '--quiet'])
+            if code != 1 or 'error:' not in stderr.getvalue():
+                raise AssertionError(f"analyze {os.path.basename(path)} exited {code}")
+            print(f"✓ analyze {os.path.basename(path)} exits 1: {stderr.getvalue().strip()[:70]}")
+
+
+def test_benchmark_suite():
+    """Test the scaling generator, benchmark history and regression comparison."""
+    print_header("TEST 23: BENCHMARK SUITE")
+    
+    large = generate_large_dataset(5000, attempts_per_student=17)
+    student_ids = large['Student_ID'].astype(str).to_numpy()
+    if len(large) != 5000 or (student_ids[1:] < student_ids[:-1]).any() or \
+            not isinstance(large['Student_ID'].dtype, pd.CategoricalDtype) or \
+            not set(large['Profile'].astype(str)) <= set(config.STUDENT_PROFILES):
+        raise AssertionError(f"generate_large_dataset(5000) gave {len(large)} rows: {large.dtypes.to_dict()}")
+    print(f"✓ generate_large_dataset: exactly 5,000 attempts for {large['Student_ID'].nunique()} students, "
+          f"sorted by student, categorical IDs")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        history_path = os.path.join(tmp_dir, 'history.json')
+        for label in ('before', 'after'):
+            benchmark.run([2000], label=label, track_memory=False, stages=['analyze_cohort'],
+                          history_path=history_path, verbose=False)
+        history = benchmark.load_history(history_path)
+    results = history[-1]['results']['2000']
+    if [record['label'] for record in history] != ['before', 'after'] or \
+            set(results) != {'generate_large_dataset', 'build_index', 'analyze_cohort', 'generate_recommendations'} or \
+            any(result['attempts'] != 2000 or result['seconds'] <= 0 for result in results.values()):
+        raise AssertionError(f"benchmark history: {history}")
+    if benchmark._select_baseline(history, 'previous') is not history[0] or \
+            benchmark._select_baseline(history, 'before') is not history[0]:
+        raise AssertionError("baseline selection picked the wrong run")
+    print(f"✓ 2 runs recorded with {len(results)} stages each (selected stage plus its dependencies)")
+    
+    def synthetic(seconds, peak_bytes):
+        return {'results': {'1000': {'stage': {'seconds': seconds, 'peak_bytes': peak_bytes}}}}
+    
+    megabyte = 1024 * 1024
+    cases = [
+        ((1.00, megabyte), (1.10, megabyte), False),      # within tolerance
+        ((1.00, megabyte), (1.50, megabyte), True),       # 50% slower
+        ((0.001, megabyte), (0.003, megabyte), False),    # too short to judge on time
+        ((1.00, megabyte), (1.00, 2 * megabyte), True),   # twice the peak memory
+        ((1.00, 1024), (1.00, 4096), False),              # allocation too small to judge
+    ]
+    for base, current, expected in cases:
+        rows = benchmark.compare(synthetic(*current), synthetic(*base), tolerance=0.2)
+        if len(rows) != 1 or rows[0]['regression'] != expected:
+            raise AssertionError(f"compare({current} vs {base}) gave {rows}")
+    print(f"✓ compare flags slower and hungrier stages and ignores noise ({len(cases)} cases)")
+
+
+def test_instrumentation(data):
+    """Test span recording, percentiles and the JSON/Prometheus exports."""
+    print_header("TEST 24: INSTRUMENTATION")
+    
+    was_enabled = instrumentation.is_enabled()
+    instrumentation.disable()
+    instrumentation.reset()
+    try:
+        detector = LearningGapDetector()
+        detector.analyze_cohort(data)
+        if instrumentation.summary():
+            raise AssertionError(f"disabled spans recorded {list(instrumentation.summary())}")
+        
+        instrumentation.enable()
+        detector.analyze_cohort(data)
+        with instrumentation.span('test.block'):
+            pass
+        stages = instrumentation.summary()
+        if stages.get('detector.analyze_cohort', {}).get('count') != 1 or stages['test.block']['count'] != 1:
+            raise AssertionError(f"enabled spans recorded {stages}")
+        print(f"✓ Disabled spans record nothing; enabled ones record {len(stages)} stages")
+        
+        instrumentation.reset()
+        for millis in range(1, 101):
+            instrumentation.record('test.stage', millis / 1000)
+        stats = instrumentation.summary()['test.stage']
+        expected = {'count': 100, 'total_seconds': 5.05, 'mean_seconds': 0.0505, 'p50_seconds': 0.050,
+                    'p95_seconds': 0.095, 'p99_seconds': 0.099, 'max_seconds': 0.100}
+        if stats.keys() != expected.keys() or any(not np.isclose(stats[key], value) for key, value in expected.items()):
+            raise AssertionError(f"summary of 1..100 ms is {stats}")
+        print("✓ Samples 1..100 ms: p50 50 ms, p95 95 ms, p99 99 ms, total 5.05 s")
+        
+        exported = json.loads(instrumentation.to_json())
+        prometheus = instrumentation.to_prometheus().splitlines()
+        if exported['stages']['test.stage']['count'] != 100 or \
+                'edu_sense_stage_seconds{stage="test.stage",quantile="0.95"} 0.095000000' not in prometheus or \
+                'edu_sense_stage_seconds_count{stage="test.stage"} 100' not in prometheus:
+            raise AssertionError(f"exports disagree with the summary: {prometheus}")
+        print(f"✓ JSON and Prometheus exports carry the same numbers ({len(prometheus)} Prometheus lines)")
+    finally:
+        instrumentation.reset()
+        if not was_enabled:
+            instrumentation.disable()
+
+
+def test_memory_profile():
+    """Test per-stage memory measurements and the RSS sampler."""
+    print_header("TEST 25: MEMORY PROFILE")
+    
+    report = memory_profile.profile_pipeline(size=20000, top_n=3)
+    stages = report['stages']
+    if report['attempts'] != 20000 or tuple(stages) != memory_profile.PIPELINE_STAGES or tracemalloc.is_tracing():
+        raise AssertionError(f"profiled {report['attempts']} attempts over {list(stages)}")
+    for name, stage in stages.items():
+        sizes = [allocation['size_bytes'] for allocation in stage['top_allocations']]
+        if not 0 < stage['retained_bytes'] <= stage['peak_bytes'] or len(sizes) > 3 or \
+                sizes != sorted(sizes, reverse=True) or \
+                not np.isclose(stage['peak_bytes_per_attempt'] * report['attempts'], stage['peak_bytes']):
+            raise AssertionError(f"stage {name}: {stage}")
+    # The index keeps at least one int64 row position per attempt
+    if stages['index']['retained_bytes_per_attempt'] < 8:
+        raise AssertionError(f"index retained {stages['index']['retained_bytes_per_attempt']:.1f} B/attempt")
+    print(f"✓ {len(stages)} stages for {report['attempts']:,} attempts: "
+          + ', '.join(f"{name} {stage['peak_bytes'] / 1e6:.1f} MB" for name, stage in stages.items()))
+    
+    sampler = memory_profile.RSSSampler(interval=0.001)
+    if sampler.available:
+        with sampler:
+            before = sampler.current()
+            block = np.ones(50 * 1024 * 1024 // 8)
+            # NumPy fills the block holding the GIL; keep it alive for a few samples
+            time.sleep(sampler.interval * 20)
+            del block
+        if sampler.peak < before + 40 * 1024 * 1024:
+            raise AssertionError(f"RSS peak {sampler.peak} missed a 50 MB allocation over {before}")
+        print(f"✓ RSS sampler caught a short-lived 50 MB allocation (peak {sampler.peak / 1e6:.0f} MB)")
+
+
+def test_ingestion(data):
+    """Test micro-batching, backpressure, bad-row rejection and failed batches in the ingestion pipeline."""
+    print_header("TEST 26: INGESTION")
+    
+    class FlakyDetector(IncrementalDetector):
+        """Fails its second update, like a full disk under the event log."""
+        updates = 0
+        
+        def update(self, attempts_df):
+            self.updates += 1
+            if self.updates == 2:
+                raise OSError("disk full")
+            super().update(attempts_df)
+    
+    events = data[ATTEMPT_FIELDS].astype({'Student_ID': str, 'Question_ID': str, 'Topic': str,
+                                          'Timestamp': str}).to_dict('records')
+    bad_events = [
+        dict(events[0], Correct=2),
+        dict(events[1], Student_ID=None),
+        dict(events[2], Time_Taken=-5),
+        dict(events[3], Time_Taken='slow'),
+        'not an event',
+    ]
+    
+    class FlakyStore(AnalysisStore):
+        """Fails its second write, after the detector has applied the batch."""
+        writes = 0
+        
+        def add_attempts(self, attempts_df):
+            self.writes += 1
+            if self.writes == 2:
+                raise sqlite3.OperationalError("database is locked")
+            return super().add_attempts(attempts_df)
+    
+    def ingest(detector, store=None):
+        pipeline = IngestionPipeline(detector, store=store, max_queue=8, max_batch_size=25, max_batch_wait_ms=20)
+        
+        async def run():
+            await pipeline.start()
+            await pipeline.put_many(events[:100] + bad_events + events[100:])
+            await pipeline.put_line(b'{not json')
+            await pipeline.stop()
+        
+        asyncio.run(run())
+        return pipeline.metrics()
+    
+    detector = IncrementalDetector()
+    metrics = ingest(detector)
+    if metrics['received'] != len(events) + len(bad_events) + 1 or metrics['accepted'] != len(events) or \
+            metrics['rejected'] != len(bad_events) + 1 or metrics['failed_batches'] != 0:
+        raise AssertionError(f"ingestion metrics {metrics}")
+    if metrics['max_queue_depth'] > 8 or metrics['batches'] < len(events) // 25 or \
+            metrics['mean_batch_size'] > 25:
+        raise AssertionError(f"batching/backpressure metrics {metrics}")
+    expected = LearningGapDetector().analyze_cohort(pd.DataFrame.from_records(events))
+    for student_id, analysis in detector.analyze_all().items():
+        reference = expected[student_id]
+        if analysis['total_attempts'] != reference['total_attempts'] or \
+                not np.isclose(analysis['accuracy'], reference['accuracy']) or \
+                set(analysis['gaps']) != set(reference['gaps']):
+            raise AssertionError(f"ingested analysis of {student_id} differs from analyze_cohort")
+    print(f"✓ {metrics['received']} events in {metrics['batches']} batches (≤25 each, queue depth "
+          f"≤{metrics['max_queue_depth']} of 8): {metrics['accepted']} accepted and analyzed as "
+          f"analyze_cohort, {metrics['rejected']} bad events rejected")
+    
+    detector = FlakyDetector()
+    metrics = ingest(detector)
+    failed = metrics['rejected'] - len(bad_events) - 1
+    if metrics['failed_batches'] != 1 or metrics['last_error'] != 'OSError: disk full' or \
+            not 0 < failed <= 25 or metrics['accepted'] + failed != len(events) or \
+            sum(analysis['total_attempts'] for analysis in detector.analyze_all().values()) != metrics['accepted']:
+        raise AssertionError(f"failed-batch metrics {metrics}")
+    print(f"✓ A failing batch of {failed} is counted as rejected and the consumer applies "
+          f"the other {metrics['accepted']} attempts")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        detector = IncrementalDetector()
+        with FlakyStore(os.path.join(tmp_dir, 'ingest.db')) as store:
+            metrics = ingest(detector, store)
+            stored = store.load_attempts()
+            results = store.results_frame()
+    totals = {student_id: analysis['total_attempts'] for student_id, analysis in detector.analyze_all().items()}
+    if metrics['accepted'] != len(events) or metrics['failed_batches'] != 0 or metrics['store_failures'] != 1 or \
+            metrics['unstored_attempts'] != 0 or not metrics['last_error'].startswith('store: OperationalError') or \
+            len(stored) != len(events) or \
+            stored['Student_ID'].astype(str).value_counts().to_dict() != totals or \
+            dict(zip(results['student_id'], results['total_attempts'])) != totals:
+        raise AssertionError(f"store-failure metrics {metrics}, {len(stored)} stored attempts")
+    print(f"✓ A failed store write keeps the batch accepted and is resent with the next one: "
+          f"store and detector both hold {len(stored)} attempts")
+
+
+def test_shared_data(data):
+    """Test that frozen frames reject in-place writes and session views stay private"""
+    print_header("TEST 27: SHARED DATA")
+
+    enable_copy_on_write()
+    frozen = freeze(data.copy())
+    original = frozen.copy(deep=True)
+
+    writes = {
+        'NumPy buffer': lambda: frozen['Time_Taken'].to_numpy().__setitem__(0, 1.0),
+        'datetime buffer': lambda: frozen['Timestamp'].to_numpy().__setitem__(0, np.datetime64('2020-01-01')),
+        'iloc': lambda: frozen.iloc.__setitem__((0, frozen.columns.get_loc('Time_Taken')), 1.0),
+        'loc': lambda: frozen.loc.__setitem__((frozen.index[0], 'Correct'), 1 - frozen['Correct'].iloc[0]),
+    }
+    for name, write in writes.items():
+        try:
+            write()
+        except ValueError:
+            continue
+        raise AssertionError(f"In-place {name} write on a frozen frame did not raise")
+    pd.testing.assert_frame_equal(frozen, original)
+    print(f"✓ {len(writes)} kinds of in-place write raise on the frozen frame")
+
+    view = session_view(frozen)
+    view['Time_Taken'] = 0.0
+    view.loc[view.index[0], 'Correct'] = 1 - view['Correct'].iloc[0]
+    view['Session_Flag'] = True
+    pd.testing.assert_frame_equal(frozen, original)
+    if 'Session_Flag' in frozen.columns or (view['Time_Taken'] != 0.0).any():
+        raise AssertionError("Session view writes leaked or were lost")
+
+    rows = np.flatnonzero(frozen['Topic'].to_numpy() == frozen['Topic'].iloc[0])
+    subset = session_view(frozen, rows)
+    subset.loc[subset.index, 'Time_Taken'] = -1.0
+    if len(subset) != len(rows) or (subset['Time_Taken'] != -1.0).any():
+        raise AssertionError("Row-filtered session view has the wrong rows or lost its write")
+    pd.testing.assert_frame_equal(frozen, original)
+    print("✓ Session views (full and row-filtered) take writes without touching the shared frame")
+
+    detector = LearningGapDetector()
+    expected = detector.analyze_cohort(original)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: LearningGapDetector().analyze_cohort(frozen), range(4)))
+    for result in results:
+        if json.dumps(result, sort_keys=True, default=str) != json.dumps(expected, sort_keys=True, default=str):
+            raise AssertionError("Concurrent analysis of the frozen frame differs from an unfrozen copy")
+    print(f"✓ {len(results)} concurrent analyses of the frozen frame match an unfrozen copy")
+
+
+def test_tenant_scheduler(data):
+    """Test work-stealing fairness and steal accounting, and the tenants CLI"""
+    print_header("TEST 28: TENANT SCHEDULER")
+
+    def tasks(tenant, count, cost):
+        return [{'tenant': tenant, 'cost': float(cost), 'chunk': i} for i in range(count)]
+
+    # Drain the queues the way TenantScheduler.run does, finishing the oldest task first
+    def drain(plan, workers, limit):
+        queues = WorkStealingQueues(plan, workers, limit)
+        owner = {id(task): worker for worker, queue in enumerate(queues.queues) for task in queue}
+        idle, running, handed, stolen, max_running = list(range(workers)), deque(), [], 0, Counter()
+        while len(queues) or running:
+            for worker in list(idle):
+                waiting = {task['tenant'] for queue in queues.queues for task in queue}
+                task = queues.next_task(worker)
+                if task is None:
+                    break
+                idle.remove(worker)
+                running.append((worker, task))
+                handed.append(task)
+                tenant = task['tenant']
+                if queues.running[tenant] > limit and waiting - {tenant}:
+                    raise AssertionError(f"{tenant} exceeded {limit} workers while other tenants waited")
+                if task['stolen'] != (owner[id(task)] != worker):
+                    raise AssertionError("Task 'stolen' flag does not match the queue it came from")
+                stolen += task['stolen']
+                max_running[tenant] = max(max_running[tenant], queues.running[tenant])
+            worker, task = running.popleft()
+            queues.task_done(task)
+            idle.append(worker)
+        return queues, handed, stolen, max_running
+
+    plan = {'big': tasks('big', 12, 10), 'small_a': tasks('small_a', 3, 1), 'small_b': tasks('small_b', 2, 1)}
+    queues = WorkStealingQueues(plan, 4, 2)
+    for tenant, tenant_tasks in plan.items():
+        holders = [w for w, queue in enumerate(queues.queues) if any(t['tenant'] == tenant for t in queue)]
+        if len(holders) != 1:
+            raise AssertionError(f"{tenant}'s chunks were split over queues {holders}")
+    if [task['tenant'] for task in queues.queues[0]] != ['big'] * 12:
+        raise AssertionError("Largest tenant was not placed first")
+    if queues.queued_cost != [120.0, 3.0, 2.0, 0.0]:
+        raise AssertionError(f"Unexpected queued cost {queues.queued_cost}")
+
+    queues, handed, stolen, max_running = drain(plan, 4, 2)
+    if sorted((t['tenant'], t['chunk']) for t in handed) != sorted((t['tenant'], t['chunk']) for ts in plan.values() for t in ts):
+        raise AssertionError("Tasks were lost or handed out twice")
+    if stolen != queues.steals or stolen == 0:
+        raise AssertionError(f"Steal count {queues.steals} does not match {stolen} stolen tasks")
+    if any(queues.running.values()) or any(queues.queued_cost):
+        raise AssertionError("Running slots or queued cost not released after draining")
+    print(f"✓ {len(handed)} tasks each handed out once; {stolen} steals counted; "
+          f"tenant limit held while others waited")
+
+    # With nobody else waiting, the limit must not leave workers idle
+    solo_queues, solo_handed, solo_stolen, solo_max = drain({'only': tasks('only', 8, 1)}, 4, 1)
+    if solo_max['only'] != 4 or len(solo_handed) != 8 or solo_stolen != solo_queues.steals:
+        raise AssertionError(f"Lone tenant used {solo_max['only']} workers with {solo_stolen} steals")
+    print("✓ A lone tenant uses every worker despite the fairness limit")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        schools = os.path.join(tmp, 'schools')
+        os.makedirs(schools)
+        students = sorted(data['Student_ID'].unique())
+        split = {'north': data[data['Student_ID'].isin(students[:5])],
+                 'south': data[data['Student_ID'].isin(students[5:])]}
+        for name, frame in split.items():
+            frame.to_csv(os.path.join(schools, f'{name}.csv'), index=False)
+        out_path = os.path.join(tmp, 'all.jsonl')
+        report_path = os.path.join(tmp, 'run.json')
+        code = edu_sense.main(['tenants', schools, '--out', out_path, '--report', report_path,
+                               '--workers', '1', '--chunk-size', '2', '--quiet'])
+        if code != 0:
+            raise AssertionError(f"tenants exited {code}")
+        with open(out_path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        got = {(row['tenant'], row['student_id']) for row in rows}
+        expected = {(name, sid) for name, frame in split.items() for sid in frame['Student_ID'].unique()}
+        if got != expected or len(rows) != len(expected):
+            raise AssertionError("tenants output does not cover every tenant's students once")
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        chunks = sum(-(-frame['Student_ID'].nunique() // 2) for frame in split.values())
+        if (report['tenants'] != 2 or report['students'] != len(students)
+                or report['attempts'] != len(data) or report['tasks'] != chunks):
+            raise AssertionError(f"Unexpected run report {report}")
+
+        empty = os.path.join(tmp, 'empty')
+        os.makedirs(empty)
+        failures = {
+            'no attempt files': ['tenants', empty, '--out', out_path],
+            'missing tenant column': ['tenants', schools, '--tenant-column', 'School', '--out', out_path],
+            'missing file': ['tenants', os.path.join(tmp, 'absent.csv'), '--out', out_path],
+        }
+        for name, argv in failures.items():
+            with contextlib.redirect_stderr(io.StringIO()) as stderr:
+                code = edu_sense.main(argv + ['--workers', '1', '--quiet'])
+            if code != 1 or 'error:' not in stderr.getvalue():
+                raise AssertionError(f"tenants with {name} exited {code}: {stderr.getvalue()!r}")
+    print(f"✓ tenants CLI: exit 0 with {len(rows)} rows over 2 tenants; exit 1 for "
+          f"{', '.join(failures)}")
+
+
+def test_anomaly_model(data):
+    """Test that a saved anomaly model scores and flags students like the one that was fitted"""
+    print_header("TEST 29: ANOMALY MODEL")
+
+    cohort = generate_synthetic_data(num_students=80, num_questions=30, random_seed=7)
+    try:
+        ProfileAnomalyDetector().score(cohort)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Scoring with an unfitted model did not raise")
+
+    model = ProfileAnomalyDetector(contamination=0.05).fit(cohort)
+    scores = model.score(cohort)
+    gaps = model.gaps(cohort)
+    if len(scores) != cohort['Student_ID'].nunique() or not gaps:
+        raise AssertionError(f"Expected a score per student and some unusual ones, got {len(gaps)}")
+    if set(gaps) != set(scores.index[scores['unusual']]):
+        raise AssertionError("gaps() does not cover exactly the unusual students")
+    batched = ProfileAnomalyDetector(contamination=0.05, batch_size=7).fit(cohort).score(cohort)
+    pd.testing.assert_frame_equal(batched, scores)
+    print(f"✓ Fitted on {len(scores)} students; {len(gaps)} unusual; batch size does not change scores")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'models', 'anomaly.joblib')
+        model.save(path)
+        loaded = ProfileAnomalyDetector.load(path)
+        pd.testing.assert_frame_equal(loaded.score(cohort), scores)
+        if loaded.gaps(cohort) != gaps:
+            raise AssertionError("Loaded model reports different profile gaps")
+        if (loaded.feature_names, loaded.high_threshold) != (model.feature_names, model.high_threshold):
+            raise AssertionError("Loaded model lost its features or severity threshold")
+
+        # Scoring only part of the cohort, including a topic the model never saw
+        subset = cohort[cohort['Student_ID'].isin(scores.index[:10])].copy()
+        subset.loc[subset.index[:3], 'Topic'] = 'Unseen Topic'
+        pd.testing.assert_frame_equal(loaded.score(subset), model.score(subset))
+        print("✓ save()/load() round-trip gives identical scores, gaps and threshold")
+
+        detector = LearningGapDetector()
+        expected = detector.analyze_cohort(cohort, anomaly=model)
+        if json.dumps(detector.analyze_cohort(cohort, anomaly=loaded), sort_keys=True, default=str) != \
+                json.dumps(expected, sort_keys=True, default=str):
+            raise AssertionError("analyze_cohort differs between the fitted and the loaded model")
+        flagged = {sid for sid, analysis in expected.items() if 'profile_gap' in analysis['gaps']}
+        if flagged != set(gaps):
+            raise AssertionError("analyze_cohort added profile_gap to the wrong students")
+
+        reused = ProfileAnomalyDetector.load_or_fit(path, cohort.head(0))
+        pd.testing.assert_frame_equal(reused.score(cohort), scores)
+        fresh_path = os.path.join(tmp, 'fresh.joblib')
+        ProfileAnomalyDetector.load_or_fit(fresh_path, cohort)
+        if not os.path.exists(fresh_path):
+            raise AssertionError("load_or_fit did not save the model it fitted")
+
+        bogus = os.path.join(tmp, 'bogus.joblib')
+        joblib.dump({'not': 'a model'}, bogus)
+        try:
+            ProfileAnomalyDetector.load(bogus)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Loading a file without a model did not raise")
+    print(f"✓ analyze_cohort matches with the loaded model ({len(flagged)} profile gaps); "
+          f"load_or_fit reuses saved models; foreign files are rejected")
+
+
+def test_group_profiles(data):
+    """Test student group sums, profiles and labels against a recompute, and groups kept by ingestion"""
+    print_header("TEST 30: GROUP PROFILES")
+
+    attempts = data.copy()
+    attempts['Topic'] = attempts['Topic'].astype(object)
+    attempts.loc[attempts.index[::17], 'Topic'] = None
+    fitted = StudentClusters(n_clusters=3).fit(attempts)
+    updated = StudentClusters(n_clusters=3)
+    for rows in np.array_split(np.arange(len(attempts)), 7):
+        updated.update(attempts.iloc[rows])
+    order = [updated.student_ids.index(student_id) for student_id in fitted.student_ids]
+    columns = [updated.topics.index(topic) for topic in fitted.topics]
+    for name in ('topic_attempts', 'topic_correct'):
+        if not np.allclose(getattr(updated, name)[np.ix_(order, columns)], getattr(fitted, name)):
+            raise AssertionError(f"{name} after 7 batches differs from fitting at once")
+    if not np.allclose(updated.time_sums[order], fitted.time_sums) or \
+            not np.allclose(updated.student_correct[order], fitted.student_correct):
+        raise AssertionError("Timing or correct sums after 7 batches differ from fitting at once")
+    if fitted.topic_attempts.sum() != attempts['Topic'].notna().sum() or fitted.time_sums[:, 0].sum() != len(attempts):
+        raise AssertionError("Null-topic attempts were not kept out of topic sums only")
+    print(f"✓ Running sums after 7 update() batches match fit() ({int(fitted.time_sums[:, 0].sum())} attempts, "
+          f"{int(attempts['Topic'].isna().sum())} without a topic)")
+
+    rows = np.arange(len(fitted))
+    if not np.array_equal(fitted.model.predict(fitted._embed(rows)), fitted.labels.to_numpy()):
+        raise AssertionError("fit() labels are not the nearest centroids")
+    before = fitted.labels.copy()
+    fitted.relabel()
+    pd.testing.assert_series_equal(fitted.labels, before)
+
+    labeled = attempts.assign(group=attempts['Student_ID'].astype(str).map(fitted.labels))
+    profiles = fitted.profiles()
+    grouped = labeled.groupby('group')
+    expected = pd.DataFrame({
+        'students': grouped['Student_ID'].nunique(),
+        'accuracy': grouped['Correct'].mean(),
+        'mean_time': grouped['Time_Taken'].mean(),
+    }).reindex(range(fitted.n_clusters))
+    by_topic = labeled.pivot_table(index='group', columns='Topic', values='Correct', aggfunc='mean')
+    for column in expected.columns:
+        if not np.allclose(profiles[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float)):
+            raise AssertionError(f"profiles() {column} differs from pandas")
+    for topic in fitted.topics:
+        if not np.allclose(profiles[topic], by_topic[topic].reindex(range(fitted.n_clusters)), equal_nan=True):
+            raise AssertionError(f"profiles() accuracy for {topic} differs from pandas")
+    if profiles['weakest_topic'].tolist() != by_topic.reindex(range(fitted.n_clusters)).idxmin(axis=1).tolist():
+        raise AssertionError("profiles() weakest_topic differs from pandas")
+    print(f"✓ fit() labels are the nearest centroids; profiles() match pandas for "
+          f"{fitted.n_clusters} groups and {len(fitted.topics)} topics")
+
+    events = data[ATTEMPT_FIELDS].astype({'Student_ID': str, 'Question_ID': str, 'Topic': str,
+                                          'Timestamp': str}).to_dict('records')
+    clusters = StudentClusters(n_clusters=3)
+    pipeline = IngestionPipeline(IncrementalDetector(), clusters=clusters, max_batch_size=40, max_batch_wait_ms=20)
+
+    async def run():
+        await pipeline.start()
+        await pipeline.put_many(events)
+        await pipeline.stop()
+
+    asyncio.run(run())
+    metrics = pipeline.metrics()
+    counts = clusters.labels.value_counts().reindex(range(3), fill_value=0).tolist()
+    if metrics['group_failures'] or metrics['group_sizes'] != counts or sum(counts) != data['Student_ID'].nunique():
+        raise AssertionError(f"ingestion group sizes {metrics['group_sizes']}, labels give {counts}")
+    if not np.allclose(clusters.time_sums[:, 0].sum(), len(events)):
+        raise AssertionError("Ingested groups did not see every accepted attempt")
+    print(f"✓ Ingestion kept {metrics['batches']} batches in groups of {metrics['group_sizes']}")
+
+
+def test_peer_index(data):
+    """Test similar-student queries against brute-force distances and background rebuilds"""
+    print_header("TEST 31: PEER INDEX")
+
+    cohort = generate_synthetic_data(num_students=60, num_questions=30, random_seed=11)
+    # A twin of the first student, at distance 0 from it
+    first = cohort['Student_ID'].iloc[0]
+    cohort = pd.concat([cohort, cohort[cohort['Student_ID'] == first].assign(Student_ID='STU_TWIN')],
+                       ignore_index=True)
+
+    # The embedding recomputed with pandas: standardized topic accuracy, log mean time and time CV
+    by_student = cohort.groupby('Student_ID')
+    topic_accuracy = cohort.pivot_table(index='Student_ID', columns='Topic', values='Correct', aggfunc='mean')
+    topic_accuracy = topic_accuracy.apply(lambda column: column.fillna(by_student['Correct'].mean()))
+    mean_time = by_student['Time_Taken'].mean()
+    time_cv = (by_student['Time_Taken'].std() / mean_time).fillna(0.0)
+    raw = pd.concat([topic_accuracy.sort_index(axis=1), np.log1p(mean_time), time_cv], axis=1)
+    spread = raw.std(ddof=0).replace(0, 1.0)
+    embedding = (raw - raw.mean()) / spread
+
+    checked = 0
+    for algorithm in ('kd_tree', 'ball_tree'):
+        index = PeerIndex(algorithm=algorithm, leaf_size=4).build(cohort)
+        if len(index) != len(embedding):
+            raise AssertionError(f"{algorithm} indexed {len(index)} of {len(embedding)} students")
+        for student_id in embedding.index:
+            distances = np.sqrt(((embedding - embedding.loc[student_id]) ** 2).sum(axis=1)).drop(student_id)
+            expected = distances.sort_values(kind='stable')
+            peers = index.neighbors(student_id, k=5)
+            got = [distance for _, distance in peers]
+            if len(peers) != 5 or not np.allclose(got, expected.iloc[:5]) or \
+                    not np.allclose([distances[peer] for peer, _ in peers], got) or student_id in dict(peers):
+                raise AssertionError(f"{algorithm} neighbors of {student_id}: {peers}, "
+                                     f"brute force {list(expected.iloc[:5].items())}")
+            checked += 1
+        twin = index.neighbors(first, k=1)
+        if twin[0][0] != 'STU_TWIN' or twin[0][1] > 1e-9:
+            raise AssertionError(f"{algorithm}: nearest peer of {first} is {twin}, not its twin")
+        if index.neighbors('STU_UNKNOWN') or len(index.neighbors(first, k=10_000)) != len(embedding) - 1:
+            raise AssertionError(f"{algorithm}: unknown student or oversized k handled wrongly")
+    print(f"✓ {checked} k-NN queries over kd_tree and ball_tree match brute-force distances")
+
+    index = PeerIndex().build(cohort)
+    before = index.neighbors(first, k=3)
+    newcomer = cohort[cohort['Student_ID'] == first].assign(Student_ID='STU_NEW')
+    future = index.rebuild_in_background(pd.concat([cohort, newcomer], ignore_index=True))
+    during = index.neighbors(first, k=3)
+    # Served from the old tree, or the new one if the rebuild already finished
+    if during != before and 'STU_NEW' not in dict(during):
+        raise AssertionError(f"Query during a rebuild returned {during}")
+    if future.result(timeout=60) is not index or not index.wait(timeout=0) or index.error is not None:
+        raise AssertionError("Background rebuild did not complete cleanly")
+    if len(index) != len(embedding) + 1 or 'STU_NEW' not in dict(index.neighbors(first, k=2)):
+        raise AssertionError("Rebuilt index does not serve the new student")
+
+    index.rebuild_in_background(cohort.drop(columns=['Time_Taken']))
+    try:
+        index.wait(timeout=60)
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("wait() did not raise the failed rebuild's error")
+    if not isinstance(index.error, KeyError) or len(index) != len(embedding) + 1:
+        raise AssertionError(f"Failed rebuild reported {index.error!r} or replaced the served index")
+    print(f"✓ Background rebuild swaps in {len(index)} students; a failed rebuild is reported "
+          f"and keeps the previous index")
+
+
 def run_full_demo():
     """Run the complete demo."""
     print("\n")
@@ -177,7 +1555,7 @@ def run_full_demo():
     print("╚" + "="*68 + "╝")
     
     print(f"\nTest Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("Running 6 comprehensive tests...\n")
+    print("Running 31 comprehensive tests...\n")
     
     try:
         # Test 1: Data Generation
@@ -198,6 +1576,81 @@ def run_full_demo():
         # Test 6: Comparative Analysis
         compare_students(data)
         
+        # Test 7: Data Loading
+        test_data_loading(data)
+        
+        # Test 8: Import Budget
+        test_import_budget()
+        
+        # Test 9: Cohort Analysis
+        test_cohort_analysis(data)
+        
+        # Test 10: Quantile Sketches
+        test_quantile_sketches(data)
+        
+        # Test 11: Result Store
+        test_result_store(data)
+        
+        # Test 12: Change Feed
+        test_change_feed()
+        
+        # Test 13: Checkpoint Restore
+        test_checkpoint_restore(data)
+        
+        # Test 14: Co-Errors
+        test_co_errors(data)
+        
+        # Test 15: Cohort Baselines
+        test_cohort_baselines(data)
+        
+        # Test 16: Student Groups
+        test_student_groups(data)
+        
+        # Test 17: Service
+        test_service(data)
+        
+        # Test 18: Caching Layer
+        test_caching_layer(data)
+        
+        # Test 19: Cohort Aggregates
+        test_cohort_aggregates(data)
+        
+        # Test 20: Attempt Pagination
+        test_attempt_pagination(data)
+        
+        # Test 21: App Pages
+        test_app_pages(data)
+        
+        # Test 22: Batch CLI
+        test_batch_cli(data)
+        
+        # Test 23: Benchmark Suite
+        test_benchmark_suite()
+        
+        # Test 24: Instrumentation
+        test_instrumentation(data)
+        
+        # Test 25: Memory Profile
+        test_memory_profile()
+        
+        # Test 26: Ingestion
+        test_ingestion(data)
+        
+        # Test 27: Shared data
+        test_shared_data(data)
+        
+        # Test 28: Tenant scheduler
+        test_tenant_scheduler(data)
+        
+        # Test 29: Anomaly model
+        test_anomaly_model(data)
+        
+        # Test 30: Group profiles
+        test_group_profiles(data)
+        
+        # Test 31: Peer index
+        test_peer_index(data)
+        
         # Success message
         print_header("ALL TESTS COMPLETED SUCCESSFULLY ✓")
         print("EDU-SENSE System is working correctly!")
@@ -0,0 +1,248 @@
+"""
+Point-in-time ("as of date") analysis.
+Sorts attempts per student and per (student, topic) by Timestamp and keeps
+prefix sums of correctness and time, so accuracy and topic accuracy as of
+any date are a binary search plus two lookups, and a whole-cohort snapshot
+at a date is one vectorized pass. Attempts without a Timestamp count as
+happening before every date.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Optional
+
+import numpy as np
+
+from gap_detector import LearningGapDetector
+from instrumentation import traced
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class TimeTravelIndex:
+    """
+    Prefix sums over an attempt table, per student and per (student, topic),
+    in Timestamp order. Answers LearningGapDetector questions as of a date.
+    """
+
+    @traced('time_travel.build')
+    def __init__(self, data: pd.DataFrame, detector: Optional[LearningGapDetector] = None):
+        import pandas as pd
+
+        self.detector = detector or LearningGapDetector()
+
+        student_codes, student_ids = pd.factorize(data['Student_ID'], sort=True)
+        topic_codes, topics = pd.factorize(data['Topic'])
+        timestamps = pd.to_datetime(data['Timestamp']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        correct = (data['Correct'] == 1).to_numpy()
+        # NaT is the smallest int64, so undated attempts sort first and are always included
+        self.student_ids = np.asarray(student_ids).astype(str)
+        self.topics = [str(topic) for topic in topics]
+        self._positions = {student_id: i for i, student_id in enumerate(self.student_ids)}
+        self.num_students = len(self.student_ids)
+
+        # Per student, in time order
+        order = np.lexsort((timestamps, student_codes))
+        self.timestamps = timestamps[order]
+        self.student_codes = student_codes[order]
+        self.times = data['Time_Taken'].to_numpy(dtype=np.float64)[order]
+        self.wrong = (data['Correct'] == 0).to_numpy()[order]
+        counts = np.bincount(student_codes, minlength=self.num_students)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.cum_correct = np.concatenate(([0], np.cumsum(correct[order])))
+        self.cum_time = np.concatenate(([0.0], np.cumsum(self.times)))
+
+        # Per (student, topic) pair, in time order; null topics (code -1) would alias
+        # the previous student's last topic, and the detector never counts them
+        pair_keys = student_codes.astype(np.int64) * len(self.topics) + topic_codes
+        known = np.flatnonzero(topic_codes >= 0)
+        pair_order = known[np.lexsort((timestamps[known], pair_keys[known]))]
+        sorted_keys = pair_keys[pair_order]
+        keys, starts = np.unique(sorted_keys, return_index=True)
+        self.pair_students, self.pair_topics = np.divmod(keys, len(self.topics))
+        self.pair_offsets = np.append(starts, len(sorted_keys))
+        self.pair_codes = np.repeat(np.arange(len(keys)), np.diff(self.pair_offsets))
+        self.pair_timestamps = timestamps[pair_order]
+        self.pair_cum_correct = np.concatenate(([0], np.cumsum(correct[pair_order])))
+        self._pair_lookup = {(int(s), int(t)): i for i, (s, t) in
+                             enumerate(zip(self.pair_students, self.pair_topics))}
+        # First attempt of each pair, to list topics in the detector's order
+        self._pair_first_row = np.minimum.reduceat(pair_order, starts) if len(starts) else starts
+
+    def __len__(self) -> int:
+        return self.num_students
+
+    def _cutoff(self, date) -> np.int64:
+        """Date as int64 nanoseconds (attempts at or before it are included)."""
+        import pandas as pd
+        return np.int64(pd.Timestamp(date).value)
+
+    def accuracy_as_of(self, student_id: str, date) -> Optional[float]:
+        """
+        Accuracy of a student over attempts up to a date, in O(log n).
+
+        Args:
+            student_id: Student to look up
+            date: Anything pandas.Timestamp accepts
+
+        Returns:
+            Accuracy, or None if the student is unknown or had no attempts by then
+        """
+        position = self._positions.get(str(student_id))
+        if position is None:
+            return None
+        start, end = self.offsets[position], self.offsets[position + 1]
+        count = self._count_until(self.timestamps, start, end, date)
+        if count == 0:
+            return None
+        return (self.cum_correct[start + count] - self.cum_correct[start]) / count
+
+    def topic_accuracy_as_of(self, student_id: str, topic: str, date) -> Optional[float]:
+        """Accuracy of a student on one topic up to a date, in O(log n) (None if no attempts)."""
+        pair = self._pair_lookup.get((self._positions.get(str(student_id)), self._topic_code(topic)))
+        if pair is None:
+            return None
+        start, end = self.pair_offsets[pair], self.pair_offsets[pair + 1]
+        count = self._count_until(self.pair_timestamps, start, end, date)
+        if count == 0:
+            return None
+        return (self.pair_cum_correct[start + count] - self.pair_cum_correct[start]) / count
+
+    def progress_of(self, student_id: str) -> Optional[Dict]:
+        """
+        Accuracy over the earlier and the later half of a student's attempts.
+
+        Args:
+            student_id: Student to look up
+
+        Returns:
+            Dictionary with midpoint (Timestamp of the last earlier-half
+            attempt), last (Timestamp of the latest attempt),
+            earlier_accuracy and recent_accuracy; None for unknown students,
+            fewer than 2 attempts or an undated earlier half
+        """
+        import pandas as pd
+
+        position = self._positions.get(str(student_id))
+        if position is None:
+            return None
+        start, end = self.offsets[position], self.offsets[position + 1]
+        half = (end - start) // 2
+        if half == 0 or self.timestamps[start + half - 1] == np.iinfo(np.int64).min:
+            return None
+        return {
+            'midpoint': pd.Timestamp(self.timestamps[start + half - 1]),
+            'last': pd.Timestamp(self.timestamps[end - 1]),
+            'earlier_accuracy': float(self.cum_correct[start + half] - self.cum_correct[start]) / half,
+            'recent_accuracy': float(self.cum_correct[end] - self.cum_correct[start + half]) / (end - start - half),
+        }
+
+    @traced('time_travel.analyze_student')
+    def analyze_student_as_of(self, student_id: str, date) -> Dict:
+        """
+        What analyze_student() would have returned on a date.
+        Totals and topic accuracy come from prefix sums; the confidence and
+        speed rules compare each attempt to the average, so they read the
+        student's attempts up to the date.
+
+        Args:
+            student_id: Student to analyze
+            date: Anything pandas.Timestamp accepts
+
+        Returns:
+            Dictionary with detected gaps and metrics (empty analysis if no attempts)
+        """
+        position = self._positions.get(str(student_id))
+        if position is None:
+            return self.detector._empty_analysis()
+        cutoff = self._cutoff(date)
+        start, end = self.offsets[position], self.offsets[position + 1]
+        count = self._count_until(self.timestamps, start, end, cutoff)
+        if count == 0:
+            return self.detector._empty_analysis()
+
+        pairs = np.flatnonzero(self.pair_students == position)
+        pair_counts = np.array([
+            self._count_until(self.pair_timestamps, self.pair_offsets[p], self.pair_offsets[p + 1], cutoff)
+            for p in pairs
+        ], dtype=np.int64)
+        pairs, pair_counts = pairs[pair_counts > 0], pair_counts[pair_counts > 0]
+        pair_correct = self.pair_cum_correct[self.pair_offsets[pairs] + pair_counts] - \
+            self.pair_cum_correct[self.pair_offsets[pairs]]
+
+        return self._analyses(
+            student_codes=np.zeros(count, dtype=np.int64),
+            rows=slice(start, start + count),
+            student_positions=np.array([position]),
+            totals=np.array([count]),
+            correct=np.array([self.cum_correct[start + count] - self.cum_correct[start]]),
+            time_sums=np.array([self.cum_time[start + count] - self.cum_time[start]]),
+            pairs=pairs, pair_students=np.zeros(len(pairs), dtype=np.int64),
+            pair_counts=pair_counts, pair_correct=pair_correct,
+        )[str(student_id)]
+
+    @traced('time_travel.cohort_as_of')
+    def cohort_as_of(self, date) -> Dict[str, Dict]:
+        """
+        What analyze_cohort() would have returned on a date, in one vectorized pass.
+
+        Args:
+            date: Anything pandas.Timestamp accepts
+
+        Returns:
+            Dictionary mapping student ID to its analysis (students with no
+            attempts by the date are left out)
+        """
+        cutoff = self._cutoff(date)
+        included = self.timestamps <= cutoff
+        totals = np.bincount(self.student_codes[included], minlength=self.num_students)
+        ends = self.offsets[:-1] + totals
+        correct = self.cum_correct[ends] - self.cum_correct[self.offsets[:-1]]
+        time_sums = self.cum_time[ends] - self.cum_time[self.offsets[:-1]]
+
+        pair_counts = np.bincount(self.pair_codes[self.pair_timestamps <= cutoff],
+                                  minlength=len(self.pair_students))
+        pair_correct = self.pair_cum_correct[self.pair_offsets[:-1] + pair_counts] - \
+            self.pair_cum_correct[self.pair_offsets[:-1]]
+
+        active = np.flatnonzero(totals > 0)
+        remap = np.full(self.num_students, -1, dtype=np.int64)
+        remap[active] = np.arange(len(active))
+        pairs = np.flatnonzero(pair_counts > 0)
+        return self._analyses(
+            student_codes=remap[self.student_codes[included]],
+            rows=included,
+            student_positions=active,
+            totals=totals[active], correct=correct[active], time_sums=time_sums[active],
+            pairs=pairs, pair_students=remap[self.pair_students[pairs]],
+            pair_counts=pair_counts[pairs], pair_correct=pair_correct[pairs],
+        )
+
+    def _analyses(self, student_codes, rows, student_positions, totals, correct, time_sums,
+                  pairs, pair_students, pair_counts, pair_correct) -> Dict[str, Dict]:
+        """Apply the detector rules to as-of totals (LearningGapDetector._analyses_from_totals)."""
+        detector = self.detector
+        times = self.times[rows]
+        wrong = self.wrong[rows]
+        avg_time = time_sums / totals
+        # Concept gaps list topics in order of first attempt, as analyze_cohort does
+        order = np.argsort(self._pair_first_row[pairs], kind='stable')
+        return detector._analyses_from_totals(
+            self.student_ids[student_positions], totals, correct, time_sums,
+            detector._time_std(student_codes, times, avg_time, totals),
+            pair_students[order], np.asarray(self.topics, dtype=object)[self.pair_topics[pairs[order]]],
+            pair_counts[order], pair_correct[order],
+            detector._timing_counts(student_codes, times, wrong, avg_time),
+        )
+
+    def _count_until(self, timestamps: np.ndarray, start: int, end: int, date) -> int:
+        """Attempts in a time-sorted segment at or before a date (binary search)."""
+        cutoff = date if isinstance(date, np.int64) else self._cutoff(date)
+        return int(np.searchsorted(timestamps[start:end], cutoff, side='right'))
+
+    def _topic_code(self, topic: str) -> int:
+        try:
+            return self.topics.index(str(topic))
+        except ValueError:
+            return -1
@@ -2,11 +2,17 @@
 Utility functions for EDU-SENSE system.
 """
 
-import pandas as pd
+from __future__ import annotations
+
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Tuple
 from datetime import datetime
 
+import config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class AnalysisUtils:
     """Utility functions for data analysis and processing."""
@@ -133,6 +139,29 @@ class AnalysisUtils:
         consistency = 1 - min(1, cv / 2)  # Normalize to 0-1
         
         return consistency
+    
+    @staticmethod
+    def get_risk_band(analysis_results: Dict) -> str:
+        """
+        Classify an analyzed student into a dashboard risk band.
+        
+        Args:
+            analysis_results: Dictionary from LearningGapDetector
+            
+        Returns:
+            Risk band: 'high', 'medium', or 'on_track'
+        """
+        gaps = analysis_results.get('gaps', {})
+        high_severity = config.RISK_BANDS['high_risk_severity']
+        
+        if analysis_results.get('total_attempts', 0) > 0 and \
+                analysis_results['overall_score'] < config.RISK_BANDS['high_risk_score']:
+            return 'high'
+        if any(details['severity'] == high_severity for details in gaps.values()):
+            return 'high'
+        if gaps:
+            return 'medium'
+        return 'on_track'
 
 
 class ReportGenerator:
@@ -239,6 +268,8 @@ class DataValidator:
         Returns:
             Tuple of (is_valid, list_of_errors)
         """
+        import pandas as pd
+
         errors = []
         
         # Check required columns
@@ -263,6 +294,31 @@ class DataValidator:
             errors.append("DataFrame is empty")
         
         return len(errors) == 0, errors
+    
+    @staticmethod
+    def valid_rows(df: pd.DataFrame) -> pd.Series:
+        """
+        Row-level version of validate_student_data, for dropping bad rows
+        instead of rejecting the whole table.
+        
+        Args:
+            df: DataFrame to check
+            
+        Returns:
+            Boolean Series, True for rows with every required value present,
+            'Correct' in {0, 1} and a non-negative numeric 'Time_Taken'
+        """
+        import pandas as pd
+
+        required_cols = ['Student_ID', 'Question_ID', 'Topic', 'Correct', 'Time_Taken']
+        if any(col not in df.columns for col in required_cols):
+            return pd.Series(False, index=df.index)
+        
+        valid = df[required_cols].notna().all(axis=1)
+        valid &= df['Correct'].isin([0, 1])
+        time_taken = pd.to_numeric(df['Time_Taken'], errors='coerce')
+        valid &= time_taken.notna() & (time_taken >= 0)
+        return valid
 
 
 class PerformanceMetrics:
@@ -0,0 +1,5 @@
+"""
+Page modules for the EDU-SENSE Streamlit app.
+Each module exposes render(detection_mode) and is imported by app.py only
+when its page is first opened.
+"""
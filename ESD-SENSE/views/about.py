@@ -0,0 +1,111 @@
+"""
+About page: mission, technology stack and features.
+"""
+
+import streamlit as st
+
+
+def render(detection_mode: str) -> None:
+    """Render the About page."""
+    st.markdown("<h2 style='text-align: center;'>ℹ️ About EDU-SENSE</h2>", unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("""
+        <div class='feature-card'>
+            <h3>🎯 Mission</h3>
+            <p>EDU-SENSE is an AI-powered learning gap detection system designed to:</p>
+            <ul>
+                <li><strong>Detect</strong> learning gaps early before students fail</li>
+                <li><strong>Analyze</strong> student mistake patterns and behavior</li>
+                <li><strong>Recommend</strong> timely micro-interventions</li>
+                <li><strong>Support</strong> teachers with actionable insights</li>
+                <li><strong>Respect</strong> student privacy and maintain transparency</li>
+            </ul>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown("""
+        <div class='feature-card'>
+            <h3>🛠️ Technology Stack</h3>
+            <ul style='list-style: none; padding: 0;'>
+                <li>🐍 <strong>Backend:</strong> Python, Pandas, Scikit-learn</li>
+                <li>🎨 <strong>Frontend:</strong> Streamlit</li>
+                <li>📊 <strong>Data:</strong> Synthetic datasets based on real patterns</li>
+                <li>🤖 <strong>ML Approach:</strong> Rule-based + Lightweight ML</li>
+            </ul>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.divider()
+    
+    st.markdown("""
+    <div class='feature-card'>
+        <h3 style='text-align: center;'>📊 How It Works</h3>
+        <table style='width: 100%;'>
+            <tr>
+                <td style='text-align: center; padding: 10px;'><strong style='font-size: 1.5em;'>1️⃣</strong><br>Input</td>
+                <td style='text-align: center; padding: 10px;'>→</td>
+                <td style='text-align: center; padding: 10px;'><strong style='font-size: 1.5em;'>2️⃣</strong><br>Analysis</td>
+                <td style='text-align: center; padding: 10px;'>→</td>
+                <td style='text-align: center; padding: 10px;'><strong style='font-size: 1.5em;'>3️⃣</strong><br>Classification</td>
+                <td style='text-align: center; padding: 10px;'>→</td>
+                <td style='text-align: center; padding: 10px;'><strong style='font-size: 1.5em;'>4️⃣</strong><br>Recommendation</td>
+                <td style='text-align: center; padding: 10px;'>→</td>
+                <td style='text-align: center; padding: 10px;'><strong style='font-size: 1.5em;'>5️⃣</strong><br>Action</td>
+            </tr>
+        </table>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    st.divider()
+    
+    st.markdown("<h3 style='text-align: center;'>✨ Key Features</h3>", unsafe_allow_html=True)
+    
+    features = {
+        "🔍 Pattern Detection": "Identifies repeated mistakes and confusion patterns",
+        "⚡ Real-time Analysis": "Instant gap detection from student behavior",
+        "🎯 Targeted Recommendations": "Specific, actionable interventions",
+        "📊 Visual Reports": "Easy-to-understand dashboards for teachers",
+        "🔐 Privacy-First": "Works with synthetic data, respects anonymity",
+        "📈 Teacher-Friendly": "Designed with teachers' needs in mind"
+    }
+    
+    feature_cols = st.columns(2)
+    for idx, (feature, description) in enumerate(features.items()):
+        with feature_cols[idx % 2]:
+            st.markdown(f"""
+            <div class='feature-card'>
+                <h4>{feature}</h4>
+                <p>{description}</p>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    st.divider()
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("""
+        <div class='feature-card'>
+            <h3>👥 Team</h3>
+            <p>EDU-SENSE - Developed for early learning intervention and student support</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown("""
+        <div class='feature-card'>
+            <h3>📞 Contact & Support</h3>
+            <p>For questions or feedback, please contact the development team.</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.divider()
+    st.markdown("""
+    <div style='text-align: center; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+                border-radius: 12px; color: white;'>
+        <strong>Version 1.0.0</strong> | Demo | Last Updated: 2025
+    </div>
+    """, unsafe_allow_html=True)
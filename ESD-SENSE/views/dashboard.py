@@ -0,0 +1,220 @@
+"""
+Dashboard page: cohort metrics, data loading and the attempt table.
+"""
+
+import functools
+
+import streamlit as st
+
+import app_cache
+import config
+from attempt_table import render_attempt_table
+from instrumentation import traced
+from shared_data import session_view
+
+
+def render(detection_mode: str) -> None:
+    """Render the Dashboard page."""
+    st.markdown("<h2 style='text-align: center; animation: fade-in-up 0.6s ease-out;'>📊 System Dashboard</h2>", unsafe_allow_html=True)
+
+    # Filled in once the load buttons below have run
+    metrics_area = st.container()
+
+    st.divider()
+
+    # Load or generate sample data
+    if st.button("🔄 Load Sample Student Data", key="load_data"):
+        fingerprint, data = app_cache.load_sample_dataset()
+        st.session_state.dataset_fingerprint = fingerprint
+        st.session_state.student_data = session_view(data)
+        st.success("Sample data loaded successfully!")
+
+    with st.expander("📂 Load Attempts File (CSV / Parquet / JSONL)"):
+        attempts_path = st.text_input("Path to attempts file", key="attempts_path")
+        if st.button("📥 Load File", key="load_file") and attempts_path:
+            progress_bar = st.progress(0.0)
+            try:
+                fingerprint, data = app_cache.load_file_dataset(
+                    attempts_path,
+                    progress_callback=lambda rows, fraction: progress_bar.progress(
+                        fraction if fraction is not None else 0.0,
+                        text=f"{rows:,} attempts read"
+                    )
+                )
+                st.session_state.dataset_fingerprint = fingerprint
+                st.session_state.student_data = session_view(data)
+                st.success(f"Loaded {len(st.session_state.student_data):,} attempts from {attempts_path}")
+            except (OSError, ValueError, ImportError) as e:
+                st.error(f"Could not load attempts file: {e}")
+
+    with metrics_area:
+        _metric_cards(detection_mode)
+
+    if st.session_state.student_data is not None:
+        st.markdown("<h3 style='text-align: center; margin-top: 30px;'>📈 Recent Student Activity</h3>", unsafe_allow_html=True)
+        _attempt_table(detection_mode)
+
+        st.markdown("<h3 style='text-align: center; margin-top: 30px;'>Student Status Overview</h3>", unsafe_allow_html=True)
+        _status_overview(detection_mode)
+
+
+def _precomputer(detection_mode: str):
+    """Start background analysis (once per dataset) and return its precomputer."""
+    index = app_cache.get_attempt_index(st.session_state.dataset_fingerprint,
+                                        st.session_state.student_data)
+    return app_cache.get_precomputer(st.session_state.dataset_fingerprint,
+                                     detection_mode, index)
+
+
+def _analysis_running(detection_mode: str) -> bool:
+    """
+    True while background analysis of the loaded dataset still has chunks to
+    process (False when it is disabled, finished or stopped on failures).
+    """
+    return (st.session_state.student_data is not None
+            and _precomputer(detection_mode).is_running)
+
+
+def _cohort_metrics(detection_mode: str):
+    """Start background analysis (once per dataset) and read the aggregates."""
+    precomputer = _precomputer(detection_mode)
+    metrics = app_cache.get_aggregates(st.session_state.dataset_fingerprint,
+                                       detection_mode,
+                                       st.session_state.student_data).snapshot()
+    return precomputer, metrics
+
+
+def _refresh_while_running(render):
+    """
+    Render a dashboard section as a fragment that polls only while background
+    analysis runs.
+
+    The polling fragment reruns every UI['refresh_seconds'] and asks for one full
+    rerun when analysis finishes; from then on the section is a static fragment,
+    so finished dashboards stop rerunning for every open session.
+    """
+    @st.fragment(run_every=config.UI['refresh_seconds'])
+    def polling(detection_mode: str) -> None:
+        render(detection_mode)
+        if not _analysis_running(detection_mode):
+            st.rerun()
+
+    @st.fragment
+    def static(detection_mode: str) -> None:
+        render(detection_mode)
+
+    @functools.wraps(render)
+    def section(detection_mode: str) -> None:
+        if _analysis_running(detection_mode):
+            polling(detection_mode)
+        else:
+            static(detection_mode)
+
+    return section
+
+
+@_refresh_while_running
+@traced('view.dashboard.metric_cards')
+def _metric_cards(detection_mode: str) -> None:
+    """Headline metric cards; refreshes on its own while analysis runs."""
+    if st.session_state.student_data is not None:
+        _, metrics = _cohort_metrics(detection_mode)
+        total_students = f"{metrics['total_students']:,}"
+        new_students = f"↑ {metrics['new_students_this_week']:,} new this week"
+        gaps_detected = f"{metrics['gaps_detected']:,}"
+        gaps_this_week = f"↑ {metrics['gaps_this_week']:,} this week"
+        intervention_rate = f"{metrics['intervention_rate']:.0%}"
+        rate_delta = metrics['intervention_rate_delta']
+        rate_delta = f"{'↑' if rate_delta >= 0 else '↓'} {abs(rate_delta):.0%} vs last week"
+    else:
+        total_students = gaps_detected = intervention_rate = "—"
+        new_students = gaps_this_week = rate_delta = "Load data to see metrics"
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.markdown(f"""
+        <div class='metric-card'>
+            <div style='font-size: 2.5em; margin-bottom: 10px;'>👥</div>
+            <div style='font-size: 1.5em; font-weight: 700;'>{total_students}</div>
+            <div style='font-size: 0.9em; opacity: 0.9;'>Total Students</div>
+            <div style='font-size: 0.8em; margin-top: 5px; opacity: 0.8;'>{new_students}</div>
+        </div>
+        """, unsafe_allow_html=True)
+    with col2:
+        st.markdown(f"""
+        <div class='metric-card' style='background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);'>
+            <div style='font-size: 2.5em; margin-bottom: 10px;'>⚠️</div>
+            <div style='font-size: 1.5em; font-weight: 700;'>{gaps_detected}</div>
+            <div style='font-size: 0.9em; opacity: 0.9;'>Gaps Detected</div>
+            <div style='font-size: 0.8em; margin-top: 5px; opacity: 0.8;'>{gaps_this_week}</div>
+        </div>
+        """, unsafe_allow_html=True)
+    with col3:
+        st.markdown(f"""
+        <div class='metric-card' style='background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);'>
+            <div style='font-size: 2.5em; margin-bottom: 10px;'>📈</div>
+            <div style='font-size: 1.5em; font-weight: 700;'>{intervention_rate}</div>
+            <div style='font-size: 0.9em; opacity: 0.9;'>Intervention Rate</div>
+            <div style='font-size: 0.8em; margin-top: 5px; opacity: 0.8;'>{rate_delta}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+
+@st.fragment
+@traced('view.dashboard.attempt_table')
+def _attempt_table(detection_mode: str) -> None:
+    """Filtered attempt table; paging and filtering only rerun this fragment."""
+    index = app_cache.get_attempt_index(st.session_state.dataset_fingerprint,
+                                        st.session_state.student_data)
+    render_attempt_table(index,
+                         app_cache.get_aggregates(st.session_state.dataset_fingerprint,
+                                                  detection_mode,
+                                                  st.session_state.student_data),
+                         key="dashboard_attempts")
+
+
+@_refresh_while_running
+@traced('view.dashboard.status_overview')
+def _status_overview(detection_mode: str) -> None:
+    """Background analysis progress and risk band counts."""
+    precomputer, metrics = _cohort_metrics(detection_mode)
+    done, total = precomputer.progress()
+    if precomputer.is_started:
+        st.progress(done / total if total else 1.0,
+                    text=f"Background analysis: {done:,}/{total:,} students analyzed")
+    else:
+        st.caption("Background analysis is turned off (PRECOMPUTE['enabled']); "
+                   "students are analyzed when opened.")
+    if precomputer.failed:
+        st.warning(f"Background analysis failed for {precomputer.failed:,} students "
+                   f"({precomputer.errors[0]}); they are analyzed when opened.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown(f"""
+        <div class='metric-card' style='background: linear-gradient(135deg, #ff6b6b 0%, #ff8787 100%); text-align: center;'>
+            <div style='font-size: 3em;'>🔴</div>
+            <div style='font-size: 1.8em; font-weight: 700;'>{metrics['risk_bands']['high']:,}</div>
+            <div style='font-size: 1em;'>High Risk Students</div>
+            <div style='font-size: 0.85em; margin-top: 5px; opacity: 0.9;'>Needs immediate intervention</div>
+        </div>
+        """, unsafe_allow_html=True)
+    with col2:
+        st.markdown(f"""
+        <div class='metric-card' style='background: linear-gradient(135deg, #ffa500 0%, #ffb74d 100%); text-align: center;'>
+            <div style='font-size: 3em;'>🟡</div>
+            <div style='font-size: 1.8em; font-weight: 700;'>{metrics['risk_bands']['medium']:,}</div>
+            <div style='font-size: 1em;'>Medium Risk Students</div>
+            <div style='font-size: 0.85em; margin-top: 5px; opacity: 0.9;'>Monitor closely</div>
+        </div>
+        """, unsafe_allow_html=True)
+    with col3:
+        st.markdown(f"""
+        <div class='metric-card' style='background: linear-gradient(135deg, #51cf66 0%, #69db7c 100%); text-align: center;'>
+            <div style='font-size: 3em;'>🟢</div>
+            <div style='font-size: 1.8em; font-weight: 700;'>{metrics['risk_bands']['on_track']:,}</div>
+            <div style='font-size: 1em;'>On Track Students</div>
+            <div style='font-size: 0.85em; margin-top: 5px; opacity: 0.9;'>Progressing well</div>
+        </div>
+        """, unsafe_allow_html=True)
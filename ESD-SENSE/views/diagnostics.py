@@ -0,0 +1,56 @@
+"""
+Diagnostics page (hidden): per-stage timing histograms from instrumentation.
+"""
+
+import pandas as pd
+import streamlit as st
+
+import instrumentation
+
+
+def render(detection_mode: str) -> None:
+    """Render the Diagnostics page."""
+    st.header("🩺 Diagnostics")
+    st.caption("Timing spans are process-wide: they include every session of this app server.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        enabled = st.toggle("Record timing spans", value=instrumentation.is_enabled(),
+                            key="instrumentation_enabled")
+        if enabled and not instrumentation.is_enabled():
+            instrumentation.enable()
+        elif not enabled and instrumentation.is_enabled():
+            instrumentation.disable()
+    with col2:
+        if st.button("🗑️ Reset samples", key="instrumentation_reset"):
+            instrumentation.reset()
+
+    stages = instrumentation.summary()
+    if not stages:
+        st.info("No spans recorded yet. Enable recording and use the app, then come back.")
+        return
+
+    table = pd.DataFrame([
+        {
+            'Stage': name,
+            'Count': stats['count'],
+            'Total (s)': stats['total_seconds'],
+            'Mean (ms)': stats['mean_seconds'] * 1000,
+            'p50 (ms)': stats['p50_seconds'] * 1000,
+            'p95 (ms)': stats['p95_seconds'] * 1000,
+            'p99 (ms)': stats['p99_seconds'] * 1000,
+            'Max (ms)': stats['max_seconds'] * 1000,
+        }
+        for name, stats in stages.items()
+    ]).sort_values('Total (s)', ascending=False)
+    st.dataframe(table, use_container_width=True, hide_index=True,
+                 column_config={col: st.column_config.NumberColumn(format="%.2f")
+                                for col in table.columns if col not in ('Stage', 'Count')})
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("📥 Download JSON", instrumentation.to_json(),
+                           file_name="edu_sense_spans.json", mime="application/json")
+    with col2:
+        st.download_button("📥 Download Prometheus text", instrumentation.to_prometheus(),
+                           file_name="edu_sense_spans.prom", mime="text/plain")
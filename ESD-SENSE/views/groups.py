@@ -0,0 +1,78 @@
+"""
+Group Interventions page: students grouped by topic accuracy and timing,
+with one intervention plan per group.
+"""
+
+import pandas as pd
+import streamlit as st
+
+import app_cache
+import config
+from instrumentation import traced
+
+
+def render(detection_mode: str) -> None:
+    """Render the Group Interventions page."""
+    st.header("👥 Group Interventions")
+
+    if st.session_state.student_data is not None:
+        _groups_panel(detection_mode)
+    else:
+        st.warning("Please load sample data first from the Dashboard page")
+
+
+@st.fragment
+@traced('view.groups.groups_panel')
+def _groups_panel(detection_mode: str) -> None:
+    """Group count slider and one expander per group; changes only rerun this fragment."""
+    fingerprint = st.session_state.dataset_fingerprint
+    data = st.session_state.student_data
+    n_clusters = st.slider("Number of groups", min_value=2, max_value=8,
+                           value=config.CLUSTERING['n_clusters'], key="group_count")
+
+    clusters = app_cache.get_student_clusters(fingerprint, n_clusters, data)
+    if not clusters.is_fitted:
+        st.info(f"Grouping needs at least {n_clusters} students.")
+        return
+
+    index = app_cache.get_attempt_index(fingerprint, data)
+    precomputer = app_cache.get_precomputer(fingerprint, detection_mode, index)
+    done, total = precomputer.progress()
+    if precomputer.is_running:
+        st.caption(f"Plans use the {done:,}/{total:,} students analyzed so far; "
+                   "they fill in as background analysis finishes.")
+    elif done < total:
+        st.caption(f"Plans use the {done:,}/{total:,} students background analysis covered.")
+
+    # Weakest group first
+    groups = [group for group in clusters.group_recommendations(precomputer.all_recommendations())
+              if group['students']]
+    groups.sort(key=lambda group: group['profile']['accuracy'])
+    for position, group in enumerate(groups):
+        profile = group['profile']
+        weakest = f" · weakest topic: {profile['weakest_topic']}" if profile['weakest_topic'] else ""
+        with st.expander(f"Group {position + 1}: {len(group['students']):,} students{weakest}",
+                         expanded=position == 0):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Students", f"{len(group['students']):,}")
+            with col2:
+                st.metric("Accuracy", f"{profile['accuracy']:.1%}")
+            with col3:
+                st.metric("Avg Time (sec)", f"{profile['mean_time']:.1f}")
+
+            topic_accuracy = {topic: profile[topic] for topic in clusters.topics}
+            st.dataframe(pd.DataFrame([topic_accuracy]).round(2), use_container_width=True, hide_index=True)
+
+            st.write("**Group plan:**")
+            for rec in group['recommendations']:
+                st.write(f"🎯 **{rec['title']}** ({rec['priority']}): recommended for "
+                         f"{rec['students']:,} of {group['analyzed']:,} students ({rec['share']:.0%})")
+                st.caption(f"{rec['practice_type']} · {rec['duration']} · "
+                           f"Topics: {', '.join(rec['target_topics'])}")
+            if not group['recommendations']:
+                st.caption("No group members analyzed yet.")
+
+            shown = group['students'][:config.CLUSTERING['members_shown']]
+            st.caption(f"Members: {', '.join(shown)}"
+                       f"{' …' if len(shown) < len(group['students']) else ''}")
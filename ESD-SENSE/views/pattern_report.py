@@ -0,0 +1,57 @@
+"""
+Pattern Report page: detailed metrics and gap table for the analyzed student.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+
+def render(detection_mode: str) -> None:
+    """Render the Pattern Report page."""
+    st.header("📋 Learning Pattern Analysis Report")
+    
+    if st.session_state.student_data is not None and st.session_state.analysis_results is not None:
+        results = st.session_state.analysis_results
+        
+        st.subheader("Pattern Summary")
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Total Attempts", results['total_attempts'])
+        with col2:
+            st.metric("Correct Answers", f"{results['correct_answers']}/{results['total_attempts']}")
+        with col3:
+            st.metric("Avg Time (sec)", f"{results['avg_time']:.1f}")
+        with col4:
+            st.metric("Accuracy", f"{results['accuracy']:.1%}")
+        
+        st.divider()
+        
+        st.subheader("Detailed Gap Analysis")
+        
+        # Create detailed report
+        report_data = {
+            'Gap Type': list(results['gaps'].keys()),
+            'Severity': [results['gaps'][g]['severity'] for g in results['gaps'].keys()],
+            'Confidence': [f"{results['gaps'][g]['confidence']:.1%}" for g in results['gaps'].keys()],
+            'Affected Questions': [results['gaps'][g].get('affected_questions', 0) for g in results['gaps'].keys()]
+        }
+        
+        report_df = pd.DataFrame(report_data)
+        st.dataframe(report_df, use_container_width=True)
+        
+        # Export option
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("📥 Download Report as CSV"):
+                csv = report_df.to_csv(index=False)
+                st.download_button(
+                    label="Download CSV",
+                    data=csv,
+                    file_name=f"analysis_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    mime="text/csv"
+                )
+    else:
+        st.warning("Please complete student analysis first")
@@ -0,0 +1,71 @@
+"""
+Recommendations page: intervention plan for the analyzed student.
+"""
+
+import streamlit as st
+
+import app_cache
+
+
+def render(detection_mode: str) -> None:
+    """Render the Recommendations page."""
+    st.header("💡 Personalized Intervention Recommendations")
+    
+    if st.session_state.analysis_results is not None:
+        results = st.session_state.analysis_results
+        
+        # Generate recommendations
+        if st.session_state.get('analysis_as_of') is not None:
+            # Point-in-time analysis: plan from that day's gaps, not today's
+            st.caption(f"Based on the analysis as of {st.session_state.analysis_as_of:%Y-%m-%d}")
+            recommendations = app_cache.get_recommendation_engine().generate_recommendations(results)
+        else:
+            index = app_cache.get_attempt_index(st.session_state.dataset_fingerprint,
+                                                st.session_state.student_data)
+            recommendations = app_cache.student_recommendations(st.session_state.dataset_fingerprint,
+                                                                st.session_state.analysis_mode,
+                                                                st.session_state.analyzed_student,
+                                                                index)
+        
+        st.subheader("Recommended Actions")
+        
+        for i, rec in enumerate(recommendations, 1):
+            with st.expander(f"🎯 Recommendation {i}: {rec['title']}", expanded=(i==1)):
+                col1, col2 = st.columns([2, 1])
+                
+                with col1:
+                    st.write(f"**Description:** {rec['description']}")
+                    st.write(f"**Practice Type:** {rec['practice_type']}")
+                    st.write(f"**Suggested Duration:** {rec['duration']}")
+                    st.write(f"**Target Topics:** {', '.join(rec['target_topics'])}")
+                
+                with col2:
+                    st.metric("Priority", rec['priority'])
+                    st.metric("Expected Impact", f"{rec['expected_impact']:.0%}")
+        
+        st.divider()
+        st.subheader("Implementation Guide")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.write("**For Teachers:**")
+            st.write("""
+            1. Review recommended interventions above
+            2. Select 2-3 high-priority recommendations
+            3. Schedule focused practice sessions
+            4. Monitor student progress
+            5. Re-assess after 1-2 weeks
+            """)
+        
+        with col2:
+            st.write("**For Students:**")
+            st.write("""
+            1. Attempt recommended practice problems
+            2. Focus on target topics first
+            3. Spend time on weak areas
+            4. Track your improvement
+            5. Ask for help when stuck
+            """)
+    else:
+        st.warning("Please complete student analysis first")
@@ -0,0 +1,182 @@
+"""
+Student Analysis page: pick a student and view detected gaps.
+"""
+
+import pandas as pd
+import streamlit as st
+
+import app_cache
+from attempt_table import student_picker
+from instrumentation import traced
+from peers import peer_outcomes
+from shared_data import session_view
+
+
+def render(detection_mode: str) -> None:
+    """Render the Student Analysis page."""
+    st.header("🔍 Analyze Student Learning Patterns")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if st.button("📥 Load Sample Data First", key="load_sample"):
+            fingerprint, data = app_cache.load_sample_dataset()
+            st.session_state.dataset_fingerprint = fingerprint
+            st.session_state.student_data = session_view(data)
+            st.success("Sample data loaded!")
+    
+    if st.session_state.student_data is not None:
+        _analysis_panel(detection_mode)
+    else:
+        st.warning("Please load sample data first from the Dashboard page")
+
+
+@st.fragment
+@traced('view.student_analysis.analysis_panel')
+def _analysis_panel(detection_mode: str) -> None:
+    """Student picker, Analyze button and results; clicks only rerun this fragment."""
+    index = app_cache.get_attempt_index(st.session_state.dataset_fingerprint,
+                                        st.session_state.student_data)
+    
+    # Student selection (search by ID prefix instead of listing every student)
+    selected_student = student_picker(index, key="student")
+    
+    # Point-in-time analysis: what the detector would have said on an earlier date
+    as_of = None
+    timestamps = st.session_state.student_data['Timestamp'] \
+        if 'Timestamp' in st.session_state.student_data.columns else None
+    if timestamps is not None and timestamps.notna().any():
+        first_day, last_day = timestamps.min().date(), timestamps.max().date()
+        as_of = st.date_input("As of date", value=last_day, min_value=first_day,
+                              max_value=last_day, key="as_of_date")
+        if as_of >= last_day:
+            as_of = None
+    
+    if st.button("🔬 Analyze Selected Student", key="analyze_btn",
+                 disabled=selected_student is None):
+        if as_of is None:
+            # Read the precomputed analysis, or analyze on demand if not ready yet
+            analysis = app_cache.student_analysis(st.session_state.dataset_fingerprint,
+                                                  detection_mode, selected_student, index)
+        else:
+            history = app_cache.get_time_travel_index(st.session_state.dataset_fingerprint,
+                                                      detection_mode, st.session_state.student_data)
+            end_of_day = pd.Timestamp(as_of) + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+            analysis = history.analyze_student_as_of(selected_student, end_of_day)
+        st.session_state.analysis_results = analysis
+        st.session_state.analyzed_student = selected_student
+        st.session_state.analysis_mode = detection_mode
+        st.session_state.analysis_as_of = as_of
+        when = f" as of {as_of:%Y-%m-%d}" if as_of is not None else ""
+        st.success(f"Analysis complete for {selected_student}{when}!")
+    
+    # Display results
+    if st.session_state.analysis_results is not None:
+        st.divider()
+        st.subheader("📊 Analysis Results")
+        
+        results = st.session_state.analysis_results
+        
+        # Display detected gaps
+        st.subheader("Detected Learning Gaps")
+        for gap_type, details in results['gaps'].items():
+            if details['severity'] == 'high':
+                st.markdown(f"""
+                <div class="gap-alert">
+                    <strong>🔴 {gap_type.upper()}</strong><br>
+                    Severity: {details['severity']}<br>
+                    Confidence: {details['confidence']:.1%}
+                </div>
+                """, unsafe_allow_html=True)
+            elif details['severity'] == 'medium':
+                st.markdown(f"""
+                <div class="gap-warning">
+                    <strong>🟡 {gap_type.upper()}</strong><br>
+                    Severity: {details['severity']}<br>
+                    Confidence: {details['confidence']:.1%}
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                st.markdown(f"""
+                <div class="gap-safe">
+                    <strong>🟢 {gap_type.upper()}</strong><br>
+                    Severity: {details['severity']}<br>
+                    Confidence: {details['confidence']:.1%}
+                </div>
+                """, unsafe_allow_html=True)
+        
+        # Overall score
+        st.metric("Overall Performance Score", 
+                 f"{results['overall_score']:.1%}", 
+                 delta=None)
+        
+        # Timing and accuracy against the cohort on the same topics and questions
+        if results.get('topic_pace'):
+            st.subheader("⏱️ Pace vs Cohort")
+            st.dataframe(_pace_frame(results['topic_pace']), use_container_width=True, hide_index=True)
+            st.caption("Time z-scores: standard deviations slower (+) or faster (−) than the "
+                       "cohort on the same topic / the same questions.")
+
+        # Students with similar profiles, and what followed their earlier recommendations
+        if st.session_state.analysis_as_of is None:
+            _peers_section(detection_mode)
+
+
+def _peers_section(detection_mode: str) -> None:
+    """Nearest peers of the analyzed student and how they progressed."""
+    st.subheader("👥 Similar Students")
+    fingerprint = st.session_state.dataset_fingerprint
+    data = st.session_state.student_data
+    peer_index = app_cache.get_peer_index(fingerprint, data)
+    if not peer_index.is_ready:
+        if peer_index.error is not None:
+            st.error(f"The similar-student index could not be built: {peer_index.error}")
+        else:
+            st.caption("The similar-student index is still being built; analyze again in a moment.")
+        return
+    peers = peer_index.neighbors(st.session_state.analyzed_student)
+    if not peers:
+        st.caption("No similar students found.")
+        return
+
+    if 'Timestamp' in data.columns:
+        history = app_cache.get_time_travel_index(fingerprint, detection_mode, data)
+        outcomes = peer_outcomes(peers, history, app_cache.get_recommendation_engine())
+    else:
+        outcomes = [{'student_id': student_id, 'distance': distance} for student_id, distance in peers]
+    st.dataframe(_peers_frame(outcomes), use_container_width=True, hide_index=True)
+    st.caption("Peers have the closest per-topic accuracy and timing. \"Recommended Then\" is "
+               "what they were recommended halfway through their attempts; \"Change\" is their "
+               "accuracy over the later half minus the earlier half.")
+
+
+def _peers_frame(outcomes: list) -> pd.DataFrame:
+    """Display table for peer_outcomes()."""
+    return pd.DataFrame([
+        {
+            'Student': outcome['student_id'],
+            'Distance': outcome['distance'],
+            'Earlier Accuracy': outcome.get('earlier_accuracy'),
+            'Recent Accuracy': outcome.get('recent_accuracy'),
+            'Change': outcome.get('improvement'),
+            'Recommended Then': ', '.join(outcome.get('earlier_recommendations', [])),
+            'Gaps Resolved': ', '.join(outcome.get('resolved_gaps', [])),
+            'Current Gaps': ', '.join(outcome.get('gaps', [])),
+        }
+        for outcome in outcomes
+    ]).round(2)
+
+
+def _pace_frame(topic_pace: dict) -> pd.DataFrame:
+    """Display table for an analysis' topic_pace."""
+    return pd.DataFrame([
+        {
+            'Topic': topic,
+            'Attempts': pace['attempts'],
+            'Time vs Topic (σ)': pace['time_z'],
+            'Time vs Questions (σ)': pace['question_time_z'],
+            'Accuracy': pace['accuracy'],
+            'Cohort Accuracy': pace['expected_accuracy'],
+        }
+        for topic, pace in topic_pace.items()
+    ]).round(2)